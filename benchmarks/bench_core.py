@@ -0,0 +1,143 @@
+# Benchmarks for the parts of the addon that don't need blender (relive_render_addon/core.py)
+# Builds synthetic sprite and output trees in a temp folder and measures scan, plan, rename and parse throughput.
+# Every run is appended to a history file and compared with the previous run that used the same settings.
+#
+# python benchmarks/bench_core.py [--sizes 1000 10000 50000] [--frames 8] [--depth 3]
+
+import os, sys, json, time, struct, zlib, shutil, argparse, tempfile, platform, subprocess
+
+repo_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(repo_folder, 'relive_render_addon'))
+
+import core
+
+models = ['abe_game', 'mud_green_game', 'mud_blind_game']
+
+def make_png_header(width, height):
+    # signature and IHDR chunk, enough for read_png_size
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return core.png_signature + struct.pack('>I', len(ihdr)) + b'IHDR' + ihdr + struct.pack('>I', zlib.crc32(b'IHDR' + ihdr))
+
+def make_sprite_tree(folder, anim_count, frame_count):
+    # every 10th animation has no meta.json (its meta is inferred from the pngs)
+    for i in range(anim_count):
+        anim_folder = os.path.join(folder, 'Anim{:05d}'.format(i))
+        os.makedirs(anim_folder)
+        width, height = 40 + i % 200, 60 + i % 150
+
+        if i % 10 == 0:
+            for frame in range(frame_count):
+                with open(os.path.join(anim_folder, '{}.png'.format(frame)), 'wb') as f:
+                    f.write(make_png_header(width, height))
+        else:
+            with open(os.path.join(anim_folder, 'meta.json'), 'w') as f:
+                json.dump({'frame_count': frame_count, 'size': {'w': width, 'h': height}, 'offset': {'x': width // 2, 'y': height}}, f)
+
+def make_output_tree(anims_to_render):
+    # what blender leaves behind before the frames are renamed
+    for render_anim in anims_to_render:
+        os.makedirs(render_anim.file_path.removesuffix('/' + core.default_pass_name), exist_ok=True)
+        for frame in range(render_anim.frame_start, render_anim.frame_end + 1):
+            open('{}{:04d}.png'.format(render_anim.file_path, frame), 'wb').close()
+
+def make_frame_strings(count):
+    return ['@Walk{}:{};@Turn:0,2,2,5;@Idle:3'.format(i % 50, 1 + i % 12) for i in range(count)]
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def run_size(work_folder, anim_count, frame_count, depth, rename_limit):
+    results = {}
+    sprite_folder = os.path.join(work_folder, 'sprites')
+    make_sprite_tree(sprite_folder, anim_count, frame_count)
+
+    # SCAN (second scan uses the inferred meta catalogue)
+    core.inferred_meta_catalogue.clear()
+    seconds, anims = timed(core.get_anims, sprite_folder, '*', True)
+    results['scan_folders_per_s'] = anim_count / seconds
+    seconds, anims = timed(core.get_anims, sprite_folder, '*', True)
+    results['rescan_folders_per_s'] = anim_count / seconds
+
+    # PLAN
+    render_path = '/'.join(['renders'] + ['level{}'.format(i) for i in range(depth)])
+    full_ranges = lambda anim: [(0, anim.frame_count - 1, ())]
+    seconds, anims_to_render = timed(core.plan_jobs, anims, models, render_path, core.default_pass_name, True, 4, full_ranges)
+    results['plan_jobs_per_s'] = len(anims_to_render) / seconds
+    seconds, workers = timed(core.assign_jobs_to_workers, anims_to_render, 8)
+    results['assign_jobs_per_s'] = len(anims_to_render) / seconds
+
+    # RENAME (on a slice of the plan, so big sizes don't fill the disk)
+    rename_jobs = anims_to_render[:rename_limit]
+    make_output_tree(rename_jobs)
+    frames = sum(job.frame_end - job.frame_start + 1 for job in rename_jobs)
+    start = time.perf_counter()
+    for job in rename_jobs:
+        core.rename_rendered_frames(job.file_path, core.default_pass_name, job.frame_start, job.frame_end)
+    results['rename_frames_per_s'] = frames / (time.perf_counter() - start)
+
+    # PARSE (legacy csv frame strings)
+    frame_strings = make_frame_strings(anim_count)
+    start = time.perf_counter()
+    for frame_string in frame_strings:
+        core.get_frame_list(frame_string)
+    results['parse_strings_per_s'] = anim_count / (time.perf_counter() - start)
+
+    return results
+
+def get_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repo_folder, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ''
+
+def load_previous(history_file, settings):
+    previous = None
+    if os.path.exists(history_file):
+        with open(history_file) as f:
+            for line in f:
+                record = json.loads(line)
+                if record['settings'] == settings:
+                    previous = record
+    return previous
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Benchmarks the bpy-free core of the RELIVE batch renderer')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000], help='number of animation folders in each synthetic sprite tree')
+    parser.add_argument('--frames', type=int, default=8, help='frames per animation')
+    parser.add_argument('--depth', type=int, default=3, help='extra folder levels in the render path')
+    parser.add_argument('--rename-limit', type=int, default=3000, help='jobs whose output is created and renamed per size')
+    parser.add_argument('--history', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history.jsonl'), help='results are appended to this file')
+    args = parser.parse_args(argv)
+
+    settings = {'sizes': args.sizes, 'frames': args.frames, 'depth': args.depth, 'rename_limit': args.rename_limit}
+    previous = load_previous(args.history, settings)
+
+    results = {}
+    start_folder = os.getcwd()
+    for anim_count in args.sizes:
+        work_folder = tempfile.mkdtemp(prefix='relive_bench_')
+        try:
+            # output paths are relative to the blend folder (the working directory)
+            os.chdir(work_folder)
+            results[str(anim_count)] = run_size(work_folder, anim_count, args.frames, args.depth, args.rename_limit)
+        finally:
+            os.chdir(start_folder)
+            shutil.rmtree(work_folder, ignore_errors=True)
+
+    for size, size_results in results.items():
+        print('{} animation folders'.format(size))
+        for name, value in size_results.items():
+            line = '  {:24} {:>14,.0f}'.format(name, value)
+            if previous is not None and size in previous['results']:
+                old_value = previous['results'][size].get(name)
+                if old_value:
+                    line += '  {:+6.1f}%'.format((value / old_value - 1) * 100)
+            print(line)
+
+    with open(args.history, 'a') as f:
+        f.write(json.dumps({'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'commit': get_commit(), 'python': platform.python_version(), 'settings': settings, 'results': results}) + '\n')
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
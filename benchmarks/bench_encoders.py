@@ -0,0 +1,119 @@
+# Benchmarks the frame encoders of relive_render_addon/core.py (PNG, QOI, raw RGBA, and lossless WebP if Pillow is installed)
+# on rendered frames: encode time, decode time and size of every format, relative to png.
+# Without --catalogue, synthetic sprite-like frames are used.
+#
+# python benchmarks/bench_encoders.py [--catalogue renders] [--limit 200] [--synthetic 50 --size 300]
+
+import os, io, sys, json, time, random, argparse, platform
+
+benchmark_folder = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(benchmark_folder), 'relive_render_addon'))
+
+import core
+from bench_core import get_commit
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+def find_frames(catalogue, limit):
+    # every png in the catalogue, spread evenly over it if there are more than limit
+    frame_files = []
+    for folder, folders, files in os.walk(catalogue):
+        folders.sort()
+        frame_files += [os.path.join(folder, file) for file in sorted(files) if file.endswith('.png')]
+    if len(frame_files) > limit:
+        frame_files = frame_files[::len(frame_files) // limit][:limit]
+    return frame_files
+
+def load_frames(frame_files):
+    frames = []
+    for frame_file in frame_files:
+        with open(frame_file, 'rb') as f:
+            frames.append(core.decode_png(f.read()))
+    return frames
+
+def make_synthetic_frames(count, size):
+    # an opaque, shaded blob on a transparent background, like a character sprite
+    random.seed(count)
+    frames = []
+    for i in range(count):
+        width, height = size + i % 7, size * 3 // 2
+        center_x, center_y, radius = width // 2, height // 2, size // 3 + i % 5
+        pixels = bytearray(width * height * 4)
+        for y in range(height):
+            for x in range(width):
+                if (x - center_x) ** 2 + ((y - center_y) // 2) ** 2 < radius ** 2:
+                    shade = 80 + (x * 3 + y) % 120
+                    pixels[(y * width + x) * 4:(y * width + x + 1) * 4] = bytes((shade, shade // 2 + random.randint(0, 2), 40, 255))
+        frames.append((width, height, 4, bytes(pixels)))
+    return frames
+
+def get_encoders():
+    # name -> (encode, decode), encode(width, height, channels, pixels) -> data, decode(data, width, height)
+    encoders = {name: (encoder.encode, encoder.decode) for name, encoder in core.frame_encoders.items() if encoder.encode is not None}
+
+    if Image is not None:
+        def encode_webp(width, height, channels, pixels):
+            output = io.BytesIO()
+            Image.frombytes('RGBA' if channels == 4 else 'RGB', (width, height), pixels).save(output, 'WEBP', lossless=True)
+            return output.getvalue()
+
+        def decode_webp(data, width, height):
+            image = Image.open(io.BytesIO(data))
+            return image.width, image.height, len(image.getbands()), image.tobytes()
+
+        encoders['WEBP'] = (encode_webp, decode_webp)
+    return encoders
+
+def run(frames):
+    results = {}
+    raw_size = sum(width * height * channels for width, height, channels, pixels in frames)
+    for name, (encode, decode) in get_encoders().items():
+        start = time.perf_counter()
+        encoded = [encode(*frame) for frame in frames]
+        encode_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for data, (width, height, channels, pixels) in zip(encoded, frames):
+            decode(data, width, height)
+        decode_seconds = time.perf_counter() - start
+
+        size = sum(len(data) for data in encoded)
+        results[name] = {'encode_ms_per_frame': encode_seconds * 1000 / len(frames), 'decode_ms_per_frame': decode_seconds * 1000 / len(frames), 'bytes': size, 'ratio': size / raw_size}
+    return results
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Benchmarks the frame encoders of the RELIVE batch renderer')
+    parser.add_argument('--catalogue', help='folder with rendered frames (pngs, searched recursively)')
+    parser.add_argument('--limit', type=int, default=200, help='maximum number of frames taken from the catalogue')
+    parser.add_argument('--synthetic', type=int, default=20, help='number of synthetic frames without --catalogue')
+    parser.add_argument('--size', type=int, default=200, help='width of the synthetic frames')
+    parser.add_argument('--history', default=os.path.join(benchmark_folder, 'encoder_history.jsonl'), help='results are appended to this file')
+    args = parser.parse_args(argv)
+
+    if args.catalogue:
+        frames = load_frames(find_frames(args.catalogue, args.limit))
+        settings = {'catalogue': os.path.abspath(args.catalogue), 'limit': args.limit}
+    else:
+        frames = make_synthetic_frames(args.synthetic, args.size)
+        settings = {'synthetic': args.synthetic, 'size': args.size}
+    if not frames:
+        print("No frames found")
+        return
+
+    results = run(frames)
+    png_results = results['PNG']
+
+    print('{} frames, {:,} pixels{}'.format(len(frames), sum(frame[0] * frame[1] for frame in frames), '' if Image is not None else ' (install Pillow to include WEBP)'))
+    print('  {:6} {:>12} {:>12} {:>14} {:>8} {:>10}'.format('format', 'encode ms', 'decode ms', 'bytes', 'of raw', 'vs png'))
+    for name, result in results.items():
+        print('  {:6} {:>12.2f} {:>12.2f} {:>14,} {:>7.1f}% {:>+9.1f}%'.format(name, result['encode_ms_per_frame'], result['decode_ms_per_frame'], result['bytes'], result['ratio'] * 100, (result['bytes'] / png_results['bytes'] - 1) * 100))
+    print('(times are of the python encoders{}, compare them with each other rather than with the game\'s decoders)'.format(' (QOI with numpy)' if core.np is not None else ''))
+
+    with open(args.history, 'a') as f:
+        f.write(json.dumps({'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'commit': get_commit(), 'python': platform.python_version(), 'settings': settings, 'results': results}) + '\n')
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,373 @@
+# Shared parts of the csv based batch renderers (batch_render_abe.py, batch_render_slig.py, batch_render_gluk.py)
+# Each character script only contains its own settings (models, camera math, default values)
+
+# the basic framework for this was nicked from:
+# https://blender.stackexchange.com/questions/71454/is-it-possible-to-make-a-sequence-of-renders-and-give-the-user-the-option-to-can
+
+import bpy, os, sys, csv
+from pathlib import Path
+from shutil import copyfile
+from collections import namedtuple, defaultdict
+
+# the frame string parser and the pipeline are shared with the addon (relive_render_addon/core.py doesn't need blender)
+try:
+    from relive_render_addon.core import get_frame_list, Pipeline, PipelineStage
+except ImportError: # addon not installed, use the one in this repository
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'relive_render_addon'))
+    from core import get_frame_list, Pipeline, PipelineStage
+
+# Animation info collected from each row in csv file
+AnimInfo = namedtuple('AnimInfo', 'id frame_string width height model_type')
+    # id - name of BAN/BND and id (used for folder/file names)
+    # frame_string - string describing which frames to use
+    # width - img width
+    # height - img height
+    # model_type - model/collection to use
+
+# Data needed to render a single frame (multiple of these are generated for each AnimInfo)
+RenderFrame = namedtuple('RenderFrame', 'anim_id frame_index width height action action_frame model file_path')
+    # anim_id - name of BAN/BND and id (used for folder/file names)
+    # frame_index - the index of the previous anim_id which this frame represents
+    # width - img width
+    # height - img height
+    # action - which blender action to use
+    # action_frame - which frame of the blender action to use
+    # model - which model to use (this is the name of a view layer in blender)
+    # file_path - the rendered image's output file path
+
+# Consecutive frames of one action that are rendered together as an animation
+FrameRun = namedtuple('FrameRun', 'action model width height frames')
+    # action - which blender action to use
+    # model - which model to use (view layer)
+    # width - img width
+    # height - img height
+    # frames - RenderFrames of the run, their action_frames are consecutive
+
+# Reads the csv file and returns (frames_to_render, frames_to_copy)
+#   get_targets - returns a list of (model, output folder) for a model type
+#   actions - dict of action name -> action
+def plan_frames(csv_path, get_targets, actions):
+    frames_to_render = []
+    frames_to_copy = []
+
+    # (action name, action frame, model, width, height) -> file path of the frame that renders it
+    rendered = {}
+    missing_actions = set()
+
+    with open(csv_path, newline='') as csvfile:
+        rdr = csv.reader(csvfile)
+
+        # skip header
+        next(rdr, None)
+
+        for line_number, row in enumerate(rdr, 2):
+            # create AnimInfo from current row
+            anim = AnimInfo(row[0], row[1], int(row[2]), int(row[3]), row[4])
+
+            # check if model type is available
+            targets = get_targets(anim.model_type)
+            if not targets:
+                print('Model type: {} not available'.format(anim.model_type))
+                continue
+
+            # parse frame string to get list of frames
+            try:
+                frame_list = get_frame_list(anim.frame_string)
+            except ValueError as error:
+                raise ValueError('{} (line {})'.format(error, line_number))
+
+            for model, folder in targets:
+                for frame_info in frame_list:
+                    # get action handle from action name
+                    action = actions.get(frame_info.action_name)
+                    if action is None:
+                        if frame_info.action_name not in missing_actions:
+                            print('Action: {} not available'.format(frame_info.action_name))
+                            missing_actions.add(frame_info.action_name)
+                        continue
+
+                    # make relative path string
+                    file_path = Path('renders/{}/{}/{}_{}'.format(folder, anim.id.split('_')[0], anim.id, frame_info.index))
+
+                    # if an identical frame is already being rendered, copy it instead
+                    key = (frame_info.action_name, frame_info.action_frame, model, anim.width, anim.height)
+                    prev_file_path = rendered.get(key)
+                    if prev_file_path is not None:
+                        frames_to_copy.append((prev_file_path, file_path))
+                        continue
+
+                    rendered[key] = file_path
+                    frames_to_render.append(RenderFrame(anim.id, frame_info.index, anim.width, anim.height, action, frame_info.action_frame, model, file_path))
+
+    print('{} frames to render, {} frames to copy'.format(len(frames_to_render), len(frames_to_copy)))
+    return frames_to_render, frames_to_copy
+
+# Groups frames that share action, model and resolution into runs of consecutive action frames
+# (frames are written to their own file paths, so the render order does not matter)
+def group_frame_runs(frames_to_render):
+    frame_runs = []
+    ordered = sorted(frames_to_render, key=lambda frame: (frame.model, frame.width, frame.height, frame.action.name, frame.action_frame))
+
+    for frame in ordered:
+        if frame_runs:
+            run = frame_runs[-1]
+            if (run.action, run.model, run.width, run.height) == (frame.action, frame.model, frame.width, frame.height) and run.frames[-1].action_frame + 1 == frame.action_frame:
+                run.frames.append(frame)
+                continue
+
+        frame_runs.append(FrameRun(frame.action, frame.model, frame.width, frame.height, [frame]))
+
+    print('{} frames in {} renders'.format(len(frames_to_render), len(frame_runs)))
+    return frame_runs
+
+# ioctl request for copy-on-write clones on linux (btrfs, xfs...)
+FICLONE = 0x40049409
+
+def reflink(src, dst):
+    try:
+        import fcntl
+    except ImportError: # not available on windows
+        return False
+
+    try:
+        with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+        return True
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        return False
+
+# Makes dst a copy of src. Uses a hardlink or reflink if the filesystem supports it (no extra disk space),
+# otherwise the copy is queued in copy_pipeline (or done right away if there is no pipeline)
+def materialise_duplicate(src, dst, copy_pipeline):
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+
+    if os.path.lexists(dst):
+        os.remove(dst)
+
+    try:
+        os.link(src, dst)
+        return
+    except OSError:
+        pass
+
+    if reflink(src, dst):
+        return
+
+    if copy_pipeline is None:
+        copyfile(src, dst)
+    else:
+        copy_pipeline.put((src, dst))
+
+def copy_frame(paths):
+    copyfile(*paths)
+    return paths
+
+# Operator logic shared by all characters
+# (use together with bpy.types.Operator and fill in the settings below)
+class MultiRenderBase:
+    _timer = None
+    _timer_interval = 0.1
+
+    frames_to_render = []
+    frames_to_copy = []
+    frame_runs = []
+
+    # file path of rendered frame -> file paths of its duplicates
+    duplicates = {}
+    # action frame -> RenderFrame of the run that is currently rendering
+    current_run_frames = {}
+    copy_pipeline = None
+    copy_workers = 4
+    # copies that can wait before writing a frame blocks until one is done
+    copy_queue_size = 32
+
+    stop = None
+    rendering = None
+
+    camera_name = 'Camera'
+    rig_name = 'rig'
+    ref_pose_name = '_REF'
+
+    default_render_path = '//renders/_untitled'
+    # blender writes each run here, frames are then moved to their own file paths
+    run_render_path = '//renders/_run/frame_'
+    csv_path = ''
+
+    default_resolution_x = 0
+    default_resolution_y = 0
+    default_camera_scale = 0
+    default_camera_y_pos = 0
+
+    # Returns a list of (model, output folder) to render for a model type (empty if not available)
+    def get_render_targets(self, model_type):
+        return []
+
+    def calculate_cam_scale(self, width, height):
+        return 0.0175 * height
+
+    def calculate_cam_y(self, width, height):
+        return 0.5 - (22 / height)
+
+    def copy_duplicate_frames(self, file_path):
+        # called as soon as a frame has been written
+        src = os.path.realpath(bpy.path.abspath('//{}.png'.format(file_path)))
+        if not os.path.exists(src):
+            return
+
+        for dupe in self.duplicates.pop(file_path, []):
+            dst = os.path.realpath(bpy.path.abspath('//{}.png'.format(dupe)))
+            materialise_duplicate(src, dst, self.copy_pipeline)
+
+    def apply_action(self, action):
+        bpy.context.scene.objects[self.rig_name].animation_data.action = action
+
+    def pre(self, *args, **kwargs):
+        self.rendering = True
+
+    def written(self, scene, *args, **kwargs):
+        frame = self.current_run_frames.get(scene.frame_current)
+        if frame is None:
+            return
+
+        # move the frame blender just wrote to its own file path
+        src = bpy.path.abspath(scene.render.frame_path(frame=scene.frame_current))
+        dst = os.path.realpath(bpy.path.abspath('//{}.png'.format(frame.file_path)))
+        if os.path.exists(src):
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            os.replace(src, dst)
+
+        self.copy_duplicate_frames(frame.file_path)
+
+    def post(self, *args, **kwargs):
+        self.frame_runs.pop(0)
+        self.current_run_frames = {}
+        self.rendering = False
+
+        if len(self.frame_runs) < 1:
+            print("DONE")
+            self.finished()
+
+    def cancelled(self, *args, **kwargs):
+        self.stop = True
+        print("CANCELLED")
+        self.finished()
+
+    def finished(self):
+        # COPY DUPLICATES OF FRAMES THAT WERE WRITTEN WITHOUT A render_write CALLBACK
+        for file_path in list(self.duplicates):
+            self.copy_duplicate_frames(file_path)
+
+        # WAIT FOR DUPLICATE FRAMES THAT ARE STILL BEING COPIED
+        if self.copy_pipeline is not None:
+            print('WAITING FOR DUPLICATE FRAMES...')
+            self.copy_pipeline.close()
+            stats = self.copy_pipeline.get_stats()[0]
+            print('{items} duplicate frames copied ({items_per_s:.1f}/s, {errors} errors), rendering waited {0:.1f} s for copies'.format(self.copy_pipeline.put_blocked, **stats))
+            self.copy_pipeline = None
+
+        if self.duplicates and not self.stop:
+            print('{} frames had duplicates that were not copied'.format(len(self.duplicates)))
+
+        # RESET FILEPATH
+        bpy.context.scene.render.filepath = self.default_render_path
+
+        # RESET DURATION
+        bpy.context.scene.frame_start = self.previous_frame_start
+        bpy.context.scene.frame_end = self.previous_frame_end
+
+        # RESET ANIMATION
+        bpy.context.scene.objects[self.rig_name].animation_data.action = bpy.data.actions[self.ref_pose_name]
+
+        # RESET FRAME
+        # causes crash :(
+        #bpy.context.scene.frame_set(0)
+
+        # RESET RESOLUTION
+        bpy.context.scene.render.resolution_x = self.default_resolution_x
+        bpy.context.scene.render.resolution_y = self.default_resolution_y
+
+        # RESET CAMERA
+        bpy.data.cameras[self.camera_name].ortho_scale = self.default_camera_scale
+        bpy.data.cameras[self.camera_name].shift_y     = self.default_camera_y_pos
+
+    def execute(self, context):
+        self.stop = False
+        self.rendering = False
+
+        # Gather all frames from csv (actions are looked up by name)
+        actions = {action.name: action for action in bpy.data.actions}
+        self.frames_to_render, self.frames_to_copy = plan_frames(self.csv_path, self.get_render_targets, actions)
+        self.frame_runs = group_frame_runs(self.frames_to_render)
+        self.current_run_frames = {}
+
+        self.previous_frame_start = context.scene.frame_start
+        self.previous_frame_end = context.scene.frame_end
+
+        # duplicates are copied as soon as their source frame has been written
+        self.duplicates = defaultdict(list)
+        for src, dst in self.frames_to_copy:
+            self.duplicates[src].append(dst)
+        self.copy_pipeline = Pipeline([PipelineStage('copy', copy_frame, self.copy_workers)], self.copy_queue_size)
+
+        context.scene.render.filepath = self.default_render_path
+
+        bpy.app.handlers.render_pre.append(self.pre)
+        bpy.app.handlers.render_complete.append(self.post)
+        bpy.app.handlers.render_write.append(self.written)
+        bpy.app.handlers.render_cancel.append(self.cancelled)
+
+        # The timer gets created and the modal handler
+        # is added to the window manager
+        self._timer = context.window_manager.event_timer_add(self._timer_interval, window=context.window)
+        context.window_manager.modal_handler_add(self)
+
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        if event.type == 'TIMER': # This event is signaled every _timer_interval seconds
+                                  # and will start the render if available
+
+            # If cancelled or no more frames to render, finish.
+            if True in (not self.frame_runs, self.stop is True):
+
+                # We remove the handlers and the modal timer to clean everything
+                bpy.app.handlers.render_pre.remove(self.pre)
+                bpy.app.handlers.render_complete.remove(self.post)
+                bpy.app.handlers.render_write.remove(self.written)
+                bpy.app.handlers.render_cancel.remove(self.cancelled)
+                context.window_manager.event_timer_remove(self._timer)
+
+                return {"FINISHED"}
+
+            elif self.rendering is False: # Nothing is currently rendering.
+                                          # Proceed to render.
+                sc = context.scene
+
+                # retrieve run data
+                run = self.frame_runs[0]
+                self.current_run_frames = {frame.action_frame: frame for frame in run.frames}
+
+                # Apply action
+                self.apply_action(run.action)
+
+                # Set frame range
+                sc.frame_start = run.frames[0].action_frame
+                sc.frame_end = run.frames[-1].action_frame
+
+                # Set output resolution
+                sc.render.resolution_x = run.width
+                sc.render.resolution_y = run.height
+
+                # Setup camera position and scale
+                bpy.data.cameras[self.camera_name].ortho_scale = self.calculate_cam_scale(run.width, run.height)
+                bpy.data.cameras[self.camera_name].shift_y     = self.calculate_cam_y    (run.width, run.height)
+
+                # Set file path (frames are moved to their own file paths as they are written)
+                sc.render.filepath = self.run_render_path
+
+                # Render frames
+                bpy.ops.render.render("INVOKE_DEFAULT", animation=True, layer=run.model)
+
+        return {"PASS_THROUGH"}
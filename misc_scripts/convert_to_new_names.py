@@ -1,4 +1,4 @@
-import bpy, os, csv, re
+import bpy, os, csv, re, json
 from pathlib import Path
 from shutil import copyfile
 from collections import namedtuple
@@ -23,23 +23,200 @@ nameconversions = []
 #        if match:
 #            nameconversions.append (match.group(1), match.group(2))
 
-with open('ban_old_new.tsv') as f:
-    lines = f.readlines()
-    hits = 0
+# == RENAME ENGINE
+# All renames from the mapping are applied as if they happen at the same time,
+# so chains (A -> B, B -> C) and cycles (A -> B, B -> A) work.
+# Renamed actions remember their old name, and renamed folders are written to a journal,
+# which makes it safe to run the script again with the same mapping.
 
-    for line in lines:
-        names = line.split('\t')
-        if len(names[1]) > 1 and len(names[2]) > 1 and '#' not in names[1]:
+mapping_path = 'ban_old_new.tsv'
+report_path = 'ban_old_new_report.txt'
 
-            if names[1] in bpy.data.actions:
-                #print(names[1] + " --> " + names[2])
-                bpy.data.actions[names[1]].name = names[2].split('\n')[0]
-                hits += 1
-            else:
-                print(names[1] + " not found")
+# folders that contain animation folders (renders can have an extra folder per model)
+sprite_folders = ['//sprites']
+render_folders = ['//renders']
 
+old_name_key = 'relive_old_name'
+folder_journal_name = '.relive_renames.json'
 
-    print("animations renamed: " + str(hits))
+# Streams the tsv file and returns dict of old name -> new name (and a list of problems)
+def read_mapping(path):
+    mapping = {}
+    problems = []
+    with open(path) as f:
+        for line in f:
+            names = line.rstrip('\n').split('\t')
+            if len(names) < 3:
+                continue
+
+            old_name = names[1]
+            new_name = names[2]
+            if len(old_name) > 1 and len(new_name) > 1 and '#' not in old_name:
+                if old_name == new_name:
+                    continue
+                if old_name in mapping and mapping[old_name] != new_name:
+                    problems.append('{} is mapped to both {} and {} (using {})'.format(old_name, mapping[old_name], new_name, mapping[old_name]))
+                    continue
+                mapping[old_name] = new_name
+    return mapping, problems
+
+# Renames items in two steps (to temporary names first), so names can be swapped or moved along a chain
+#   renames - list of (item, new name), items have a .name
+#   set_name - function(item, name) that returns the item (it may be a new object, like a Path)
+# If a rename fails, every item gets its old name back and the error is raised again
+def apply_renames(renames, set_name):
+    old_names = [item.name for item, new_name in renames]
+    temp_names = ['__relive_rename_{}'.format(i) for i in range(len(renames))]
+
+    temp_items = []
+    try:
+        for (item, new_name), temp_name in zip(renames, temp_names):
+            temp_items.append(set_name(item, temp_name))
+    except OSError:
+        for temp_item, old_name in zip(temp_items, old_names):
+            set_name(temp_item, old_name)
+        raise
+
+    renamed = []
+    try:
+        for temp_item, (item, new_name) in zip(temp_items, renames):
+            renamed.append(set_name(temp_item, new_name))
+    except OSError:
+        # back to the temporary names first, so the old names are free again (also for chains and cycles)
+        temp_items[:len(renamed)] = [set_name(item, temp_name) for item, temp_name in zip(renamed, temp_names)]
+        for temp_item, old_name in zip(temp_items, old_names):
+            set_name(temp_item, old_name)
+        raise
+
+    return renamed
+
+# Drops renames whose target is taken: a target has to be free, or a folder that is renamed away at the same time.
+# Dropping a rename can block another one, so this repeats until nothing changes
+def drop_blocked_renames(renames, report):
+    while True:
+        leaving = {folder for folder, new_name in renames}
+        targets = [folder.with_name(new_name) for folder, new_name in renames]
+        blocked = [(folder, new_name) for (folder, new_name), target in zip(renames, targets)
+                   if (target.exists() and target not in leaving) or targets.count(target) > 1]
+        if not blocked:
+            return renames
+
+        for folder, new_name in blocked:
+            report['name conflicts'].append('folder {} -> {} (target exists)'.format(folder, new_name))
+        renames = [rename for rename in renames if rename not in blocked]
+
+def rename_actions(mapping, report):
+    # actions that already got their name from an earlier run (old name -> action)
+    done = {}
+    for action in bpy.data.actions:
+        old_name = action.get(old_name_key)
+        if old_name is not None and mapping.get(old_name) == action.name:
+            done[old_name] = action
+
+    renames = []
+    for old_name, new_name in mapping.items():
+        action = bpy.data.actions.get(old_name)
+        if action is None or done.get(action.get(old_name_key)) is action:
+            if old_name not in done:
+                report['actions not found'].append(old_name)
+            continue
+
+        renames.append((action, new_name))
+
+    def set_name(action, name):
+        action.name = name
+        return action
+
+    old_names = [action.name for action, new_name in renames]
+    apply_renames(renames, set_name)
+
+    for old_name, (action, new_name) in zip(old_names, renames):
+        action[old_name_key] = old_name
+        if action.name != new_name:
+            report['name conflicts'].append('action {} -> {} (got {})'.format(old_name, new_name, action.name))
+
+    return len(renames)
+
+def get_folders_at_depth(root, depth):
+    # animation folders are direct children of root (or children of a model folder when depth is 2)
+    folders = [folder for folder in Path(root).iterdir() if folder.is_dir()]
+    if depth > 1:
+        return [child for folder in folders for child in get_folders_at_depth(folder, depth - 1)]
+    return folders
+
+def rename_folders(root, depth, mapping, report):
+    root = Path(bpy.path.abspath(root))
+    if not root.is_dir():
+        report['folders not found'].append(str(root))
+        return 0
+
+    journal_file = root / folder_journal_name
+    journal = {}
+    if journal_file.exists():
+        with open(journal_file) as f:
+            journal = json.load(f)
+
+    count = 0
+
+    # deepest folders first, so renaming a parent does not move folders that are still waiting to be renamed
+    for level in range(depth, 0, -1):
+        renames = []
+        for folder in get_folders_at_depth(root, level):
+            new_name = mapping.get(folder.name)
+            if new_name is None:
+                continue
+
+            # this folder already got its name from an earlier run
+            old_name = journal.get(str(folder.relative_to(root)))
+            if old_name is not None and mapping.get(old_name) == folder.name:
+                continue
+
+            renames.append((folder, new_name))
+
+        renames = drop_blocked_renames(renames, report)
+        try:
+            renamed = apply_renames(renames, lambda folder, name: folder.rename(folder.with_name(name)))
+        except OSError as error:
+            # every folder of this level still has its old name, so the journal stays right
+            report['name conflicts'].append('folders in {} at depth {} not renamed: {}'.format(root, level, error))
+            continue
+
+        # remember the old name of each renamed folder
+        for folder, new_name in renames:
+            journal.pop(str(folder.relative_to(root)), None)
+        for (folder, new_name), new_folder in zip(renames, renamed):
+            journal[str(new_folder.relative_to(root))] = folder.name
+
+        count += len(renamed)
+
+    with open(journal_file, 'w') as f:
+        json.dump(journal, f, indent=1)
+
+    return count
+
+def write_report(report, path):
+    with open(path, 'w') as f:
+        for title, lines in report.items():
+            f.write('== {} ({})\n'.format(title, len(lines)))
+            for line in lines:
+                f.write(line + '\n')
+
+report = {'mapping problems': [], 'actions not found': [], 'folders not found': [], 'name conflicts': []}
+
+mapping, report['mapping problems'] = read_mapping(mapping_path)
+
+action_count = rename_actions(mapping, report)
+folder_count = 0
+for folder in sprite_folders:
+    folder_count += rename_folders(folder, 1, mapping, report)
+for folder in render_folders:
+    folder_count += rename_folders(folder, 2, mapping, report)
+
+write_report(report, report_path)
+
+print("animations renamed: " + str(action_count))
+print("folders renamed: " + str(folder_count))
+print("unmatched names and conflicts written to " + report_path)
 
 # Hide old collections
 #oldCollection = bpy.data.collections.new("OldRefs")
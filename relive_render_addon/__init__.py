@@ -0,0 +1,3198 @@
+bl_info = {
+    # required
+    'name': 'Batch Renderer for RELIVE',
+    'blender': (3, 0, 0),
+    'category': 'Render',
+    # optional
+    'version': (0, 9, 7),
+    'author': 'HTML_Earth',
+    'description': 'A tool to render HD sprites for RELIVE',
+}
+
+import bpy, io, gc, os, sys, json, types, warnings, functools, contextlib, fnmatch, struct, hashlib, shutil, subprocess, time, argparse, tempfile, threading, queue, zipfile, tarfile, zlib
+import numpy as np
+from array import array
+from bpy.app.handlers import persistent
+from mathutils import Matrix
+from pathlib import Path
+from collections import namedtuple
+
+# when this file is run with --python (background workers, command line) it is not imported as a package,
+# so the addon folder is registered as one for the relative imports below
+if __name__ == '__main__':
+    __package__ = os.path.basename(os.path.dirname(os.path.abspath(__file__)))
+    sys.modules.setdefault(__package__, types.ModuleType(__package__)).__path__ = [os.path.dirname(os.path.abspath(__file__))]
+
+# everything that doesn't need blender is in core.py
+from .core import (
+    AnimMeta, OperatorProfiler, Pipeline, PipelineStage, TraceRecorder, assign_jobs_to_workers, calculate_cam_params,
+    calculate_reference_params, convert_rendered_frames, copy_held_frames, default_pass_name, emissive_pass_name,
+    frame_encoders, get_anims, get_calibration_configs, get_current_rss, get_frame_file_name, get_peak_rss, get_png_chunk,
+    get_sample_count, link_duplicate_frames, merge_traces, offset_sidecar_name, parse_sample_curve, pick_best_config,
+    pick_calibration_sample, plan_jobs, png_signature, read_job_file, recompress_frames, rename_rendered_frames,
+    rerender_file_name, scratch_frame_extension, scratch_frame_format, verify_output, write_job_file,
+)
+
+# == CONSTANTS
+
+# strings
+msg_ready = 'READY'
+msg_preparing_render = 'PREPARING TO RENDER...'
+msg_rendering = 'RENDERING... {}/{}'
+msg_done = 'DONE'
+msg_cancelling = 'CANCELLING...'
+msg_cancelled = 'CANCELLED'
+msg_check_settings = 'CHECK SETTINGS'
+error_path = 'PATH ERROR. Do not open the file from within Blender. Start Blender by opening the file directly.'
+error_relative_path_with_drive_letter = "Relative sprite paths cannot start with a drive letter"
+error_absolute_path_without_drive_letter = "Absolute sprite paths should start with a drive letter (e.g. 'C:')"
+relative_path_description = "The path will be treated as relative path from the blend file location\nIf disabled, you need to specify the full path, including the drive letter\n(All this really does is add '//' to the beginning of the path)\n(Add '../' to a relative path to go up one folder)"
+
+# custom properties used to find previously imported references
+ref_sprite_path_key = 'relive_sprite_path'
+ref_settings_key = 'relive_sprite_settings'
+
+# custom property of images a batch loads for itself (only these are removed between jobs)
+batch_image_key = 'relive_batch_image'
+
+# stores the source modification time of each proxy frame
+proxy_stamp_name = 'proxy_stamps.json'
+proxy_suffix = '_proxy'
+
+# set on lazily imported references until their image sequence is loaded
+ref_pending_key = 'relive_sprite_pending'
+
+# pose cache files: magic, bone count, frame count, then 16 floats per bone per frame
+pose_cache_magic = b'RPC1'
+pose_cache_header = struct.Struct('<4sII')
+
+# telemetry (one json object per job) is appended to this file in the render path
+telemetry_file_name = 'batch_telemetry.jsonl'
+
+# chrome trace-event timeline of a batch, written to the render path
+trace_file_name = 'batch_trace.json'
+
+# worker calibration results, next to the blend file (<blend name>.relive_tuning.json)
+tuning_suffix = '.relive_tuning.json'
+calibration_folder_name = '_calibration'
+
+# exit code of a worker that stopped because its memory grew too much (it is restarted with the remaining jobs)
+worker_recycle_exit_code = 75
+calibration_anim_count = 8
+calibration_frame_count = 4
+
+# written next to the frames of each animation in an archive (manifest_emissive.json... for other passes)
+manifest_file_name = 'manifest.json'
+# archive members that are stored without compressing them again
+compressed_frame_extensions = ('.png', '.webp')
+
+# direct output
+viewer_node_name = 'RELIVE Direct Output'
+
+# palette output
+palette_file_name = 'palette.pal'
+palette_alpha_cutoff = 128
+
+# mudokon view layers
+mud_all_models = ['abe_game', 'abe_game_orange', 'abe_fmv', 'mud_green_game', 'mud_green_game_orange', 'mud_green_fmv', 'mud_blind_game', 'mud_blind_fmv']
+mud_game = ['abe_game', 'mud_green_game', 'mud_blind_game']
+mud_game_orange = ['abe_game_orange', 'mud_green_game_orange', 'mud_blind_game']
+mud_fmv = ['abe_fmv', 'mud_green_fmv', 'mud_blind_fmv']
+mud_abe_game = ['abe_game']
+mud_abe_game_orange = ['abe_game_orange']
+mud_abe_fmv = ['abe_fmv']
+
+# slig view layers
+slig_all_models = ['slig_visor', 'slig_visor_tubes', 'slig_lenses', 'slig_lenses_tubes']
+
+# gluk view layers
+gluk_all_models = ['rf_exec_blue', 'rf_exec_brown', 'rf_exec_green', 'rf_exec_greyblue', 'rf_exec_purple', 'rf_exec_red', 'jr_exec', 'jr_exec_gib', 'aslik', 'aslik_gib', 'dripik', 'dripik_gib', 'dripik_menu']
+gluk_rf_exec_fmv_green = ['rf_exec_green']
+gluk_rf_exec_fmv_all = ['rf_exec_blue', 'rf_exec_brown', 'rf_exec_green', 'rf_exec_greyblue', 'rf_exec_purple', 'rf_exec_red']
+gluk_jr_exec_game = ['jr_exec', 'jr_exec_gib']
+gluk_aslik_fmv = ['aslik', 'aslik_gib']
+gluk_dripik_fmv = ['dripik', 'dripik_gib']
+gluk_menu_dripik = ['dripik_menu']
+
+# == GLOBAL VARIABLES
+
+# One enabled view layer (its name is the key)
+class ReliveViewLayerName(bpy.types.PropertyGroup):
+    pass
+
+class ReliveBatchProperties(bpy.types.PropertyGroup):
+
+    character_type : bpy.props.EnumProperty(
+        name= "Character",
+        items= [('none', "None", ""),
+                ('mud', "Mudokon", ""),
+                ('slig', "Slig", ""),
+                ('gluk', "Glukkon", "")
+        ]
+    )
+
+    # FILE PATHS
+    render_path : bpy.props.StringProperty(name='Render Path', default='renders', description="Renders will be saved to this path\nWith multiple viewlayers selected, extra folders named after each model will be between this path and the sprite folders")
+    use_relative_render_path : bpy.props.BoolProperty(name='Use Relative Render Path', default=True, description=relative_path_description)
+    ref_sprite_path : bpy.props.StringProperty(name='Reference Sprites Path', default='sprites', description="Sprites will be loaded from this path\nWhen rendering animations, this path will also be used to check which animations exist, and their data (meta.json)")
+    use_relative_ref_sprite_path : bpy.props.BoolProperty(name='Use Relative Reference Sprites Path', default=True, description=relative_path_description)
+    
+    # Folders without meta.json
+    infer_missing_meta : bpy.props.BoolProperty(name='Infer missing meta.json', default=False, description="Animation folders without a meta.json will still be used (otherwise they are skipped).\nFrame count comes from the highest numbered .png file, size from the header of 0.png,\nand offsets from an '" + offset_sidecar_name + "' file (or the bottom center of the sprite if there is none)")
+
+    # Proxies
+    use_reference_proxies : bpy.props.BoolProperty(name='Use proxies', default=False, description="Import downscaled copies of the reference sprites to keep the viewport fast.\nProxies are cached on disk and only regenerated when the source sprite changes")
+    proxy_percent : bpy.props.IntProperty(name="Proxy %", subtype="PERCENTAGE", default = 25, min = 5, max = 100, description="Size of the proxy sprites compared to the reference sprites")
+    proxy_path : bpy.props.StringProperty(name='Proxy Path', default='sprite_proxies', description="Proxy sprites will be cached in this path (relative to the blend file)")
+
+    # Lazy import
+    use_lazy_import : bpy.props.BoolProperty(name='Lazy import', default=False, description="Only create hidden placeholders when importing.\nThe image sequence of a placeholder is loaded once it is made visible or selected")
+
+    # Filters
+    ref_sprite_filter : bpy.props.StringProperty(name='Reference Sprite filter', default='Mudokon*', description="Only animations that match the filter will be imported")
+    animation_filter : bpy.props.StringProperty(name='Exported animation filter', default='*', description="Only animations that match the filter will be rendered")
+
+    # Resolution %
+    resolution_percent : bpy.props.IntProperty(name="% Resolution", subtype="PERCENTAGE", default = 300, min = 100, max = 1000, description="How big the final render should be compared to the reference sprite")
+
+    # Pass
+    pass_to_use : bpy.props.StringProperty(name='Render pass to use', default='', description="This will be appended to the exported filenames (Leave empty for default)\n\n'emissive' - turns off transparency and hides the light collection\n(it is possible to combine it with other names as long as it comes last.\nFor example 'flipped_emissive' will still work)")
+
+    # Which models (ViewLayers) to include when rendering, by name
+    enabled_view_layer_names : bpy.props.CollectionProperty(type=ReliveViewLayerName)
+    # incremented whenever enabled_view_layer_names changes (invalidates the cached selection)
+    view_layer_revision : bpy.props.IntProperty(default=0)
+    # selection of older files (by view layer position), moved to enabled_view_layer_names when the file is loaded
+    enabled_view_layers : bpy.props.BoolVectorProperty(
+        name = "ViewLayers",
+        description = "Which models (ViewLayers) to include when rendering (old files)",
+        size = 32,
+    )
+
+    # Workers
+    worker_count : bpy.props.IntProperty(name="Workers", default = 1, min = 1, max = 64, description="Number of background blender processes to render with.\nWith more than 1, the file has to be saved first (workers render the saved file)")
+    threads_per_worker : bpy.props.IntProperty(name="Threads", default = 0, min = 0, max = 1024, description="Render threads used by each worker (0 = automatic)")
+    worker_recycle_growth : bpy.props.IntProperty(name="Restart after (MB)", default=0, min=0, description="Restart a worker when its memory has grown by this much since its first job (0 = never).\nThe new worker continues with the remaining jobs")
+    use_tuned_workers : bpy.props.BoolProperty(name="Use calibrated workers", default=True, description="Use the workers and threads found by CALIBRATE for this file instead (if it has been calibrated)")
+    calibration_memory_limit : bpy.props.FloatProperty(name="Memory limit (GB)", default=0.0, min=0.0, description="Calibration ignores configurations whose workers use more memory than this together (0 = no limit)")
+    detect_static_holds : bpy.props.BoolProperty(name='Skip held frames', default=False, description="Frames where no keyframed value of the action changed since the previous frame are copied instead of rendered.\nOnly the action's fcurves are checked, so don't use this if anything else in the scene is animated")
+    max_frames_per_job : bpy.props.IntProperty(name="Max frames per job", default = 0, min = 0, max = 10000, description="Animations with more frames are split into several jobs, so long animations can be spread across workers (0 = never split)")
+
+    # Samples
+    use_adaptive_samples : bpy.props.BoolProperty(name='Adaptive samples', default=False, description="Set the render samples of each animation from its output size (width x height in pixels, after % Resolution)")
+    sample_curve : bpy.props.StringProperty(name='Sample curve', default='400:8, 10000:32, 100000:128, 1000000:256', description="Output pixel area : samples, separated by commas.\nSample counts between two points are interpolated")
+    emissive_sample_factor : bpy.props.FloatProperty(name='Emissive factor', default=0.5, min=0.05, max=4.0, description="Multiplies the sample count of emissive passes")
+    adaptive_noise_threshold : bpy.props.FloatProperty(name='Noise threshold', default=0.0, min=0.0, max=1.0, precision=4, description="Cycles noise threshold to use together with the adaptive samples (0 = don't change)")
+
+    # Frame format
+    frame_format : bpy.props.EnumProperty(
+        name= "Frame format",
+        description= "File format of the rendered frames. Verification and archives use the same format",
+        items= [('PNG', "PNG", "Blender's png output (N.png)"),
+                ('WEBP', "Lossless WebP", "Written by blender at quality 100, which is lossless (N.webp, needs a blender version with WebP output)"),
+                ('QOI', "QOI", "Quite OK Image format, decodes much faster than png (N.qoi).\nEncoded from the viewer with 'Write frames directly', otherwise blender writes uncompressed targa frames, which are converted after each job"),
+                ('RGBA', "Raw RGBA", "4 bytes per pixel without a header, the size is the meta.json size x % Resolution (N.rgba).\nEncoded from the viewer with 'Write frames directly', otherwise blender writes uncompressed targa frames, which are converted after each job")
+        ]
+    )
+
+    # Post-render pipeline
+    use_post_render_pipeline : bpy.props.BoolProperty(name='Post-process in background', default=False, description="Renames, checks and packs the frames of each job on background threads while the next job renders.\nThe stages are connected by short queues: if they fall behind, rendering waits for them instead of piling up work.\nThroughput of each stage is printed when the batch is done")
+    optimise_frames : bpy.props.BoolProperty(name='Optimise', default=False, description="Deflate png frames again at the highest zlib level (kept only if the file gets smaller)")
+    dedupe_frames : bpy.props.BoolProperty(name='Dedupe', default=False, description="Replace frames of a job that are byte for byte identical to an earlier frame with a hardlink to it")
+    verify_frames : bpy.props.BoolProperty(name='Verify', default=False, description="Check the frames of each job once they are written. Broken ones are written to " + rerender_file_name + " in the render path")
+    pipeline_threads : bpy.props.IntProperty(name='Threads', default=2, min=1, max=16, description="Threads of the optimise and verify stages")
+    pipeline_queue_size : bpy.props.IntProperty(name='Queue', default=4, min=1, max=64, description="Jobs that can wait in front of each stage")
+
+    # Direct output
+    use_direct_output : bpy.props.BoolProperty(name='Write frames directly', default=False, description="Renders each frame as a still without letting blender write a file, takes its pixels from a compositor Viewer node\nand writes them straight to their final file names on a background thread (no scratch files, no rename pass).\nNeeds the Standard view transform without look, exposure, gamma or curves, and a frame format the addon can encode (not WebP)")
+
+    # Palette
+    palette_output : bpy.props.EnumProperty(
+        name= "Palette",
+        description= "Converts the rendered frames to a shared palette once all frames of an animation are rendered.\nIndex 0 is transparent, other pixels are opaque (like the original sprites)",
+        items= [('NONE', "RGBA", "Keep 32-bit RGBA frames"),
+                ('PNG', "Indexed PNG", "Rewrite the frames as palette-indexed pngs"),
+                ('RAW', "Raw indices", "Write one byte per pixel to .raw files next to the frames, and the palette (RGBA) to " + palette_file_name)
+        ]
+    )
+    palette_scope : bpy.props.EnumProperty(
+        name= "Palette scope",
+        description= "Which frames share a palette",
+        items= [('ANIMATION', "Per animation", "Each animation gets its own palette"),
+                ('CHARACTER', "Per character", "All animations of a view layer rendered in the same batch share a palette (converted at the end of the batch)")
+        ]
+    )
+    palette_size : bpy.props.IntProperty(name='Colors', default=256, min=2, max=256, description="Number of palette entries, including the transparent one.\n16 or less writes 4-bit pngs")
+
+    # Packaging
+    archive_output : bpy.props.EnumProperty(
+        name= "Archive",
+        description= "Packs each animation folder into an archive as soon as all of its frames are rendered.\nAnimations that were not rendered this time are kept from the previous archive",
+        items= [('NONE', "No archive", ""),
+                ('ZIP', "Zip", ""),
+                ('TAR', "Tar", "")
+        ]
+    )
+    archive_path : bpy.props.StringProperty(name='Archive Path', default='renders', description="Path of the archive, without extension (relative to the blend file)")
+
+    # Tracing
+    write_trace : bpy.props.BoolProperty(name='Write trace', default=False, description="Write a timeline of the batch (scan, plan, setup, render, rename and post-processing of every job, one track per worker)\nto " + trace_file_name + " in the render path. Open it in chrome://tracing or ui.perfetto.dev")
+
+    # Profiling
+    use_profiling : bpy.props.BoolProperty(name='Profile', default=False, description="Profile importing and batch rendering (including the workers) with cProfile.\nEach run writes <blend name>.<operation>.prof and a readable .profile.txt with the slowest functions next to the blend file")
+    use_line_sampling : bpy.props.BoolProperty(name='Sample lines', default=False, description="Also sample which python line is running every millisecond and add the busiest lines to the .profile.txt")
+    profile_top_count : bpy.props.IntProperty(name='Top functions', default=40, min=5, max=1000, description="Number of functions (and lines) listed in the .profile.txt")
+
+    # Telemetry
+    write_telemetry : bpy.props.BoolProperty(name='Write telemetry', default=False, description="Append timing and settings of every rendered job to " + telemetry_file_name + " in the render path")
+
+    # Pose cache
+    use_pose_cache : bpy.props.BoolProperty(name='Use pose cache', default=False, description="Evaluates each action once and stores the final pose of every bone on disk.\nCaches are baked before the batch starts. Renders then apply the stored pose with the rig's constraints, bone drivers and bone curves muted, instead of solving the rig for every frame and view layer.\nThe cache is rebuilt automatically when the keyframes of an action change (but not when the rig changes)")
+    pose_cache_path : bpy.props.StringProperty(name='Pose Cache Path', default='pose_cache', description="Pose caches are stored in this path (relative to the blend file)")
+
+    # Watch mode
+    watch_debounce : bpy.props.FloatProperty(name="Watch delay", subtype="TIME", unit="TIME", default = 2.0, min = 0.0, max = 60.0, description="Time to wait after the last change before re-rendering (in seconds)")
+
+    # Utilities
+    ref_width : bpy.props.IntProperty(name="Width", subtype="PIXEL", default = 640, min = 1, max = 1920, description="Width of your reference sprite")
+    ref_height : bpy.props.IntProperty(name="Height", subtype="PIXEL", default = 480, min = 1, max = 1080, description="Height of your reference sprite")
+    ref_offset_x : bpy.props.IntProperty(name="Offset X", subtype="PIXEL", default = 0, min = -2048, max = 2048, description="X offset of your reference sprite")
+    ref_offset_y : bpy.props.IntProperty(name="Offset Y", subtype="PIXEL", default = 0, min = -2048, max = 2048, description="Y offset of your reference sprite")
+
+    # CSV
+    use_custom_csv : bpy.props.BoolProperty(name='Use custom CSV', default=False, description="Instead of using the default CSV file for the selected character, use a custom path")
+    custom_csv_path : bpy.props.StringProperty(name='CSV File', default='debug.csv', description="Path to CSV file containing animation info")
+
+    # SCENE REFS
+    camera_name : bpy.props.StringProperty(name='Camera', default='Camera', description="The name of the camera object used to render")
+    rig_name : bpy.props.StringProperty(name='Rig', default='rig', description="The name of the main character rig")
+    lights_collection : bpy.props.StringProperty(name='Lights', default='Lights', description="The name of the collection containing all lights")
+
+    # PRIVATE
+    batch_render_status : bpy.props.StringProperty(name='Current status of batch renderer', default=msg_ready)
+    is_batch_rendering : bpy.props.BoolProperty(name='Batch rendering is in progress', default=False)
+    render_cancelled : bpy.props.BoolProperty(name='Batch render is being cancelled', default=False)
+    current_model : bpy.props.StringProperty(name='Current model', default='')
+    current_anim : bpy.props.StringProperty(name='Current animation', default='')
+
+    current_pass : bpy.props.StringProperty(name='Current animation', default=default_pass_name)
+
+    watch_status : bpy.props.StringProperty(name='Current status of watch mode', default='')
+
+# == UTILS
+
+# scene pointer -> (revision, enabled view layer names, how many of them exist)
+# (entries are dropped by view_layers_changed when view layers are added, removed or renamed)
+enabled_view_layer_cache = {}
+# scene pointer -> view layer names when the depsgraph was last updated
+view_layer_names_seen = {}
+
+def get_enabled_view_layer_names(scene):
+    # Enabled view layer names, only rebuilt when the selection or the view layers change
+    props = scene.reliveBatch
+    cached = enabled_view_layer_cache.get(scene.as_pointer())
+    if cached is None or cached[0] != props.view_layer_revision:
+        names = {item.name for item in props.enabled_view_layer_names}
+        if not names:
+            # not migrated yet
+            names = {layer.name for i, layer in enumerate(scene.view_layers) if i < len(props.enabled_view_layers) and props.enabled_view_layers[i]}
+        cached = (props.view_layer_revision, frozenset(names), sum(1 for layer in scene.view_layers if layer.name in names))
+        enabled_view_layer_cache[scene.as_pointer()] = cached
+    return cached[1]
+
+def get_models(scene):
+    # enabled view layers, in view layer order
+    enabled = get_enabled_view_layer_names(scene)
+    return [layer.name for layer in scene.view_layers if layer.name in enabled]
+
+def get_enabled_view_layer_count(context):
+    get_enabled_view_layer_names(context.scene)
+    return enabled_view_layer_cache[context.scene.as_pointer()][2]
+
+def set_enabled_view_layer_names(scene, names):
+    props = scene.reliveBatch
+    props.enabled_view_layer_names.clear()
+    for name in names:
+        props.enabled_view_layer_names.add().name = name
+    # the old selection is only read while there are no names, so an empty selection mustn't bring it back
+    if any(props.enabled_view_layers):
+        props.enabled_view_layers = [False] * len(props.enabled_view_layers)
+    props.view_layer_revision += 1
+
+def get_action(action_name):
+    # Check all available actions
+    for action in bpy.data.actions:
+        # Check if action has correct name
+        if action.name == action_name:
+            return action
+        
+    print('Action: {} not available'.format(action_name))
+    return None
+
+def apply_action(action):
+    bpy.context.scene.objects[bpy.context.scene.reliveBatch.rig_name].animation_data.action = bpy.data.actions[action]
+
+def get_tagged_ids(collection, key=ref_sprite_path_key):
+    # Maps custom property value -> datablock, for all datablocks that have the property
+    return {id_data[key]: id_data for id_data in collection if key in id_data}
+
+def get_reference_image(existing_images, image_path, name, reload=False):
+    # Loads an image sequence, or reuses it if it was loaded before
+    img = existing_images.get(image_path)
+    if img is None:
+        img = bpy.data.images.load(image_path)
+        img.name = name
+        img.source = 'SEQUENCE'
+        img[ref_sprite_path_key] = image_path
+        existing_images[image_path] = img
+    elif reload:
+        img.reload()
+    return img
+
+def make_proxy_sequence(sprite_path, anim, proxy_path, percent):
+    # Writes a downscaled copy of a sprite sequence (only frames whose source changed are regenerated)
+    # Returns the path of the first proxy frame, and whether any frames were regenerated
+    source_folder = Path(bpy.path.abspath(sprite_path)).parent
+    proxy_folder_name = '{}_{}'.format(anim.name, percent)
+    proxy_folder = Path(bpy.path.abspath('//' + proxy_path)) / proxy_folder_name
+    proxy_folder.mkdir(parents=True, exist_ok=True)
+
+    stamp_file = proxy_folder / proxy_stamp_name
+    stamps = {}
+    if stamp_file.exists():
+        with open(stamp_file) as f:
+            stamps = json.load(f)
+
+    changed = False
+    for i in range(anim.frame_count):
+        source = source_folder / '{}.png'.format(i)
+        proxy = proxy_folder / '{}.png'.format(i)
+
+        try:
+            mtime = source.stat().st_mtime_ns
+        except FileNotFoundError:
+            continue
+
+        if stamps.get(str(i)) == mtime and proxy.exists():
+            continue
+
+        img = bpy.data.images.load(str(source))
+        img.scale(max(1, round(img.size[0] * percent / 100)), max(1, round(img.size[1] * percent / 100)))
+        img.filepath_raw = str(proxy)
+        img.file_format = 'PNG'
+        img.save()
+        bpy.data.images.remove(img)
+
+        stamps[str(i)] = mtime
+        changed = True
+
+    if changed:
+        with open(stamp_file, 'w') as f:
+            json.dump(stamps, f)
+
+    return '//{}/{}/0.png'.format(proxy_path, proxy_folder_name), changed
+
+def load_reference_sequence(existing_images, sprite_path, anim, props, use_proxy):
+    # Gets the image sequence to display for a reference (proxy or full resolution)
+    image_path = sprite_path
+    image_name = anim.name
+    proxies_changed = False
+    if use_proxy:
+        image_path, proxies_changed = make_proxy_sequence(sprite_path, anim, props.proxy_path, props.proxy_percent)
+        image_name = anim.name + proxy_suffix
+
+    return get_reference_image(existing_images, image_path, image_name, proxies_changed), proxies_changed
+
+def get_reference_anim(empty):
+    # Rebuilds the AnimMeta an imported reference empty was created from
+    return AnimMeta(Path(empty[ref_sprite_path_key]).parent.name, *empty[ref_settings_key])
+
+def setup_reference_empty(empty, img, anim):
+    # set empty to use image sequence
+    empty.empty_display_type = 'IMAGE'
+    empty.data = img
+
+    # set sequence frames
+    #   for some reason the frame count starts at 0
+    #   and the first frame starts at 1... Blender pls
+    empty.image_user.frame_duration = anim.frame_count - 1
+    empty.image_user.frame_start = 1
+
+    # enable alpha
+    empty.use_empty_image_alpha = True
+
+    # set size and offsets
+    empty_img_settings = calculate_reference_params(anim.size_w, anim.size_h, anim.offset_x, anim.offset_y)
+    empty.empty_display_size = empty_img_settings.size
+    empty.empty_image_offset[0] = empty_img_settings.offset_x
+    empty.empty_image_offset[1] = empty_img_settings.offset_y
+
+# == HANDLERS
+
+# names of placeholder empties that still need their image sequence
+pending_references = set()
+
+def load_pending_references():
+    scene = bpy.context.scene
+    props = scene.reliveBatch
+    existing_images = None
+
+    for name in list(pending_references):
+        empty = bpy.data.objects.get(name)
+        if empty is None or ref_pending_key not in empty:
+            pending_references.discard(name)
+            continue
+
+        if not (empty.visible_get() or empty.select_get()):
+            continue
+
+        if existing_images is None:
+            existing_images = get_tagged_ids(bpy.data.images)
+
+        img, proxies_changed = load_reference_sequence(existing_images, empty[ref_sprite_path_key], get_reference_anim(empty), props, props.use_reference_proxies)
+        empty.data = img
+        del empty[ref_pending_key]
+        pending_references.discard(name)
+
+    # returning None unregisters the timer
+    return None
+
+@persistent
+def reference_visibility_changed(scene, depsgraph):
+    # Loading images while the depsgraph is being updated is not safe, so it is done in a timer
+    if pending_references and not bpy.app.timers.is_registered(load_pending_references):
+        bpy.app.timers.register(load_pending_references, first_interval=0.1)
+
+@persistent
+def view_layers_changed(scene, depsgraph):
+    # Drops the cached selection when view layers were added, removed or renamed
+    # (the cache is dropped instead of bumping view_layer_revision, writing properties here would update the depsgraph again)
+    if not depsgraph.id_type_updated('SCENE'):
+        return
+    names = tuple(layer.name for layer in scene.view_layers)
+    if view_layer_names_seen.get(scene.as_pointer()) != names:
+        view_layer_names_seen[scene.as_pointer()] = names
+        enabled_view_layer_cache.pop(scene.as_pointer(), None)
+
+@persistent
+def clear_view_layer_cache(*args):
+    # undo and redo bring back older selections (and revisions)
+    enabled_view_layer_cache.clear()
+    view_layer_names_seen.clear()
+
+@persistent
+def migrate_view_layer_selection(*args):
+    # Older files store the selection by view layer position (at most 32)
+    clear_view_layer_cache()
+    for scene in bpy.data.scenes:
+        props = scene.reliveBatch
+        if len(props.enabled_view_layer_names) == 0 and any(props.enabled_view_layers):
+            set_enabled_view_layer_names(scene, [layer.name for i, layer in enumerate(scene.view_layers) if i < len(props.enabled_view_layers) and props.enabled_view_layers[i]])
+
+@persistent
+def collect_pending_references(*args):
+    pending_references.clear()
+    for empty in get_tagged_ids(bpy.data.objects).values():
+        if ref_pending_key in empty:
+            pending_references.add(empty.name)
+
+# == BATCH RENDERING
+
+def get_current_pass(props):
+    # pass name used for the exported files (always starts with '_')
+    current_pass = props.pass_to_use if props.pass_to_use != "" else default_pass_name
+    if not current_pass.startswith('_'):
+        current_pass = '_' + current_pass
+    return current_pass
+
+def hide_lights(scene, props, models):
+    # Hides the lights collection in each view layer and returns the previous state of each
+    previous_lights_should_be_hidden = {}
+
+    # go through all view layers
+    for model in models:
+        # check light collection status in this view layer
+        hide_render = scene.view_layers[model].layer_collection.children[props.lights_collection].collection.hide_render
+        
+        print("Previous light collection for {} was {}".format(model, hide_render))
+
+        # add the status to a dict
+        previous_lights_should_be_hidden.update({model: hide_render})
+
+        # hide lights
+        scene.view_layers[model].layer_collection.children[props.lights_collection].collection.hide_render = True
+
+    return previous_lights_should_be_hidden
+
+def plan_anims_to_render(animations, models, props, missing_actions, use_model_folders):
+    def get_frame_ranges(anim):
+        # if action is in missing action list, skip it
+        if anim.name in missing_actions:
+            return None
+
+        # get action handle from action name
+        action = get_action(anim.name)
+        # if action is missing, add to list of missing actions
+        if action == None:
+            missing_actions.append(anim.name)
+            return None
+
+        if props.detect_static_holds:
+            return get_unique_frame_ranges(action, anim.frame_count)
+        return [(0, anim.frame_count - 1, ())]
+
+    return plan_jobs(animations, models, props.render_path, props.current_pass, use_model_folders, props.max_frames_per_job, get_frame_ranges)
+
+def get_unique_frame_ranges(action, frame_count):
+    # Returns (first frame, last frame, held frames) for each run of frames that changes every frame
+    # held frames are the frames after the run that look exactly like its last frame
+    def evaluate(frame):
+        return [fcurve.evaluate(frame) for fcurve in action.fcurves if not fcurve.mute]
+
+    frame_ranges = []
+    range_start = 0
+    held_frames = []
+    previous = evaluate(0)
+
+    for frame in range(1, frame_count):
+        current = evaluate(frame)
+        if all(abs(a - b) < 1e-6 for a, b in zip(previous, current)):
+            held_frames.append(frame)
+            continue
+
+        if held_frames:
+            frame_ranges.append((range_start, held_frames[0] - 1, tuple(held_frames)))
+            range_start = frame
+            held_frames = []
+        previous = current
+
+    frame_ranges.append((range_start, (held_frames[0] - 1) if held_frames else frame_count - 1, tuple(held_frames)))
+    return frame_ranges
+
+def get_render_samples(scene):
+    if scene.render.engine == 'CYCLES':
+        return scene.cycles.samples
+    return scene.eevee.taa_render_samples
+
+def set_render_samples(scene, samples, noise_threshold=0.0):
+    if scene.render.engine == 'CYCLES':
+        scene.cycles.samples = samples
+        if noise_threshold > 0:
+            scene.cycles.use_adaptive_sampling = True
+            scene.cycles.adaptive_threshold = noise_threshold
+    else:
+        scene.eevee.taa_render_samples = samples
+
+def write_telemetry(props, record):
+    render_folder = get_render_folder(props)
+    os.makedirs(render_folder, exist_ok=True)
+    with open(os.path.join(render_folder, telemetry_file_name), 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+# info about the job that is currently rendering (written to telemetry when it finishes)
+current_job_telemetry = {}
+
+def setup_anim_render(scene, props, render_anim):
+    # Apply action
+    apply_action(render_anim.meta.name)
+    
+    # Set animation duration
+    scene.frame_start = render_anim.frame_start
+    scene.frame_end = render_anim.frame_end
+    
+    # Set output resolution
+    scene.render.resolution_x = render_anim.meta.size_w
+    scene.render.resolution_y = render_anim.meta.size_h
+
+    camera_settings = calculate_cam_params(render_anim.meta.size_w, render_anim.meta.size_h, render_anim.meta.offset_x, render_anim.meta.offset_y)
+    
+    # Setup camera position and scale
+    bpy.data.objects[props.camera_name].data.ortho_scale = camera_settings.size
+    bpy.data.objects[props.camera_name].data.shift_x     = camera_settings.offset_x
+    bpy.data.objects[props.camera_name].data.shift_y     = camera_settings.offset_y
+
+    # Set file path
+    relative_string = ""
+    if props.use_relative_render_path:
+        relative_string = "//"
+    scene.render.filepath = '{}{}'.format(relative_string, Path(render_anim.file_path))
+
+    if direct_output is not None:
+        setup_direct_output(scene, props, render_anim)
+
+    if props.use_pose_cache:
+        start_pose_cache(scene, props, render_anim)
+
+    # Set samples depending on output size
+    output_area = render_anim.meta.size_w * render_anim.meta.size_h * (scene.render.resolution_percentage / 100) ** 2
+    if props.use_adaptive_samples:
+        samples = get_sample_count(parse_sample_curve(props.sample_curve), output_area)
+        if props.current_pass.endswith(emissive_pass_name):
+            samples = round(samples * props.emissive_sample_factor)
+        set_render_samples(scene, max(1, samples), props.adaptive_noise_threshold)
+
+    current_job_telemetry.clear()
+    current_job_telemetry.update({
+        'anim': render_anim.meta.name,
+        'model': render_anim.model,
+        'pass': props.current_pass,
+        'frame_start': render_anim.frame_start,
+        'frame_end': render_anim.frame_end,
+        'output_area': round(output_area),
+        'samples': get_render_samples(scene),
+        'noise_threshold': props.adaptive_noise_threshold if props.use_adaptive_samples else None,
+        'started': time.time(),
+    })
+
+def finish_anim_render(scene, props, render_anim, job_index=0, progress_file=None):
+    # Called after each job has been rendered
+    stop_pose_cache(scene)
+
+    if post_render_pipeline is not None:
+        with trace_span('queue', anim=render_anim.meta.name, model=render_anim.model):
+            post_render_pipeline.put(PostRenderJob(render_anim, job_index, progress_file))
+        with trace_span('post-process', anim=render_anim.meta.name, model=render_anim.model):
+            release_job_memory()
+            write_job_telemetry(props)
+            finish_pending_folders(props)
+        return
+
+    encoder = get_frame_encoder(props)
+    with trace_span('rename', anim=render_anim.meta.name, model=render_anim.model):
+        if direct_output is not None:
+            # frames already have their final names, but have to be on disk before they are copied
+            direct_output.writer.wait()
+        else:
+            rename_rendered_frames(render_anim.file_path, props.current_pass, render_anim.frame_start, render_anim.frame_end, get_blender_extension(encoder), print)
+            if encoder.blender_format is None:
+                convert_rendered_frames(render_anim.file_path, props.current_pass, render_anim.frame_start, render_anim.frame_end, encoder)
+        copy_held_frames(render_anim.file_path, props.current_pass, render_anim.frame_end, render_anim.held_frames, encoder.extension)
+
+    with trace_span('post-process', anim=render_anim.meta.name, model=render_anim.model):
+        release_job_memory()
+        write_job_telemetry(props)
+        finish_output_job(props, render_anim)
+        write_job_progress(progress_file, job_index)
+
+def write_job_telemetry(props):
+    if props.write_telemetry and current_job_telemetry:
+        record = dict(current_job_telemetry, seconds=round(time.time() - current_job_telemetry['started'], 3), rss=get_current_rss())
+        write_telemetry(props, record)
+
+def write_job_progress(progress_file, job_index, failed_stage=None):
+    # lets the process that started this worker know how far it got
+    # (one line per job: its index, followed by "failed <stage>" when post-processing it failed)
+    if progress_file is not None:
+        with open(progress_file, 'a') as f:
+            f.write('{}\n'.format(job_index) if failed_stage is None else '{} failed {}\n'.format(job_index, failed_stage))
+
+def read_job_progress(progress_file):
+    # [(job index, failed stage or None)] of the jobs a worker has finished so far
+    progress = []
+    with open(progress_file) as f:
+        for line in f:
+            fields = line.split()
+            if fields:
+                progress.append((int(fields[0]), fields[2] if len(fields) > 2 else None))
+    return progress
+
+def release_job_memory():
+    # Frees what a job leaves behind, so memory stays flat over long batches
+    # images of the user's file are left alone, even when nothing uses them
+    for image in list(bpy.data.images):
+        if image.type in ('RENDER_RESULT', 'COMPOSITING'):
+            # render result and viewer pixels are made again by the next render
+            image.buffers_free()
+        elif batch_image_key in image and image.users == 0:
+            bpy.data.images.remove(image)
+
+    gc.collect()
+
+def prepare_background_render(scene, props, models):
+    # Scene setup for background workers (nothing is restored, the file is never saved)
+
+    # sprite and render paths are relative to the blend file
+    os.chdir(bpy.path.abspath('//'))
+
+    props.current_pass = get_current_pass(props)
+    scene.render.film_transparent = not props.current_pass.endswith(emissive_pass_name)
+
+    if props.current_pass.endswith(emissive_pass_name):
+        hide_lights(scene, props, models)
+
+    scene.render.resolution_percentage = props.resolution_percent
+
+def render_jobs(scene, props, anims_to_render, progress_file=None, recycle_growth=0):
+    # Returns False if it stopped early because memory grew by more than recycle_growth bytes
+    error = start_frame_output(scene, props)
+    if error is not None:
+        print(error + ", frames are written by blender instead")
+
+    baseline_rss = None
+    for i, render_anim in enumerate(anims_to_render):
+        print(msg_rendering.format(i + 1, len(anims_to_render)) + " " + render_anim.meta.name + " (" + render_anim.model + ")")
+        with trace_span('setup', anim=render_anim.meta.name, model=render_anim.model):
+            setup_anim_render(scene, props, render_anim)
+        with trace_span('render', anim=render_anim.meta.name, model=render_anim.model, frames=render_anim.frame_end - render_anim.frame_start + 1):
+            render_job_frames(scene, render_anim)
+        finish_anim_render(scene, props, render_anim, i, progress_file)
+
+        # memory after the first job is the baseline (caches are filled by then)
+        if recycle_growth > 0 and i + 1 < len(anims_to_render):
+            rss = get_current_rss()
+            if baseline_rss is None:
+                baseline_rss = rss
+            elif rss - baseline_rss > recycle_growth:
+                print("Memory grew by {:.0f} MB, stopping after {} jobs".format((rss - baseline_rss) / 1024**2, i + 1))
+                stop_frame_output(scene)
+                return False
+
+    stop_frame_output(scene)
+    return True
+
+def render_in_background(anim_names, models):
+    # Renders without the modal operator (blender -b), used by watch mode
+    scene = bpy.context.scene
+    props = scene.reliveBatch
+
+    # folder structure should match a normal batch render of this file
+    enabled_models = get_models(scene)
+    use_model_folders = len(enabled_models) > 1
+    models = models or enabled_models
+
+    prepare_background_render(scene, props, models)
+    error = get_frame_format_error(scene, props)
+    if error is not None:
+        print(error)
+        return
+
+    start_trace(props, 0, 'batch')
+
+    with trace_span('scan'):
+        animations = get_anims(props.ref_sprite_path, props.animation_filter, props.infer_missing_meta)
+    if anim_names:
+        animations = [anim for anim in animations if anim.name in anim_names]
+
+    with trace_span('plan'):
+        anims_to_render = plan_anims_to_render(animations, models, props, [], use_model_folders)
+
+    bake_pose_caches(scene, props, anims_to_render)
+    start_batch_output(props, anims_to_render)
+    render_jobs(scene, props, anims_to_render)
+    finish_batch_output(props)
+    finish_trace(props)
+
+def render_job_file(job_file, progress_file, stats_file=None, trace_file=None, worker_index=0):
+    # Renders the jobs a worker was given by ReliveBatchRenderOperator
+    scene = bpy.context.scene
+    props = scene.reliveBatch
+
+    global current_worker_index
+    current_worker_index = worker_index
+
+    # the trace is written to trace_file, the process that started the workers merges them
+    props.write_trace = trace_file is not None
+    start_trace(props, worker_index + 1, 'worker {}'.format(worker_index + 1))
+
+    with trace_span('plan'):
+        anims_to_render = read_job_file(job_file)
+    prepare_background_render(scene, props, sorted({render_anim.model for render_anim in anims_to_render}))
+    # normally a no-op, the process that started the workers has baked the caches already
+    bake_pose_caches(scene, props, anims_to_render)
+
+    # the process that started the workers converts and packs the output
+    props.archive_output = 'NONE'
+    props.palette_output = 'NONE'
+
+    started = time.time()
+    finished_all = render_jobs(scene, props, anims_to_render, progress_file, props.worker_recycle_growth * 1024**2)
+
+    # timing and memory use (used by the calibration)
+    if stats_file is not None:
+        with open(stats_file, 'w') as f:
+            json.dump({'started': started, 'finished': time.time(), 'peak_rss': get_peak_rss()}, f)
+
+    finish_trace(props, trace_file)
+
+    if not finished_all:
+        sys.exit(worker_recycle_exit_code)
+
+def verify_render_output(scene, props, models):
+    # Checks the frames a batch render of these models would write
+    # Broken frames are written to a job file in the render path (rendered with --jobs)
+    # Returns (problems, jobs to re-render, job file)
+    props.current_pass = get_current_pass(props)
+    animations = get_anims(props.ref_sprite_path, props.animation_filter, props.infer_missing_meta)
+    enabled_models = get_models(scene)
+    anims_to_render = plan_anims_to_render(animations, models, props, [], len(enabled_models) > 1)
+
+    base_folder = bpy.path.abspath('//') if props.use_relative_render_path else ''
+    problems, jobs_to_render = verify_output(anims_to_render, props.current_pass, props.resolution_percent, base_folder, encoder=get_frame_encoder(props))
+
+    job_file = os.path.join(get_render_folder(props), rerender_file_name)
+    if jobs_to_render:
+        os.makedirs(get_render_folder(props), exist_ok=True)
+        write_job_file(job_file, jobs_to_render)
+    elif os.path.exists(job_file):
+        os.remove(job_file)
+
+    for problem, files in problems.items():
+        print("{} {} frames, e.g. {}".format(len(files), problem, files[0]))
+
+    return problems, jobs_to_render, job_file
+
+def get_worker_command(worker_args):
+    # Command line to run this addon in a background blender process (the blend file has to be saved)
+    return [bpy.app.binary_path, '-b', bpy.data.filepath, '--python', os.path.abspath(__file__), '--'] + worker_args
+
+def launch_workers(anims_to_render, worker_count, threads_per_worker, job_folder, trace=False, first_worker_index=0, extra_args=()):
+    # Starts background blender processes that render their share of the jobs
+    # Returns (processes, progress files, jobs of each process)
+    # With trace, each worker writes its trace to worker_N.trace in the job folder
+    workers = []
+    progress_files = []
+    worker_jobs = []
+
+    for i, jobs in enumerate(assign_jobs_to_workers(anims_to_render, worker_count)):
+        job_file = os.path.join(job_folder, 'worker_{}.json'.format(i))
+        progress_file = os.path.join(job_folder, 'worker_{}.progress'.format(i))
+        write_job_file(job_file, jobs)
+
+        worker_args = ['--jobs', job_file, '--progress', progress_file, '--stats', os.path.join(job_folder, 'worker_{}.stats'.format(i)), '--worker-index', str(first_worker_index + i)]
+        if threads_per_worker > 0:
+            worker_args += ['--threads', str(threads_per_worker)]
+        if trace:
+            worker_args += ['--trace', os.path.join(job_folder, 'worker_{}.trace'.format(i))]
+        worker_args += extra_args
+
+        workers.append(subprocess.Popen(get_worker_command(worker_args)))
+        progress_files.append(progress_file)
+        worker_jobs.append(jobs)
+
+    return workers, progress_files, worker_jobs
+
+def get_tuning_file():
+    if bpy.data.filepath == "":
+        return None
+    return os.path.splitext(bpy.data.filepath)[0] + tuning_suffix
+
+# tuning file -> (modification time, contents)
+tuning_catalogue = {}
+
+def load_tuning():
+    tuning_file = get_tuning_file()
+    try:
+        mtime = os.stat(tuning_file).st_mtime_ns
+    except (TypeError, FileNotFoundError):
+        return None
+
+    cached = tuning_catalogue.get(tuning_file)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with open(tuning_file) as f:
+        tuning = json.load(f)
+    tuning_catalogue[tuning_file] = (mtime, tuning)
+    return tuning
+
+def get_worker_settings(props):
+    # (workers, threads per worker) to render a batch with
+    tuning = load_tuning() if props.use_tuned_workers else None
+    if tuning is not None and tuning.get('best') is not None:
+        return tuning['best']['worker_count'], tuning['best']['threads_per_worker']
+    return props.worker_count, props.threads_per_worker
+
+def calibrate_workers(scene, props):
+    # Renders a sample of the animations with several worker x thread configurations
+    # and saves the fastest one next to the blend file (runs in a background process)
+    os.chdir(bpy.path.abspath('//'))
+    props.current_pass = get_current_pass(props)
+
+    models = get_models(scene)
+    if not models:
+        print("No models are enabled, nothing to calibrate with")
+        return
+    animations = [anim for anim in get_anims(props.ref_sprite_path, props.animation_filter, props.infer_missing_meta) if get_action(anim.name) is not None]
+    sample_path = '{}/{}'.format(props.render_path, calibration_folder_name)
+    jobs = pick_calibration_sample(animations, models, sample_path, props.current_pass, calibration_anim_count, calibration_frame_count)
+    frame_count = sum(job.frame_end - job.frame_start + 1 for job in jobs)
+    if frame_count == 0:
+        print("Nothing to calibrate with")
+        return
+
+    results = []
+    for worker_count, threads_per_worker in get_calibration_configs(os.cpu_count() or 1, len(jobs)):
+        job_folder = tempfile.mkdtemp(prefix='relive_calibration_')
+        workers = launch_workers(jobs, worker_count, threads_per_worker, job_folder)[0]
+        for worker in workers:
+            worker.wait()
+
+        stats = []
+        for i in range(len(workers)):
+            stats_file = os.path.join(job_folder, 'worker_{}.stats'.format(i))
+            if os.path.exists(stats_file):
+                with open(stats_file) as f:
+                    stats.append(json.load(f))
+        shutil.rmtree(job_folder, ignore_errors=True)
+
+        if len(stats) < len(workers) or any(worker.returncode != 0 for worker in workers):
+            print("{} x {}: failed".format(worker_count, threads_per_worker))
+            continue
+
+        seconds = max(stat['finished'] for stat in stats) - min(stat['started'] for stat in stats)
+        result = {
+            'worker_count': worker_count,
+            'threads_per_worker': threads_per_worker,
+            'frames_per_second': frame_count / max(seconds, 1e-6),
+            'peak_rss': sum(stat['peak_rss'] for stat in stats),
+        }
+        results.append(result)
+        print("{} x {}: {:.2f} frames/s, {:.2f} GB".format(worker_count, threads_per_worker, result['frames_per_second'], result['peak_rss'] / 1024**3))
+
+    shutil.rmtree(os.path.join(get_render_folder(props), calibration_folder_name), ignore_errors=True)
+
+    best = pick_best_config(results, props.calibration_memory_limit * 1024**3)
+    with open(get_tuning_file(), 'w') as f:
+        json.dump({'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'cpu_count': os.cpu_count(), 'frames': frame_count, 'results': results, 'best': best}, f, indent=1)
+
+    if best is not None:
+        print("Best: {} workers x {} threads".format(best['worker_count'], best['threads_per_worker']))
+
+def get_action_fingerprint(action):
+    # Hash of all keyframes in an action (changes whenever the animation is edited)
+    digest = hashlib.sha1()
+    for fcurve in action.fcurves:
+        digest.update('{}[{}]{}'.format(fcurve.data_path, fcurve.array_index, fcurve.mute).encode())
+
+        point_count = len(fcurve.keyframe_points)
+        for attribute in ('co', 'handle_left', 'handle_right'):
+            values = array('f', [0.0]) * (point_count * 2)
+            fcurve.keyframe_points.foreach_get(attribute, values)
+            digest.update(values.tobytes())
+
+    return digest.hexdigest()
+
+# == POSE CACHE
+
+def get_pose_cache_file(props, rig, action):
+    # the file name changes whenever the keyframes (or the bones of the rig) change
+    digest = hashlib.sha1()
+    digest.update(get_action_fingerprint(action).encode())
+    digest.update('|'.join(bone.name for bone in rig.pose.bones).encode())
+    return os.path.join(bpy.path.abspath('//' + props.pose_cache_path), '{}_{}.pose'.format(bpy.path.clean_name(action.name), digest.hexdigest()[:16]))
+
+def bake_pose_cache(scene, rig, action, frame_count, cache_file):
+    # Evaluates every frame of the action and stores the resulting bone transforms
+    # (converted to local space, so they reproduce the final pose without constraints or drivers)
+    rig.animation_data.action = action
+    values = array('f')
+
+    for frame in range(frame_count):
+        scene.frame_set(frame)
+        for bone in rig.pose.bones:
+            matrix = rig.convert_space(pose_bone=bone, matrix=bone.matrix, from_space='POSE', to_space='LOCAL')
+            for row in matrix:
+                values.extend(row)
+
+    # workers may bake the same action at the same time, so the file is replaced in one step
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    temp_file = '{}.{}.tmp'.format(cache_file, os.getpid())
+    with open(temp_file, 'wb') as f:
+        f.write(pose_cache_header.pack(pose_cache_magic, len(rig.pose.bones), frame_count))
+        values.tofile(f)
+    os.replace(temp_file, cache_file)
+
+def is_pose_cache_valid(cache, rig, frame_count):
+    return cache is not None and cache[0] == len(rig.pose.bones) and cache[1] >= frame_count
+
+def bake_pose_caches(scene, props, anims_to_render):
+    # Bakes the caches of all actions the jobs need that are missing or out of date, before anything is rendered
+    if not props.use_pose_cache:
+        return
+
+    rig = scene.objects[props.rig_name]
+    frame_counts = {}
+    for render_anim in anims_to_render:
+        frame_counts[render_anim.meta.name] = max(frame_counts.get(render_anim.meta.name, 0), render_anim.meta.frame_count)
+
+    previous_action = rig.animation_data.action
+    previous_frame = scene.frame_current
+    baked = 0
+    with trace_span('bake pose caches'):
+        for action_name, frame_count in frame_counts.items():
+            action = bpy.data.actions.get(action_name)
+            if action is None:
+                continue
+            cache_file = get_pose_cache_file(props, rig, action)
+            if not is_pose_cache_valid(load_pose_cache(cache_file) if os.path.exists(cache_file) else None, rig, frame_count):
+                bake_pose_cache(scene, rig, action, frame_count, cache_file)
+                baked += 1
+
+    rig.animation_data.action = previous_action
+    scene.frame_set(previous_frame)
+    print("Baked {} pose caches ({} up to date)".format(baked, len(frame_counts) - baked))
+
+def load_pose_cache(cache_file):
+    # Returns (bone count, frame count, values) or None if the file is not a valid cache
+    with open(cache_file, 'rb') as f:
+        magic, bone_count, frame_count = pose_cache_header.unpack(f.read(pose_cache_header.size))
+        if magic != pose_cache_magic:
+            return None
+        values = array('f')
+        values.fromfile(f, bone_count * frame_count * 16)
+    return bone_count, frame_count, values
+
+# state of the pose cache that is currently applied (None if there is none)
+active_pose_cache = None
+
+PoseCacheState = namedtuple('PoseCacheState', 'rig bone_count frame_count values muted')
+
+def apply_pose_cache(scene, *args):
+    state = active_pose_cache
+    if state is None:
+        return
+
+    frame = min(max(scene.frame_current, 0), state.frame_count - 1)
+    offset = frame * state.bone_count * 16
+    for i, bone in enumerate(state.rig.pose.bones):
+        start = offset + i * 16
+        bone.matrix_basis = Matrix((state.values[start:start + 4], state.values[start + 4:start + 8], state.values[start + 8:start + 12], state.values[start + 12:start + 16]))
+
+def start_pose_cache(scene, props, render_anim):
+    global active_pose_cache
+
+    rig = scene.objects[props.rig_name]
+    action = bpy.data.actions[render_anim.meta.name]
+
+    # caches are baked by bake_pose_caches before the batch, this only catches actions changed since then
+    cache_file = get_pose_cache_file(props, rig, action)
+    cache = load_pose_cache(cache_file) if os.path.exists(cache_file) else None
+    if not is_pose_cache_valid(cache, rig, render_anim.meta.frame_count):
+        print("Baking pose cache for {}".format(action.name))
+        bake_pose_cache(scene, rig, action, render_anim.meta.frame_count, cache_file)
+        rig.animation_data.action = action
+        cache = load_pose_cache(cache_file)
+
+    # mute everything that would change the bones (remember the previous state)
+    # the action stays assigned, so its object and custom property curves are still evaluated
+    muted = []
+    for bone in rig.pose.bones:
+        for constraint in bone.constraints:
+            muted.append((constraint, constraint.mute))
+            constraint.mute = True
+    for driver in rig.animation_data.drivers:
+        if driver.data_path.startswith('pose.bones'):
+            muted.append((driver, driver.mute))
+            driver.mute = True
+    for fcurve in action.fcurves:
+        if fcurve.data_path.startswith('pose.bones'):
+            muted.append((fcurve, fcurve.mute))
+            fcurve.mute = True
+
+    active_pose_cache = PoseCacheState(rig, cache[0], cache[1], cache[2], muted)
+    bpy.app.handlers.frame_change_pre.append(apply_pose_cache)
+    apply_pose_cache(scene)
+
+def stop_pose_cache(scene):
+    global active_pose_cache
+    if active_pose_cache is None:
+        return
+
+    if apply_pose_cache in bpy.app.handlers.frame_change_pre:
+        bpy.app.handlers.frame_change_pre.remove(apply_pose_cache)
+
+    for item, mute in active_pose_cache.muted:
+        item.mute = mute
+
+    active_pose_cache = None
+
+# == TRACING
+
+# TraceRecorder of this process while a traced batch is running
+active_trace = None
+
+def trace_span(name, **args):
+    if active_trace is None:
+        return contextlib.nullcontext()
+    return active_trace.span(name, **args)
+
+def start_trace(props, pid, process_name):
+    global active_trace
+    active_trace = TraceRecorder(pid, process_name) if props.write_trace else None
+
+def finish_trace(props, trace_file=None, worker_trace_files=()):
+    # Writes this process' trace to trace_file, or merges it with the workers' into the render path
+    global active_trace
+    if active_trace is None:
+        return
+
+    if trace_file is None:
+        own_trace_file = os.path.join(tempfile.gettempdir(), 'relive_trace_{}.json'.format(os.getpid()))
+        active_trace.write(own_trace_file)
+        os.makedirs(get_render_folder(props), exist_ok=True)
+        merge_traces([own_trace_file] + list(worker_trace_files), os.path.join(get_render_folder(props), trace_file_name))
+        os.remove(own_trace_file)
+    else:
+        active_trace.write(trace_file)
+
+    active_trace = None
+
+# == PROFILING
+
+# OperatorProfiler of each profiled operation while it runs
+profilers = {}
+
+def get_profile_prefix(name):
+    # Profiles are written next to the blend file
+    if bpy.data.filepath:
+        return os.path.splitext(bpy.data.filepath)[0] + '.' + name
+    return os.path.join(tempfile.gettempdir(), 'untitled.' + name)
+
+def get_profile_args(props):
+    # Command line arguments that make a worker profile itself like this process
+    if not props.use_profiling:
+        return []
+    return ['--profile', '--profile-top', str(props.profile_top_count)] + (['--profile-lines'] if props.use_line_sampling else [])
+
+def write_profile(profiler, name, top_count):
+    profiler.finish()
+    prof_file, summary_file = profiler.write(get_profile_prefix(name), top_count)
+    print("Profile written to {} ({})".format(summary_file, os.path.basename(prof_file)))
+
+def profiled(name):
+    # Decorator for operator methods and handlers: profiles them while "Profile" is checked.
+    # All calls until execute or modal returns FINISHED or CANCELLED go into one profile
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            props = bpy.context.scene.reliveBatch
+            if name not in profilers:
+                if not props.use_profiling:
+                    return method(*args, **kwargs)
+                profilers[name] = OperatorProfiler(props.use_line_sampling)
+
+            profiler = profilers[name]
+            with profiler.run():
+                result = method(*args, **kwargs)
+
+            if isinstance(result, set) and result & {'FINISHED', 'CANCELLED'} and profiler.depth == 0:
+                del profilers[name]
+                write_profile(profiler, name, props.profile_top_count)
+            return result
+        return wrapper
+    return decorator
+
+# == DIRECT OUTPUT
+
+class FrameWriter:
+    # Encodes and writes frames in order on a background thread
+
+    def __init__(self, compression, encoder):
+        self.compression = compression
+        self.encoder = encoder
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def write(self, frame_file, pixels):
+        self.queue.put((frame_file, pixels))
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                with trace_span('write frame', file=item[0]):
+                    if self.encoder.name == 'PNG':
+                        write_png(*item, compression=self.compression)
+                    else:
+                        write_encoded_frame(*item, self.encoder)
+            except EnvironmentError as env_error:
+                print("Could not write {}: {}".format(item[0], env_error))
+            finally:
+                self.queue.task_done()
+
+    def wait(self):
+        # blocks until every queued frame is on disk
+        self.queue.join()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+def write_png(png_file, pixels, compression=15):
+    # pixels - (height, width, channels) uint8 or uint16 array, top row first
+    # compression - 0-100 like blender's png compression setting
+    height, width, channels = pixels.shape
+    bit_depth = 16 if pixels.dtype == np.uint16 else 8
+
+    # filter type 0 in front of every row
+    rows = np.zeros((height, width * channels * bit_depth // 8 + 1), dtype=np.uint8)
+    rows[:, 1:] = pixels.astype('>u2' if bit_depth == 16 else np.uint8).reshape(height, -1).view(np.uint8)
+
+    color_type = 6 if channels == 4 else 2
+    with open(png_file, 'wb') as f:
+        f.write(png_signature)
+        f.write(get_png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, bit_depth, color_type, 0, 0, 0)))
+        f.write(get_png_chunk(b'IDAT', zlib.compress(rows.tobytes(), round(compression * 9 / 100))))
+        f.write(get_png_chunk(b'IEND', b''))
+
+def write_encoded_frame(frame_file, pixels, encoder):
+    # pixels - (height, width, channels) uint8 array, top row first
+    height, width, channels = pixels.shape
+    with open(frame_file, 'wb') as f:
+        f.write(encoder.encode(width, height, channels, pixels.tobytes()))
+
+def get_direct_output_error(scene, props):
+    # Returns why the viewer pixels can't be written as they would be by blender (None if they can)
+    view = scene.view_settings
+    if view.view_transform != 'Standard' or view.look != 'None' or view.exposure != 0 or view.gamma != 1 or view.use_curve_mapping:
+        return "Direct output needs the Standard view transform (no look, exposure, gamma or curves)"
+    if scene.render.image_settings.color_mode not in ('RGB', 'RGBA'):
+        return "Direct output needs RGB or RGBA output"
+    if not scene.render.use_compositing:
+        return "Direct output needs compositing (Output Properties > Post Processing)"
+    encoder = get_frame_encoder(props)
+    if encoder.encode is None:
+        return "Direct output can't write {} frames".format(encoder.name)
+    return None
+
+def linear_to_srgb(values):
+    return np.where(values <= 0.0031308, values * 12.92, 1.055 * np.power(values, 1 / 2.4) - 0.055)
+
+def get_viewer_pixels(channels, bit_depth):
+    # Pixels of the last composited frame, converted like blender's file output would
+    viewer = bpy.data.images['Viewer Node']
+    width, height = viewer.size
+    pixels = np.empty(width * height * 4, dtype=np.float32)
+    viewer.pixels.foreach_get(pixels)
+    pixels = pixels.reshape(height, width, 4)[::-1]
+
+    alpha = pixels[..., 3:]
+    rgb = pixels[..., :3]
+    if channels == 4:
+        # render results are premultiplied, files are not
+        rgb = np.divide(rgb, alpha, out=np.zeros_like(rgb), where=alpha > 0)
+    pixels = np.concatenate([linear_to_srgb(np.clip(rgb, 0, 1)), np.clip(alpha, 0, 1)], axis=2)[..., :channels]
+
+    max_value = 65535 if bit_depth == 16 else 255
+    return (pixels * max_value + 0.5).astype(np.uint16 if bit_depth == 16 else np.uint8)
+
+# state of the direct output of the current batch (None if frames are written by blender)
+direct_output = None
+# True while render_job_frames renders the stills of a job
+rendering_direct_frames = False
+
+DirectOutputState = namedtuple('DirectOutputState', 'writer viewer render_layers added_nodes use_nodes channels bit_depth extension')
+
+def start_direct_output(scene, props):
+    # Adds a viewer node to the compositor that shows what the composite node gets
+    global direct_output
+    if not props.use_direct_output:
+        return None
+
+    error = get_direct_output_error(scene, props)
+    if error is not None:
+        return error
+
+    encoder = get_frame_encoder(props)
+    image_settings = scene.render.image_settings
+    # the addon's encoders only write 8-bit frames, raw frames always have alpha
+    channels = 4 if image_settings.color_mode == 'RGBA' or encoder.name == 'RGBA' else 3
+    bit_depth = int(image_settings.color_depth) if encoder.name == 'PNG' else 8
+
+    use_nodes = scene.use_nodes
+    scene.use_nodes = True
+    tree = scene.node_tree
+    added_nodes = []
+
+    render_layers = next((node for node in tree.nodes if node.type == 'R_LAYERS'), None)
+    if render_layers is None:
+        render_layers = tree.nodes.new('CompositorNodeRLayers')
+        added_nodes.append(render_layers)
+
+    composite = next((node for node in tree.nodes if node.type == 'COMPOSITE'), None)
+    if composite is None:
+        composite = tree.nodes.new('CompositorNodeComposite')
+        added_nodes.append(composite)
+        tree.links.new(render_layers.outputs['Image'], composite.inputs['Image'])
+
+    viewer = tree.nodes.new('CompositorNodeViewer')
+    viewer.name = viewer_node_name
+    viewer.use_alpha = True
+    added_nodes.append(viewer)
+    source = composite.inputs['Image'].links[0].from_socket if composite.inputs['Image'].links else render_layers.outputs['Image']
+    tree.links.new(source, viewer.inputs['Image'])
+    tree.nodes.active = viewer
+
+    direct_output = DirectOutputState(FrameWriter(image_settings.compression, encoder), viewer, render_layers if render_layers in added_nodes else None, added_nodes, use_nodes, channels, bit_depth, encoder.extension)
+    return None
+
+def setup_direct_output(scene, props, render_anim):
+    # the render layers node we added shows the layer being rendered
+    if direct_output.render_layers is not None:
+        direct_output.render_layers.layer = render_anim.model
+    os.makedirs(render_anim.file_path.removesuffix('/' + props.current_pass), exist_ok=True)
+
+def render_job_frames(scene, render_anim):
+    # Renders the frames of a job. With direct output every frame is a still that blender doesn't write,
+    # its pixels are taken from the viewer and written by the frame writer
+    global rendering_direct_frames
+    if direct_output is None:
+        bpy.ops.render.render(animation=True, write_still=False, layer=render_anim.model)
+        return
+
+    prefix = scene.reliveBatch.current_pass
+    export_folder = render_anim.file_path.removesuffix('/' + prefix)
+    rendering_direct_frames = True
+    try:
+        for frame in range(render_anim.frame_start, render_anim.frame_end + 1):
+            scene.frame_set(frame)
+            bpy.ops.render.render(write_still=False, layer=render_anim.model)
+            frame_file = os.path.join(export_folder, get_frame_file_name(frame, prefix, direct_output.extension))
+            direct_output.writer.write(frame_file, get_viewer_pixels(direct_output.channels, direct_output.bit_depth))
+    finally:
+        rendering_direct_frames = False
+
+def stop_direct_output(scene):
+    global direct_output
+    if direct_output is None:
+        return
+
+    direct_output.writer.close()
+    for node in direct_output.added_nodes:
+        scene.node_tree.nodes.remove(node)
+    scene.use_nodes = direct_output.use_nodes
+    direct_output = None
+
+# == FRAME FORMATS
+
+# blender's image settings before the batch changed them for the frame format (None if unchanged)
+previous_frame_settings = None
+
+def get_frame_encoder(props):
+    return frame_encoders[props.frame_format]
+
+def get_blender_extension(encoder):
+    # extension of the files blender writes (scratch frames that are converted afterwards for the addon's own formats)
+    return encoder.extension if encoder.blender_format is not None else scratch_frame_extension
+
+def get_frame_format_error(scene, props):
+    # Returns why the frame format can't be used with these settings (None if it can)
+    encoder = get_frame_encoder(props)
+    if encoder.name != 'PNG' and props.palette_output != 'NONE':
+        return "Palette output needs png frames"
+    if encoder.blender_format is not None and encoder.blender_format not in scene.render.image_settings.bl_rna.properties['file_format'].enum_items.keys():
+        return "This version of blender can't write {} frames".format(encoder.name)
+    return None
+
+def start_frame_output(scene, props):
+    # Sets blender's output up for the frame format, then starts the direct output and the post-render pipeline
+    # Returns why the direct output can't be used (None if it can or isn't enabled)
+    global previous_frame_settings
+    encoder = get_frame_encoder(props)
+    image_settings = scene.render.image_settings
+    previous_frame_settings = (image_settings.file_format, image_settings.quality)
+
+    if encoder.blender_format == 'WEBP':
+        image_settings.file_format = 'WEBP'
+        image_settings.quality = 100
+    elif encoder.blender_format is None:
+        image_settings.file_format = scratch_frame_format
+
+    error = start_direct_output(scene, props)
+    start_post_render_pipeline(props)
+    return error
+
+def stop_frame_output(scene):
+    # the pipeline still needs the direct output to finish the jobs it has
+    global previous_frame_settings
+    stop_post_render_pipeline(scene.reliveBatch)
+    stop_direct_output(scene)
+
+    if previous_frame_settings is not None:
+        image_settings = scene.render.image_settings
+        image_settings.file_format, image_settings.quality = previous_frame_settings
+        previous_frame_settings = None
+
+# == PALETTE
+
+def read_png_pixels(png_file):
+    # Returns the pixels of a png as a (height, width, 4) uint8 array, top row first
+    img = bpy.data.images.load(os.path.abspath(png_file))
+    img[batch_image_key] = png_file
+    width, height = img.size
+    pixels = np.empty(width * height * 4, dtype=np.float32)
+    img.pixels.foreach_get(pixels)
+    bpy.data.images.remove(img)
+    return (pixels * 255 + 0.5).astype(np.uint8).reshape(height, width, 4)[::-1]
+
+def pack_colours(rgb):
+    rgb = rgb.astype(np.uint32)
+    return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+def build_palette(frames, palette_size):
+    # Median cut over the opaque pixels of all frames at once
+    # Returns (palette, colours, colour_indices):
+    #   palette - (n, 4) uint8 RGBA, index 0 is transparent
+    #   colours - sorted packed colours of all opaque pixels
+    #   colour_indices - palette index of each colour
+    rgba = np.concatenate([frame.reshape(-1, 4) for frame in frames])
+    colours, counts = np.unique(pack_colours(rgba[rgba[:, 3] >= palette_alpha_cutoff, :3]), return_counts=True)
+    channels = np.stack([colours >> 16, (colours >> 8) & 255, colours & 255], axis=1).astype(np.int64)
+
+    def get_score(box):
+        # boxes with a wide color range and many pixels are split first
+        if len(box) < 2:
+            return 0
+        return int((channels[box].max(axis=0) - channels[box].min(axis=0)).max()) * int(counts[box].sum())
+
+    boxes = [np.arange(len(colours))] if len(colours) else []
+    scores = [get_score(box) for box in boxes]
+
+    while len(boxes) < palette_size - 1 and boxes and max(scores) > 0:
+        i = scores.index(max(scores))
+        box = boxes[i]
+
+        # split at the weighted median of the widest channel
+        channel = (channels[box].max(axis=0) - channels[box].min(axis=0)).argmax()
+        order = box[np.argsort(channels[box, channel], kind='stable')]
+        weights = np.cumsum(counts[order])
+        cut = min(max(int(np.searchsorted(weights, weights[-1] / 2)) + 1, 1), len(order) - 1)
+
+        boxes[i:i + 1] = [order[:cut], order[cut:]]
+        scores[i:i + 1] = [get_score(order[:cut]), get_score(order[cut:])]
+
+    palette = np.zeros((len(boxes) + 1, 4), dtype=np.uint8)
+    colour_indices = np.zeros(len(colours), dtype=np.uint8)
+    for i, box in enumerate(boxes):
+        weights = counts[box, np.newaxis]
+        palette[i + 1, :3] = np.round((channels[box] * weights).sum(axis=0) / weights.sum())
+        palette[i + 1, 3] = 255
+        colour_indices[box] = i + 1
+
+    return palette, colours, colour_indices
+
+def get_palette_indices(pixels, colours, colour_indices):
+    # (height, width) uint8 palette indices of a frame (0 where it is transparent)
+    opaque = pixels[..., 3] >= palette_alpha_cutoff
+    indices = np.zeros(pixels.shape[:2], dtype=np.uint8)
+    indices[opaque] = colour_indices[np.searchsorted(colours, pack_colours(pixels[opaque, :3]))]
+    return indices
+
+def write_indexed_png(png_file, indices, palette):
+    height, width = indices.shape
+
+    # 4 bits per pixel if the palette is small enough
+    bit_depth = 4 if len(palette) <= 16 else 8
+    if bit_depth == 4:
+        if width % 2:
+            indices = np.pad(indices, ((0, 0), (0, 1)))
+        indices = (indices[:, 0::2] << 4) | indices[:, 1::2]
+
+    # filter type 0 in front of every row
+    rows = np.zeros((height, indices.shape[1] + 1), dtype=np.uint8)
+    rows[:, 1:] = indices
+
+    with open(png_file, 'wb') as f:
+        f.write(png_signature)
+        f.write(get_png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, bit_depth, 3, 0, 0, 0)))
+        f.write(get_png_chunk(b'PLTE', palette[:, :3].tobytes()))
+        f.write(get_png_chunk(b'tRNS', palette[:1, 3].tobytes()))
+        f.write(get_png_chunk(b'IDAT', zlib.compress(rows.tobytes(), 9)))
+        f.write(get_png_chunk(b'IEND', b''))
+
+def get_palette_file_name(props):
+    if props.current_pass == default_pass_name:
+        return palette_file_name
+    return palette_file_name.replace('.pal', props.current_pass + '.pal')
+
+def convert_to_palette(props, folders):
+    # Converts the frames of the current pass in all folders to one shared palette
+    # folders - list of (export folder, AnimMeta)
+    frame_files = []
+    for export_folder, meta in folders:
+        for frame in range(meta.frame_count):
+            frame_file = os.path.join(export_folder, get_frame_file_name(frame, props.current_pass))
+            if os.path.exists(frame_file):
+                frame_files.append(frame_file)
+
+    if not frame_files:
+        return
+
+    frames = [read_png_pixels(frame_file) for frame_file in frame_files]
+    palette, colours, colour_indices = build_palette(frames, props.palette_size)
+
+    for frame_file, pixels in zip(frame_files, frames):
+        indices = get_palette_indices(pixels, colours, colour_indices)
+        if props.palette_output == 'PNG':
+            write_indexed_png(frame_file, indices, palette)
+        else:
+            with open(frame_file.removesuffix('.png') + '.raw', 'wb') as f:
+                f.write(indices.tobytes())
+
+    if props.palette_output == 'RAW':
+        palette_name = get_palette_file_name(props)
+        for export_folder, meta in folders:
+            with open(os.path.join(export_folder, palette_name), 'wb') as f:
+                f.write(palette.tobytes())
+
+    print("Converted {} frames to {} colors".format(len(frame_files), len(palette)))
+
+# == PACKAGING
+
+# re-rendered members are appended again on purpose (readers use the last copy)
+warnings.filterwarnings('ignore', message='Duplicate name', category=UserWarning, module='zipfile')
+
+class ArchivePackager:
+    # Appends finished animation folders to a zip or tar archive on a background thread
+    # The archive stays open for the whole batch. Files that are byte for byte the same as in the archive are skipped,
+    # changed ones are appended (readers use the last copy of a member), so packing a folder only costs its own files.
+
+    def __init__(self, archive_file, render_folder, current_pass, frame_format='PNG'):
+        self.archive_file = archive_file
+        self.frame_format = frame_format
+        self.current_pass = current_pass
+        self.render_folder = render_folder
+        self.is_zip = archive_file.endswith('.zip')
+
+        self.changed = 0
+        self.unchanged = 0
+
+        # name -> (crc, size) of each member already in the archive
+        self.old_members = {}
+        if os.path.exists(archive_file):
+            if self.is_zip:
+                with zipfile.ZipFile(archive_file) as old_archive:
+                    self.old_members = {info.filename: (info.CRC, info.file_size) for info in old_archive.infolist()}
+            else:
+                # tar has no checksums of the data, the manifests have them
+                with tarfile.open(archive_file) as old_archive:
+                    for info in old_archive.getmembers():
+                        self.old_members[info.name] = (None, info.size)
+                        if os.path.basename(info.name).startswith('manifest'):
+                            folder = os.path.dirname(info.name)
+                            for file in json.load(old_archive.extractfile(info)).get('files', []):
+                                self.old_members[folder + '/' + file['name']] = (file['crc32'], file['size'])
+
+        os.makedirs(os.path.dirname(archive_file), exist_ok=True)
+        if self.is_zip:
+            # png and webp frames are already compressed, other members are deflated in write_member
+            self.archive = zipfile.ZipFile(archive_file, 'a', zipfile.ZIP_STORED)
+        else:
+            self.archive = tarfile.open(archive_file, 'a')
+
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def add_folder(self, folder, meta, file_names):
+        # folder is relative to the render folder, file_names are the files of this pass in it
+        self.queue.put((folder, meta, file_names))
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            try:
+                with trace_span('pack', folder=item[0]):
+                    self.write_folder(*item)
+            except EnvironmentError as env_error:
+                print("Could not pack {}: {}".format(item[0], env_error))
+
+    def write_member(self, name, data):
+        crc = zlib.crc32(data)
+        if self.old_members.get(name) == (crc, len(data)):
+            self.unchanged += 1
+            return
+        self.changed += 1
+
+        if self.is_zip:
+            self.archive.writestr(name, data, zipfile.ZIP_STORED if name.endswith(compressed_frame_extensions) else zipfile.ZIP_DEFLATED)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = time.time()
+            self.archive.addfile(info, io.BytesIO(data))
+        self.old_members[name] = (crc, len(data))
+
+    def write_folder(self, folder, meta, file_names):
+        files = []
+        for file_name in file_names:
+            try:
+                with open(os.path.join(self.render_folder, folder, file_name), 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            self.write_member(folder + '/' + file_name, data)
+            files.append({'name': file_name, 'size': len(data), 'crc32': zlib.crc32(data)})
+
+        # one manifest per pass, like the palette files
+        manifest_name = manifest_file_name
+        if self.current_pass != default_pass_name:
+            manifest_name = manifest_file_name.replace('.json', self.current_pass + '.json')
+        manifest = {'name': meta.name, 'pass': self.current_pass, 'format': self.frame_format, 'frame_count': meta.frame_count, 'size': {'w': meta.size_w, 'h': meta.size_h}, 'offset': {'x': meta.offset_x, 'y': meta.offset_y}, 'files': files}
+        self.write_member(folder + '/' + manifest_name, json.dumps(manifest, indent=1).encode())
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        self.archive.close()
+        print("Archive {}: {} added, {} unchanged".format(self.archive_file, self.changed, self.unchanged))
+
+# the packager of the current batch (None if there is no archive output)
+archive_packager = None
+
+# render folder -> number of jobs that still need to render into it
+jobs_left_per_folder = {}
+# render folder -> frames the jobs of the batch write into it (rendered and held)
+frames_per_folder = {}
+# the pack stage of the post-render pipeline finishes jobs on its own thread
+batch_output_lock = threading.Lock()
+
+def get_render_folder(props):
+    relative_string = "//" if props.use_relative_render_path else ""
+    return bpy.path.abspath(relative_string + props.render_path)
+
+# render folder -> (export folder, meta) of the folders that will share a palette, per model
+palette_folders_per_model = {}
+
+def start_batch_output(props, anims_to_render):
+    # Sets up the steps that run once all jobs of an animation folder are finished (palette and archive)
+    global archive_packager
+
+    with batch_output_lock:
+        jobs_left_per_folder.clear()
+        frames_per_folder.clear()
+        palette_folders_per_model.clear()
+        if props.archive_output == 'NONE' and props.palette_output == 'NONE':
+            return
+
+        for render_anim in anims_to_render:
+            jobs_left_per_folder[render_anim.file_path] = jobs_left_per_folder.get(render_anim.file_path, 0) + 1
+            frames_per_folder.setdefault(render_anim.file_path, set()).update(range(render_anim.frame_start, render_anim.frame_end + 1), render_anim.held_frames)
+
+    if props.archive_output != 'NONE':
+        extension = '.zip' if props.archive_output == 'ZIP' else '.tar'
+        archive_packager = ArchivePackager(bpy.path.abspath('//' + props.archive_path + extension), get_render_folder(props), props.current_pass, props.frame_format)
+
+def get_output_file_names(props, frames):
+    # files the batch wrote for these frames of the current pass (after the palette conversion)
+    extension = '.raw' if props.palette_output == 'RAW' else get_frame_encoder(props).extension
+    file_names = [get_frame_file_name(frame, props.current_pass, extension) for frame in sorted(frames)]
+    if props.palette_output == 'RAW':
+        file_names.append(get_palette_file_name(props))
+    return file_names
+
+def finish_folder(props, export_folder, meta):
+    with batch_output_lock:
+        frames = frames_per_folder.pop(export_folder + '/' + props.current_pass, ())
+    if archive_packager is not None:
+        archive_packager.add_folder(export_folder.removeprefix(props.render_path + '/'), meta, get_output_file_names(props, frames))
+
+def finish_output_job(props, render_anim):
+    # Converts and/or packs the animation folder once all of its jobs are done
+    with batch_output_lock:
+        if render_anim.file_path not in jobs_left_per_folder:
+            return
+
+        jobs_left_per_folder[render_anim.file_path] -= 1
+        if jobs_left_per_folder[render_anim.file_path] > 0:
+            return
+
+        del jobs_left_per_folder[render_anim.file_path]
+        export_folder = render_anim.file_path.removesuffix('/' + props.current_pass)
+
+        if props.palette_output != 'NONE' and props.palette_scope == 'CHARACTER':
+            # converted when the batch is finished
+            palette_folders_per_model.setdefault(render_anim.model, []).append((export_folder, render_anim.meta))
+            return
+
+    if props.palette_output != 'NONE':
+        if threading.current_thread() is not threading.main_thread():
+            # palettes are converted with blender's image loading, which only works on the main thread
+            pending_palette_folders.put((export_folder, render_anim.meta))
+            return
+        convert_to_palette(props, [(export_folder, render_anim.meta)])
+    finish_folder(props, export_folder, render_anim.meta)
+
+def finish_pending_folders(props):
+    # Converts and packs the folders that the post-render pipeline finished
+    while not pending_palette_folders.empty():
+        export_folder, meta = pending_palette_folders.get()
+        convert_to_palette(props, [(export_folder, meta)])
+        finish_folder(props, export_folder, meta)
+
+def finish_batch_output(props):
+    global archive_packager
+
+    with trace_span('post-process'):
+        for folders in palette_folders_per_model.values():
+            convert_to_palette(props, folders)
+            for export_folder, meta in folders:
+                finish_folder(props, export_folder, meta)
+        palette_folders_per_model.clear()
+
+        if archive_packager is not None:
+            archive_packager.close()
+            archive_packager = None
+        with batch_output_lock:
+            jobs_left_per_folder.clear()
+            frames_per_folder.clear()
+
+# == POST-RENDER PIPELINE
+
+# runs the post-render steps of each job on background threads (None if they run in finish_anim_render)
+post_render_pipeline = None
+# animation folders the pipeline finished that still need their palette (converted on the main thread)
+pending_palette_folders = queue.Queue()
+# jobs with broken frames found by the verify stage
+pipeline_rerender_jobs = []
+# index of this process when it is a worker (None otherwise)
+current_worker_index = None
+
+# failed - the stage that raised, the job skips the ones after it except 'progress'
+PostRenderJob = namedtuple('PostRenderJob', 'render_anim index progress_file failed', defaults=(None,))
+
+# the settings the stages use, read from the properties when the pipeline is started (bpy isn't thread safe)
+# base_folder - what relative render paths are relative to (like in verify_render_output)
+PostRenderSettings = namedtuple('PostRenderSettings', 'current_pass frame_format resolution_percent palette_output palette_scope render_path base_folder')
+
+def rename_job_frames(settings, job):
+    render_anim = job.render_anim
+    encoder = get_frame_encoder(settings)
+    if direct_output is not None:
+        direct_output.writer.wait()
+    else:
+        rename_rendered_frames(render_anim.file_path, settings.current_pass, render_anim.frame_start, render_anim.frame_end, get_blender_extension(encoder), print)
+        if encoder.blender_format is None:
+            convert_rendered_frames(render_anim.file_path, settings.current_pass, render_anim.frame_start, render_anim.frame_end, encoder)
+    copy_held_frames(render_anim.file_path, settings.current_pass, render_anim.frame_end, render_anim.held_frames, encoder.extension)
+    return job
+
+def optimise_job_frames(settings, job):
+    render_anim = job.render_anim
+    frames = list(range(render_anim.frame_start, render_anim.frame_end + 1)) + list(render_anim.held_frames)
+    recompress_frames(render_anim.file_path, settings.current_pass, frames, get_frame_encoder(settings).extension)
+    return job
+
+def dedupe_job_frames(settings, job):
+    render_anim = job.render_anim
+    frames = list(range(render_anim.frame_start, render_anim.frame_end + 1))
+    link_duplicate_frames(render_anim.file_path, settings.current_pass, frames, get_frame_encoder(settings).extension)
+    return job
+
+def verify_job_frames(settings, job):
+    problems, jobs_to_render = verify_output([job.render_anim], settings.current_pass, settings.resolution_percent, settings.base_folder, thread_count=4, encoder=get_frame_encoder(settings))
+    for problem, files in problems.items():
+        print("{} {} frames, e.g. {}".format(len(files), problem, files[0]))
+    pipeline_rerender_jobs.extend(jobs_to_render)
+    return job
+
+def pack_job_output(settings, job):
+    finish_output_job(settings, job.render_anim)
+    return job
+
+def report_job_progress(settings, job):
+    if job.failed is not None:
+        print("Post-processing {} ({}) failed in {}, its folder is not packed".format(job.render_anim.meta.name, job.render_anim.model, job.failed))
+    write_job_progress(job.progress_file, job.index, job.failed)
+    return job
+
+def mark_job_failed(job, stage_name, exception):
+    # keeps the job in the pipeline, so its progress is still written
+    return job._replace(failed=stage_name)
+
+def run_traced_stage(name, function, job):
+    if job.failed is not None and name != 'progress':
+        return job
+    with trace_span(name, anim=job.render_anim.meta.name, model=job.render_anim.model):
+        return function(job)
+
+def start_post_render_pipeline(props):
+    global post_render_pipeline
+    if not props.use_post_render_pipeline:
+        return
+
+    base_folder = bpy.path.abspath('//') if props.use_relative_render_path else ''
+    settings = PostRenderSettings(props.current_pass, props.frame_format, props.resolution_percent, props.palette_output, props.palette_scope, props.render_path, base_folder)
+    stages = [('rename', rename_job_frames, 1)]
+    if props.optimise_frames and props.frame_format == 'PNG':
+        stages.append(('optimise', optimise_job_frames, props.pipeline_threads))
+    if props.dedupe_frames:
+        stages.append(('dedupe', dedupe_job_frames, 1))
+    if props.verify_frames:
+        stages.append(('verify', verify_job_frames, props.pipeline_threads))
+    stages += [('pack', pack_job_output, 1), ('progress', report_job_progress, 1)]
+
+    pipeline_rerender_jobs.clear()
+    post_render_pipeline = Pipeline([PipelineStage(name, functools.partial(run_traced_stage, name, functools.partial(function, settings)), thread_count) for name, function, thread_count in stages], props.pipeline_queue_size, mark_job_failed)
+
+def stop_post_render_pipeline(props):
+    # Waits for the jobs in the pipeline and prints the throughput of each stage
+    global post_render_pipeline
+    if post_render_pipeline is None:
+        return
+
+    post_render_pipeline.close()
+    finish_pending_folders(props)
+
+    print("Post-render pipeline (rendering waited {:.1f} s for it):".format(post_render_pipeline.put_blocked))
+    for stats in post_render_pipeline.get_stats():
+        print("  {name:10} {items:5} jobs {items_per_s:7.2f} jobs/s  busy {utilisation:6.1%}  waited {blocked_s:6.1f} s for the next stage  {errors} errors".format(**stats))
+    post_render_pipeline = None
+
+    # workers only report broken frames, the blend file's own render or VERIFY writes the job file
+    if pipeline_rerender_jobs and current_worker_index is None:
+        job_file = os.path.join(get_render_folder(props), rerender_file_name)
+        os.makedirs(get_render_folder(props), exist_ok=True)
+        write_job_file(job_file, pipeline_rerender_jobs)
+        print("{} jobs to re-render written to {}".format(len(pipeline_rerender_jobs), job_file))
+    pipeline_rerender_jobs.clear()
+
+# == WATCH MODE
+
+class SpriteWatcher:
+    # Re-renders animations whose action (on save) or meta.json changed, in a background blender process
+
+    poll_interval = 1.0
+
+    def __init__(self, scene):
+        self.scene = scene
+        self.pending = set()
+        self.last_change = 0
+        self.worker = None
+        self.worker_anims = []
+
+        # current state, changes are detected by comparing against these
+        self.action_fingerprints = self.get_action_fingerprints()
+        self.meta_mtimes = self.get_meta_mtimes()
+
+    def get_action_fingerprints(self):
+        props = self.scene.reliveBatch
+        return {action.name: get_action_fingerprint(action) for action in bpy.data.actions if fnmatch.fnmatch(action.name, props.animation_filter)}
+
+    def get_meta_mtimes(self):
+        props = self.scene.reliveBatch
+        mtimes = {}
+        with os.scandir(props.ref_sprite_path) as entries:
+            for entry in entries:
+                if not entry.is_dir() or not fnmatch.fnmatch(entry.name, props.animation_filter):
+                    continue
+                try:
+                    mtimes[entry.name] = os.stat(os.path.join(entry.path, 'meta.json')).st_mtime_ns
+                except FileNotFoundError:
+                    continue
+        return mtimes
+
+    def add_changes(self, anim_names):
+        if anim_names:
+            print("Changed: " + ", ".join(sorted(anim_names)))
+            self.pending |= anim_names
+            self.last_change = time.monotonic()
+
+    def saved(self):
+        fingerprints = self.get_action_fingerprints()
+        self.add_changes({name for name, fingerprint in fingerprints.items() if self.action_fingerprints.get(name) != fingerprint})
+        self.action_fingerprints = fingerprints
+
+    def tick(self):
+        props = self.scene.reliveBatch
+
+        mtimes = self.get_meta_mtimes()
+        self.add_changes({name for name, mtime in mtimes.items() if self.meta_mtimes.get(name) != mtime})
+        self.meta_mtimes = mtimes
+
+        if self.worker is not None:
+            if self.worker.poll() is None:
+                return
+            print("Watch worker finished ({})".format(self.worker.returncode))
+            props.watch_status = "RENDERED " + str(len(self.worker_anims))
+            self.worker = None
+
+        # wait until nothing has changed for a while
+        if not self.pending or time.monotonic() - self.last_change < props.watch_debounce:
+            return
+
+        self.worker_anims = sorted(self.pending)
+        self.pending = set()
+
+        models = get_models(self.scene)
+        props.watch_status = "RENDERING " + str(len(self.worker_anims))
+        self.worker = subprocess.Popen(get_worker_command(['--render', '--anims'] + self.worker_anims + ['--layers'] + models))
+
+    def stop(self):
+        if self.worker is not None and self.worker.poll() is None:
+            self.worker.terminate()
+        self.worker = None
+
+# the active watcher (None if watch mode is off)
+sprite_watcher = None
+
+def watch_tick():
+    if sprite_watcher is None:
+        return None
+
+    try:
+        sprite_watcher.tick()
+    except EnvironmentError as env_error:
+        print("Watch mode error: {}".format(env_error))
+
+    return SpriteWatcher.poll_interval
+
+@persistent
+def watch_saved(*args):
+    if sprite_watcher is not None:
+        sprite_watcher.saved()
+
+@persistent
+def stop_watching(*args):
+    # the watcher belongs to the scene of the file that is being closed
+    global sprite_watcher
+    if sprite_watcher is not None:
+        sprite_watcher.stop()
+        sprite_watcher = None
+
+# == CALIBRATION
+
+# background process running calibrate_workers
+calibration_process = None
+
+def calibration_tick():
+    global calibration_process
+    if calibration_process is None or calibration_process.poll() is not None:
+        if calibration_process is not None and calibration_process.returncode != 0:
+            print("Calibration failed")
+        calibration_process = None
+
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type == 'VIEW_3D':
+                    area.tag_redraw()
+        return None
+
+    return 1.0
+
+# == OPERATORS
+
+class ReliveImportReferencesOperator(bpy.types.Operator):
+    
+    bl_idname = 'opr.import_reference_sprites_operator'
+    bl_label = 'RELIVE: Import sprites'
+    bl_description = "Imports all sprite animations that match the filter into a new collection.\nSprites that were imported before are reused (and only updated if their meta.json changed).\nThe collection is automatically set to not be selectable.\nEach reference will be positioned and scaled depending on the info in its meta.json file.\nAll reference images will be facing the -X axis"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @profiled('import')
+    def execute(self, context):
+        props = context.scene.reliveBatch
+
+        print("Importing reference sprites...")
+        
+        if props.use_relative_ref_sprite_path:
+            if ":" in props.ref_sprite_path:
+                self.report({"ERROR"}, error_relative_path_with_drive_letter)
+                return {"CANCELLED"}
+        else:
+            if ":" not in props.ref_sprite_path:
+                self.report({"ERROR"}, error_absolute_path_without_drive_letter)
+                return {"CANCELLED"}
+
+        try:
+            anims = get_anims(props.ref_sprite_path, props.ref_sprite_filter, props.infer_missing_meta)
+        except FileNotFoundError as not_found:
+            self.report({"ERROR"}, "Sprite path is invalid (" + not_found.strerror + ": " + not_found.filename + ")")
+            return {"CANCELLED"}
+        except EnvironmentError as env_error: # parent of IOError, OSError *and* WindowsError where available
+            self.report({"ERROR"}, "Sprite path is invalid (EnvironmentError: " + env_error.strerror + ")")
+            return {"CANCELLED"}
+
+        # Reuse ref collection if the same filter was imported before
+        collection_name = "References (" + props.ref_sprite_filter + ")"
+        referencesCollection = bpy.data.collections.get(collection_name)
+        if referencesCollection is None:
+            referencesCollection = bpy.data.collections.new(collection_name)
+        if referencesCollection.name not in context.scene.collection.children:
+            context.scene.collection.children.link(referencesCollection)
+        referencesCollection.color_tag = 'COLOR_01'
+        referencesCollection.hide_select = True
+
+        # Existing references (keyed by sprite path)
+        existing_images = get_tagged_ids(bpy.data.images)
+        existing_empties = get_tagged_ids(bpy.data.objects)
+
+        relative_string = ""
+        if props.use_relative_ref_sprite_path:
+            relative_string = "//"
+
+        loaded = 0
+        updated = 0
+        placeholders = []
+
+        # Add all reference image sequences
+        for anim in anims:
+            sprite_path = relative_string + props.ref_sprite_path + "/" + anim.name + "/0.png"
+            anim_settings = [anim.frame_count, anim.size_w, anim.size_h, anim.offset_x, anim.offset_y]
+
+            empty = existing_empties.get(sprite_path)
+
+            if props.use_lazy_import and (empty is None or ref_pending_key in empty):
+                # only create a placeholder, the image is loaded once it becomes visible
+                img = None
+            else:
+                # load image and set to sequence (unless it is already loaded)
+                image_count = len(existing_images)
+                img, proxies_changed = load_reference_sequence(existing_images, sprite_path, anim, props, props.use_reference_proxies)
+                loaded += len(existing_images) - image_count
+
+            if empty is None:
+                # create new empty
+                empty = bpy.data.objects.new(anim.name, None)
+                empty[ref_sprite_path_key] = sprite_path
+                existing_empties[sprite_path] = empty
+
+                # rotate toward camera
+                empty.rotation_euler[0] = 1.5708
+                empty.rotation_euler[2] = -1.5708
+
+                setup_reference_empty(empty, img, anim)
+                empty[ref_settings_key] = anim_settings
+
+                if img is None:
+                    empty[ref_pending_key] = True
+                    placeholders.append(empty)
+
+            elif img is None:
+                # still a placeholder
+                setup_reference_empty(empty, None, anim)
+                empty[ref_settings_key] = anim_settings
+
+            elif list(empty.get(ref_settings_key, [])) != anim_settings:
+                # frames or offsets changed since last import
+                if not proxies_changed:
+                    img.reload()
+                setup_reference_empty(empty, img, anim)
+                empty[ref_settings_key] = anim_settings
+                updated += 1
+
+            elif empty.data != img:
+                # switched between proxy and full resolution
+                empty.data = img
+
+            if img is not None and ref_pending_key in empty:
+                # placeholder from an earlier lazy import
+                del empty[ref_pending_key]
+                pending_references.discard(empty.name)
+
+            # add to collection
+            if empty.name not in referencesCollection.objects:
+                referencesCollection.objects.link(empty)
+
+        # placeholders start hidden (they can only be hidden once they are in the view layer)
+        for empty in placeholders:
+            empty.hide_set(True)
+            pending_references.add(empty.name)
+
+        print("Loaded {} new sequences, updated {} existing references, created {} placeholders".format(loaded, updated, len(placeholders)))
+
+        return {"FINISHED"}
+
+class ReliveToggleReferenceProxiesOperator(bpy.types.Operator):
+    
+    bl_idname = 'opr.toggle_reference_proxies_operator'
+    bl_label = 'RELIVE: Toggle reference proxies'
+    bl_description = "Switches the selected reference sprites between proxy and full resolution"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    use_proxy: bpy.props.BoolProperty(name='Use proxy', default=True)
+
+    def execute(self, context):
+        props = context.scene.reliveBatch
+        existing_images = get_tagged_ids(bpy.data.images)
+
+        for empty in context.selected_objects:
+            if ref_sprite_path_key not in empty or ref_settings_key not in empty:
+                continue
+
+            img, proxies_changed = load_reference_sequence(existing_images, empty[ref_sprite_path_key], get_reference_anim(empty), props, self.use_proxy)
+            empty.data = img
+            if ref_pending_key in empty:
+                del empty[ref_pending_key]
+                pending_references.discard(empty.name)
+
+        return {"FINISHED"}
+
+class ReliveRemoveUnusedReferencesOperator(bpy.types.Operator):
+    
+    bl_idname = 'opr.remove_unused_references_operator'
+    bl_label = 'RELIVE: Remove unused references'
+    bl_description = "Removes imported reference images that are no longer used by any reference empty,\nand reference empties that are no longer in any collection"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        removed_empties = 0
+        removed_images = 0
+
+        # empties that were deleted from the scene, but still exist in the file
+        for empty in list(get_tagged_ids(bpy.data.objects).values()):
+            if len(empty.users_collection) == 0:
+                bpy.data.objects.remove(empty)
+                removed_empties += 1
+
+        # images without users
+        for img in list(get_tagged_ids(bpy.data.images).values()):
+            if img.users == 0:
+                bpy.data.images.remove(img)
+                removed_images += 1
+
+        self.report({"INFO"}, "Removed {} reference images and {} empties".format(removed_images, removed_empties))
+        return {"FINISHED"}
+
+class ReliveBatchRenderOperator(bpy.types.Operator):
+    
+    bl_idname = 'opr.batch_renderer_operator'
+    bl_label = 'RELIVE: Start batch render'
+    bl_description = "Starts a batch render"
+    
+    full_anim_count = 0
+
+    anims_to_render = []
+
+    missing_actions = []
+
+    _timer = None
+    _timer_interval = 0.1
+    
+    rendering_animation = False
+
+    render_multiple_models = False
+
+    # background processes (when rendering with more than one worker)
+    workers = []
+    worker_progress_files = []
+    worker_jobs = []
+    worker_finished_counts = []
+    # jobs whose post-processing failed in a worker (reported when the batch is done)
+    failed_job_count = 0
+    # jobs finished by workers that were restarted
+    restarted_job_count = 0
+    # trace files of all workers (including restarted ones)
+    worker_trace_files = []
+    # when the current job of the single process render was started (for the trace)
+    job_render_started = 0
+    
+    def pre(self, *args, **kwargs):
+        self.rendering_animation = True
+        bpy.context.scene.reliveBatch.batch_render_status = msg_rendering.format(str(self.full_anim_count - len(self.anims_to_render)), str(self.full_anim_count))
+
+    # (not profiled on its own: render_complete runs inside the render started by modal, which is profiled already)
+    def post(self, *args, **kwargs):
+        if rendering_direct_frames:
+            # render_complete of one still of a job, the job is finished once render_job_frames returns
+            return
+        render_anim = self.anims_to_render.pop(0)
+        if active_trace is not None:
+            active_trace.add('render', self.job_render_started, time.time(), anim=render_anim.meta.name, model=render_anim.model, frames=render_anim.frame_end - render_anim.frame_start + 1)
+        finish_anim_render(bpy.context.scene, bpy.context.scene.reliveBatch, render_anim)
+
+        self.rendering_animation = False
+    
+    @profiled('batch_render')
+    def execute(self, context):
+        props = context.scene.reliveBatch
+
+        props.is_batch_rendering = True
+        props.batch_render_status = msg_preparing_render
+
+        # reset stuff just in case
+        self.full_anim_count = 0
+        self.anims_to_render = []
+        self.missing_actions = []
+
+        # save old duration
+        self.previous_frame_start = context.scene.frame_start
+        self.previous_frame_end = context.scene.frame_end
+
+        # save old resolution
+        self.previous_resolution_x = context.scene.render.resolution_x
+        self.previous_resolution_y = context.scene.render.resolution_y
+        self.previous_resolution_percentage = context.scene.render.resolution_percentage
+        
+        # save old camera settings
+        self.previous_camera_scale = bpy.data.objects[props.camera_name].data.ortho_scale
+        self.previous_camera_y_pos = bpy.data.objects[props.camera_name].data.shift_y
+
+        # save old render path
+        self.previous_render_path = context.scene.render.filepath
+
+        # save old samples
+        self.previous_samples = get_render_samples(context.scene)
+        if context.scene.render.engine == 'CYCLES':
+            self.previous_adaptive_sampling = (context.scene.cycles.use_adaptive_sampling, context.scene.cycles.adaptive_threshold)
+
+        # save old render display setting
+        self.previous_render_display_type = context.preferences.view.render_display_type
+
+        # save old render threads
+        self.previous_threads = (context.scene.render.threads_mode, context.scene.render.threads)
+
+        # save old action
+        self.previous_action = context.scene.objects[props.rig_name].animation_data.action
+        
+        # Set current pass (and make sure it starts with '_')
+        props.current_pass = get_current_pass(props)
+
+        # Set BG to transparent if pass is not emissive
+        self.previous_bg_transparent = context.scene.render.film_transparent
+        context.scene.render.film_transparent = not props.current_pass.endswith(emissive_pass_name)
+
+        # get list of models to render
+        models = get_models(context.scene)
+
+        # cancel if zero models
+        if len(models) < 1:
+            self.report({"WARNING"}, "No models/view layers selected!")
+            self.finished("SELECT A MODEL!")
+            return {"CANCELLED"}
+        
+        # cancel if render path is wrong
+        if props.use_relative_render_path:
+            if ":" in props.render_path:
+                self.report({"ERROR"}, error_relative_path_with_drive_letter)
+                self.finished(error_relative_path_with_drive_letter)
+                return {"CANCELLED"}
+        else:
+            if ":" not in props.render_path:
+                self.report({"ERROR"}, error_absolute_path_without_drive_letter)
+                self.finished(error_absolute_path_without_drive_letter)
+                return {"CANCELLED"}
+
+        # cancel if sample curve is wrong
+        if props.use_adaptive_samples:
+            try:
+                parse_sample_curve(props.sample_curve)
+            except ValueError:
+                self.report({"ERROR"}, "Sample curve should look like '400:8, 10000:32'")
+                self.finished("CHECK SAMPLE CURVE")
+                return {"CANCELLED"}
+
+        start_trace(props, 0, 'batch')
+        self.worker_trace_files = []
+
+        try:
+            # Get animation list using sprite folder
+            with trace_span('scan'):
+                animations = get_anims(props.ref_sprite_path, props.animation_filter, props.infer_missing_meta)
+        except EnvironmentError: # parent of IOError, OSError *and* WindowsError where available
+            self.report({"ERROR"}, error_path)
+            self.finished(error_path)
+            return {"CANCELLED"}
+        
+        if props.current_pass.endswith(emissive_pass_name):
+            try:
+                self.previous_lights_should_be_hidden = hide_lights(context.scene, props, models)
+            except:
+                self.report({"ERROR"}, "Could not find lights collection to hide.")
+                self.finished("Check Misc./Lights")
+                return {"CANCELLED"}
+
+        
+        # Set custom resolution %
+        context.scene.render.resolution_percentage = props.resolution_percent
+
+        with trace_span('plan'):
+            self.anims_to_render = plan_anims_to_render(animations, models, props, self.missing_actions, len(models) > 1)
+        self.full_anim_count = len(self.anims_to_render)
+
+        error = get_frame_format_error(context.scene, props)
+        if error is not None:
+            self.report({"ERROR"}, error)
+            self.finished("CHECK OUTPUT SETTINGS")
+            return {"CANCELLED"}
+
+        bake_pose_caches(context.scene, props, self.anims_to_render)
+        start_batch_output(props, self.anims_to_render)
+
+        worker_count, threads_per_worker = get_worker_settings(props)
+        if worker_count > 1:
+            return self.start_workers(context)
+
+        # a single worker renders in this process, with the chosen (or calibrated) threads
+        if threads_per_worker > 0:
+            context.scene.render.threads_mode = 'FIXED'
+            context.scene.render.threads = threads_per_worker
+
+        error = start_frame_output(context.scene, props)
+        if error is not None:
+            self.report({"ERROR"}, error)
+            self.finished("CHECK OUTPUT SETTINGS")
+            return {"CANCELLED"}
+
+        # set render display setting to avoid window popups for each render
+        context.preferences.view.render_display_type = 'NONE'
+
+        bpy.app.handlers.render_pre.append(self.pre)
+        bpy.app.handlers.render_complete.append(self.post)
+
+        # The timer gets created and the modal handler
+        # is added to the window manager
+        self._timer = context.window_manager.event_timer_add(self._timer_interval, window=context.window)
+        context.window_manager.modal_handler_add(self)
+
+        return {"RUNNING_MODAL"}
+
+    def start_workers(self, context):
+        props = context.scene.reliveBatch
+
+        if bpy.data.filepath == "" or bpy.data.is_dirty:
+            self.report({"ERROR"}, "Save the file before rendering with workers")
+            self.finished("SAVE THE FILE!")
+            return {"CANCELLED"}
+
+        job_folder = tempfile.mkdtemp(prefix='relive_jobs_')
+        worker_count, self.threads_per_worker = get_worker_settings(props)
+        self.workers, self.worker_progress_files, self.worker_jobs = launch_workers(self.anims_to_render, worker_count, self.threads_per_worker, job_folder, props.write_trace, 0, get_profile_args(props))
+        if props.write_trace:
+            self.worker_trace_files = [os.path.join(job_folder, 'worker_{}.trace'.format(i)) for i in range(len(self.workers))]
+        self.worker_finished_counts = [0] * len(self.workers)
+        self.failed_job_count = 0
+        self.restarted_job_count = 0
+
+        print("Started {} workers ({})".format(len(self.workers), job_folder))
+
+        self._timer = context.window_manager.event_timer_add(self._timer_interval, window=context.window)
+        context.window_manager.modal_handler_add(self)
+
+        return {"RUNNING_MODAL"}
+
+    def get_finished_job_count(self, props):
+        for i, progress_file in enumerate(self.worker_progress_files):
+            if os.path.exists(progress_file):
+                finished = read_job_progress(progress_file)
+
+                # convert and pack folders whose last job was just finished by this worker
+                for job_index, failed_stage in finished[self.worker_finished_counts[i]:]:
+                    render_anim = self.worker_jobs[i][job_index]
+                    if failed_stage is not None:
+                        # counted as done, but its folder is left as it is
+                        print("Worker {} failed to post-process {} ({}) in {}".format(i, render_anim.meta.name, render_anim.model, failed_stage))
+                        self.failed_job_count += 1
+                        continue
+                    finish_output_job(props, render_anim)
+                self.worker_finished_counts[i] = len(finished)
+
+        return sum(self.worker_finished_counts) + self.restarted_job_count
+
+    def restart_worker(self, props, i):
+        # Replaces a worker that stopped because of its memory use with a new one for its remaining jobs
+        self.get_finished_job_count(props)
+        remaining_jobs = self.worker_jobs[i][self.worker_finished_counts[i]:]
+        self.restarted_job_count += self.worker_finished_counts[i]
+
+        job_folder = tempfile.mkdtemp(prefix='relive_jobs_')
+        workers, progress_files, worker_jobs = launch_workers(remaining_jobs, 1, self.threads_per_worker, job_folder, props.write_trace, i, get_profile_args(props))
+        if props.write_trace:
+            self.worker_trace_files.append(os.path.join(job_folder, 'worker_0.trace'))
+        self.workers[i] = workers[0]
+        self.worker_progress_files[i] = progress_files[0]
+        self.worker_jobs[i] = worker_jobs[0]
+        self.worker_finished_counts[i] = 0
+        print("Restarted worker {} with {} jobs left".format(i, len(remaining_jobs)))
+
+    def modal_workers(self, context):
+        props = context.scene.reliveBatch
+
+        if props.render_cancelled:
+            for worker in self.workers:
+                worker.terminate()
+        else:
+            for i, worker in enumerate(self.workers):
+                if worker.poll() == worker_recycle_exit_code:
+                    self.restart_worker(props, i)
+
+        running = sum(1 for worker in self.workers if worker.poll() is None)
+        # (progress is read after polling, so the last jobs of finished workers are not missed)
+        props.batch_render_status = msg_rendering.format(self.get_finished_job_count(props), self.full_anim_count) + " ({} workers)".format(running)
+
+        if running == 0:
+            context.window_manager.event_timer_remove(self._timer)
+            failed = sum(1 for worker in self.workers if worker.returncode != 0)
+            self.workers = []
+
+            if props.render_cancelled:
+                self.finished(msg_cancelled)
+                return {"CANCELLED"}
+
+            if failed > 0:
+                self.finished("{} WORKERS FAILED".format(failed))
+            elif self.failed_job_count > 0:
+                self.finished("{} JOBS FAILED".format(self.failed_job_count))
+            else:
+                self.finished(msg_done)
+            return {"FINISHED"}
+
+        return {"PASS_THROUGH"}
+
+    @profiled('batch_render')
+    def modal(self, context, event):
+        if event.type == 'TIMER' and self.workers:
+            return self.modal_workers(context)
+
+        if event.type == 'TIMER': # This event is signaled every _timer_interval seconds
+                                  # and will start the render if available
+
+            # If cancelled or no more frames to render, finish.
+            if True in (not self.anims_to_render, context.scene.reliveBatch.render_cancelled is True):
+
+                # We remove the handlers and the modal timer to clean everything
+                bpy.app.handlers.render_pre.remove(self.pre)
+                bpy.app.handlers.render_complete.remove(self.post)
+                #bpy.app.handlers.render_cancel.remove(self.cancelled)
+                context.window_manager.event_timer_remove(self._timer)
+                self.finished(msg_cancelled if context.scene.reliveBatch.render_cancelled else msg_done)
+                return {"CANCELLED" if context.scene.reliveBatch.render_cancelled else "FINISHED"}
+
+            elif self.rendering_animation is False: # Nothing is currently rendering.
+                                          # Proceed to render.
+                sc = context.scene
+                props = sc.reliveBatch
+                
+                # retrieve frame data
+                render_anim = self.anims_to_render[0]
+
+                props.current_model = render_anim.model
+                props.current_anim = render_anim.meta.name
+                
+                with trace_span('setup', anim=render_anim.meta.name, model=render_anim.model):
+                    setup_anim_render(sc, props, render_anim)
+                self.job_render_started = time.time()
+
+                # Render frame
+                if direct_output is not None:
+                    # still renders, render_complete comes after each of them
+                    render_job_frames(sc, render_anim)
+                    self.post()
+                else:
+                    bpy.ops.render.render(animation=True, write_still=False, layer=render_anim.model)
+
+        return {"PASS_THROUGH"}
+
+    def finished(self, status):
+        scene = bpy.context.scene
+        props = scene.reliveBatch
+
+        # RESET FRAME VARIABLES
+        self.anims_to_render = []
+        self.full_anim_count = 0
+
+        self.missing_actions = []
+        
+        # RESET FILEPATH
+        scene.render.filepath = self.previous_render_path
+
+        # UNMUTE RIG (if a render with the pose cache was interrupted)
+        stop_pose_cache(scene)
+
+        # WRITE REMAINING FRAMES, FINISH THE POST-RENDER PIPELINE AND RESTORE THE FILE FORMAT
+        stop_frame_output(scene)
+
+        # FINISH PALETTE AND ARCHIVE
+        finish_batch_output(props)
+
+        # WRITE TRACE (merged with the traces of the workers)
+        finish_trace(props, worker_trace_files=self.worker_trace_files)
+        
+        # RESET ANIMATION
+        scene.objects[props.rig_name].animation_data.action = bpy.data.actions[self.previous_action.name]
+        
+        # RESET SAMPLES
+        set_render_samples(scene, self.previous_samples)
+        if scene.render.engine == 'CYCLES':
+            scene.cycles.use_adaptive_sampling, scene.cycles.adaptive_threshold = self.previous_adaptive_sampling
+
+        # RESET DURATION
+        scene.frame_start = self.previous_frame_start
+        scene.frame_end = self.previous_frame_end
+
+        # RESET RESOLUTION
+        scene.render.resolution_x = self.previous_resolution_x
+        scene.render.resolution_y = self.previous_resolution_y
+        scene.render.resolution_percentage = self.previous_resolution_percentage
+        
+        # RESET CAMERA
+        bpy.data.objects[props.camera_name].data.ortho_scale = self.previous_camera_scale
+        bpy.data.objects[props.camera_name].data.shift_y     = self.previous_camera_y_pos
+
+        # RESET RENDER DISPLAY SETTING
+        bpy.context.preferences.view.render_display_type = self.previous_render_display_type
+
+        # RESET RENDER THREADS
+        scene.render.threads_mode, scene.render.threads = self.previous_threads
+
+        # RESET BG TRANSPARENCY SETTING
+        scene.render.film_transparent = self.previous_bg_transparent
+
+        # RESET LIGHTS COLLECTION RENDERABILITY
+        if props.current_pass.endswith(emissive_pass_name):
+            try:
+                # go through all view layers
+                for model in get_models(scene):
+                    print("Resetting light collection for {} to {}".format(model, self.previous_lights_should_be_hidden[model]))
+                    # reset lights
+                    scene.view_layers[model].layer_collection.children[props.lights_collection].collection.hide_render = self.previous_lights_should_be_hidden[model]
+            except:
+                print("failed to reset light collection renderability")
+        
+        props.current_model = ""
+        props.current_anim = ""
+        
+        props.is_batch_rendering = False
+        props.render_cancelled = False
+        props.batch_render_status = status
+
+        self.rendering_animation = False
+
+class ReliveWatchOperator(bpy.types.Operator):
+    
+    bl_idname = 'opr.batch_watch_operator'
+    bl_label = 'RELIVE: Toggle watch mode'
+    bl_description = "Watches the actions (when the file is saved) and the meta.json files of all animations that match the filter.\nChanged animations are re-rendered for the selected view layers in a background blender process"
+
+    def execute(self, context):
+        global sprite_watcher
+        props = context.scene.reliveBatch
+
+        if sprite_watcher is not None:
+            stop_watching()
+            props.watch_status = ""
+            return {"FINISHED"}
+
+        if bpy.data.filepath == "":
+            self.report({"ERROR"}, "Save the file before starting watch mode")
+            return {"CANCELLED"}
+
+        try:
+            sprite_watcher = SpriteWatcher(context.scene)
+        except EnvironmentError: # parent of IOError, OSError *and* WindowsError where available
+            self.report({"ERROR"}, error_path)
+            return {"CANCELLED"}
+
+        props.watch_status = "WATCHING"
+        bpy.app.timers.register(watch_tick, first_interval=SpriteWatcher.poll_interval)
+        return {"FINISHED"}
+
+class ReliveVerifyOutputOperator(bpy.types.Operator):
+
+    bl_idname = 'opr.batch_verify_operator'
+    bl_label = 'RELIVE: Verify rendered frames'
+    bl_description = "Checks every frame a batch render would write (existence, size and pixel data, only file headers are read).\nBroken frames are written to " + rerender_file_name + " in the output path, which can be rendered with --jobs"
+
+    def execute(self, context):
+        props = context.scene.reliveBatch
+        models = get_models(context.scene)
+
+        try:
+            problems, jobs_to_render, job_file = verify_render_output(context.scene, props, models)
+        except EnvironmentError:
+            self.report({"ERROR"}, error_path)
+            return {"CANCELLED"}
+
+        broken_count = sum(len(files) for files in problems.values())
+        if broken_count == 0:
+            props.batch_render_status = "ALL FRAMES OK"
+            self.report({"INFO"}, "All frames are OK")
+        else:
+            props.batch_render_status = "{} BROKEN FRAMES".format(broken_count)
+            self.report({"WARNING"}, "{} broken frames ({}), {} jobs written to {}".format(broken_count, ", ".join("{} {}".format(len(files), problem) for problem, files in problems.items()), len(jobs_to_render), job_file))
+
+        return {"FINISHED"}
+
+class ReliveCalibrateWorkersOperator(bpy.types.Operator):
+
+    bl_idname = 'opr.batch_calibrate_operator'
+    bl_label = 'RELIVE: Calibrate workers'
+    bl_description = "Renders a few frames of some animations with different numbers of workers and threads (in the background)\nand remembers the fastest configuration for this file.\nThe file has to be saved first"
+
+    def execute(self, context):
+        global calibration_process
+
+        if bpy.data.filepath == "" or bpy.data.is_dirty:
+            self.report({"ERROR"}, "Save the file before calibrating")
+            return {"CANCELLED"}
+
+        if calibration_process is not None:
+            self.report({"WARNING"}, "Calibration is already running")
+            return {"CANCELLED"}
+
+        calibration_process = subprocess.Popen(get_worker_command(['--calibrate']))
+        bpy.app.timers.register(calibration_tick, first_interval=1.0)
+        return {"FINISHED"}
+
+class ReliveBatchCancelOperator(bpy.types.Operator):
+    
+    bl_idname = 'opr.batch_cancel_operator'
+    bl_label = 'RELIVE: Cancel batch render'
+    bl_description = "Cancels the current batch render"
+
+    def execute(self, context):
+        print("Cancelling...")
+        context.scene.reliveBatch.batch_render_status = msg_cancelling
+        context.scene.reliveBatch.render_cancelled = True
+        return {"FINISHED"}
+
+class ReliveSetModelsOperator(bpy.types.Operator):
+    
+    bl_idname = 'opr.set_batch_view_layers'
+    bl_label = 'RELIVE: Apply view layer preset'
+    bl_description = "Changes which view layers will be used for the next batch render"
+
+    preset: bpy.props.EnumProperty(
+        items=[
+            ('mud_all_models', 'mud_all_models', ''),
+            ('mud_game', 'mud_game', ''),
+            ('mud_fmv', 'mud_fmv', ''),
+            ('mud_abe_game', 'mud_abe_game', ''),
+            ('mud_abe_fmv', 'mud_abe_fmv', ''),
+
+            ('slig_all_models', 'slig_all_models', ''),
+
+            ('gluk_all_models', 'gluk_all_models', ''),
+            ('gluk_rf_exec_fmv_green', 'gluk_rf_exec_fmv_green', ''),
+            ('gluk_rf_exec_fmv_all', 'gluk_rf_exec_fmv_all', ''),
+            ('gluk_jr_exec_game', 'gluk_jr_exec_game', ''),
+            ('gluk_aslik_fmv', 'gluk_aslik_fmv', ''),
+            ('gluk_dripik_fmv', 'gluk_dripik_fmv', ''),
+            ('gluk_menu_dripik', 'gluk_menu_dripik', ''),
+        ]
+    )
+
+    def execute(self, context):
+        layers = context.scene.view_layers
+
+        if self.preset == 'mud_all_models':
+            preset = mud_all_models
+        elif self.preset == 'mud_game':
+            preset = mud_game
+        elif self.preset == 'mud_fmv':
+            preset = mud_fmv
+        elif self.preset == 'mud_abe_game':
+            preset = mud_abe_game
+        elif self.preset == 'mud_abe_fmv':
+            preset = mud_abe_fmv
+        elif self.preset == 'slig_all_models':
+            preset = slig_all_models
+        elif self.preset == 'gluk_all_models':
+            preset = gluk_all_models
+        elif self.preset == 'gluk_rf_exec_fmv_green':
+            preset = gluk_rf_exec_fmv_green
+        elif self.preset == 'gluk_rf_exec_fmv_all':
+            preset = gluk_rf_exec_fmv_all
+        elif self.preset == 'gluk_jr_exec_game':
+            preset = gluk_jr_exec_game
+        elif self.preset == 'gluk_aslik_fmv':
+            preset = gluk_aslik_fmv
+        elif self.preset == 'gluk_dripik_fmv':
+            preset = gluk_dripik_fmv
+        elif self.preset == 'gluk_menu_dripik':
+            preset = gluk_menu_dripik
+        else:
+            preset = []
+
+        set_enabled_view_layer_names(context.scene, [layer.name for layer in layers if layer.name in preset])
+
+        return {"FINISHED"}
+
+class ReliveToggleViewLayerOperator(bpy.types.Operator):
+
+    bl_idname = 'opr.toggle_batch_view_layer'
+    bl_label = 'RELIVE: Toggle view layer'
+    bl_description = "Include this model (ViewLayer) when rendering"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    layer_name: bpy.props.StringProperty()
+
+    def execute(self, context):
+        enabled = set(get_enabled_view_layer_names(context.scene))
+        enabled ^= {self.layer_name}
+        set_enabled_view_layer_names(context.scene, [layer.name for layer in context.scene.view_layers if layer.name in enabled])
+        return {"FINISHED"}
+
+class ReliveSetupCameraOperator(bpy.types.Operator):
+    
+    bl_idname = 'opr.setup_cam_operator'
+    bl_label = 'RELIVE: Setup camera'
+    bl_description = "Positions the camera at (-5,0,0) and makes it point in the direction of +X.\nAlso sets it to orthographic and makes its scale and offset match the given sprite info\n(Uses the camera referenced in the Scene panel above)"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        props = context.scene.reliveBatch
+
+        # position
+        bpy.data.objects[props.camera_name].location[0] = -5
+        bpy.data.objects[props.camera_name].location[1] = 0
+        bpy.data.objects[props.camera_name].location[2] = 0
+
+        # rotation
+        bpy.context.object.rotation_euler[0] = 1.5708
+        bpy.context.object.rotation_euler[1] = 0
+        bpy.context.object.rotation_euler[2] = -1.5708
+
+        # orthographic
+        bpy.data.objects[props.camera_name].data.type = 'ORTHO'
+
+        # scale and offset
+        camera_settings = calculate_cam_params(props.ref_width, props.ref_height, props.ref_offset_x, props.ref_offset_y)
+        bpy.data.objects[props.camera_name].data.ortho_scale = camera_settings.size
+        bpy.data.objects[props.camera_name].data.shift_x     = camera_settings.offset_x
+        bpy.data.objects[props.camera_name].data.shift_y     = camera_settings.offset_y
+        
+        return {"FINISHED"}
+
+class ReliveFlipVertexGroupsOperator(bpy.types.Operator):
+    
+    bl_idname = 'opr.flip_vert_groups_operator'
+    bl_label = 'RELIVE: Flip vertex groups'
+    bl_description = "Flips the active model's vertex group names.\n(L at the end becomes R and vice versa)\nShould work fine as long as none of them are ALL CAPS or have a '\\' at the end"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        temp_str = "\\"
+
+        try:
+            for v_g in bpy.context.active_object.vertex_groups:
+                if v_g.name.endswith('L'):
+                    v_g.name = v_g.name + temp_str
+                elif v_g.name.endswith('R'):
+                    v_g.name = v_g.name + temp_str
+                else:
+                    continue
+
+            for v_g in bpy.context.active_object.vertex_groups:
+                if v_g.name.endswith('L' + temp_str):
+                    v_g.name = v_g.name.split('L' + temp_str)[0] + 'R'
+                elif v_g.name.endswith('R' + temp_str):
+                    v_g.name = v_g.name.split('R' + temp_str)[0] + 'L'
+                else:
+                    continue
+        except:
+            print("Something went wrong when trying to rename vertex groups")
+        
+        return {"FINISHED"}
+
+# == PANELS
+
+class ReliveBatchRendererPanel:
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "RELIVE"
+
+class ReliveBatchRendererMainPanel(ReliveBatchRendererPanel, bpy.types.Panel):
+    bl_idname = "VIEW3D_PT_batch_renderer"
+    bl_label = "Batch Renderer for RELIVE"
+
+    def draw(self, context):
+        props = context.scene.reliveBatch
+
+        col = self.layout.column()
+
+        version = bl_info['version']
+        version_string = str.format("{}.{}.{}", version[0],version[1],version[2])
+
+        col.row().label(text='Version ' + version_string + ' by HTML_Earth')
+
+        col.row().separator()
+
+        # Properties
+        box = col.box()
+        box.row().label(text='Extracted sprites folder:')
+        box.row().prop(props, "ref_sprite_path", text='')
+        box.row().prop(props, "use_relative_ref_sprite_path", text="Use relative path")
+        box.row().prop(props, "infer_missing_meta", text="Infer missing meta.json")
+
+class ReliveBatchRendererReferencesPanel(ReliveBatchRendererPanel, bpy.types.Panel):
+    bl_idname = "VIEW3D_PT_batch_renderer_references"
+    bl_parent_id = "VIEW3D_PT_batch_renderer"
+    bl_label = "Import"
+
+    def draw(self, context):
+        props = context.scene.reliveBatch
+        col = self.layout.column()
+
+        col.row().label(text='Animation name filter:')
+        col.row().prop(props, "ref_sprite_filter", text='')
+
+        col.row().prop(props, "use_lazy_import", text="Lazy import (load when visible)")
+
+        proxy_row = col.row()
+        proxy_row.prop(props, "use_reference_proxies", text="Use proxies")
+        proxy_size = proxy_row.row()
+        proxy_size.enabled = props.use_reference_proxies
+        proxy_size.prop(props, "proxy_percent", text='')
+
+        col.row().operator('opr.import_reference_sprites_operator', text='IMPORT SPRITES')
+
+        toggle_row = col.row()
+        toggle_row.label(text='Selected:')
+        toggle_row.operator('opr.toggle_reference_proxies_operator', text='Proxy').use_proxy = True
+        toggle_row.operator('opr.toggle_reference_proxies_operator', text='Full').use_proxy = False
+        col.row().operator('opr.remove_unused_references_operator', text='Remove unused references')
+
+class ReliveBatchRendererRenderPanel(ReliveBatchRendererPanel, bpy.types.Panel):
+    bl_idname = "VIEW3D_PT_batch_renderer_render"
+    bl_parent_id = "VIEW3D_PT_batch_renderer"
+    bl_label = "Render"
+
+    def draw(self, context):
+        props = context.scene.reliveBatch
+
+        col = self.layout.column()
+        
+        col.row().label(text='Animation name filter:')
+        col.row().prop(props, "animation_filter", text='')
+
+        col.label(text="Output path:")
+        col.row().prop(props, "render_path", text='')
+        col.row().prop(props, "use_relative_render_path", text="Use relative path")
+
+
+        # Infobox
+        infobox = col.box()
+        infobox.enabled = False
+        
+        # Render/Cancel button
+        button_row = col.row()
+
+        if props.is_batch_rendering:
+            # Status
+            infobox.label(text=props.batch_render_status)
+            infobox.label(text="Model: " + props.current_model)
+            infobox.label(text="Anim: " + props.current_anim)
+
+            button_row.operator('opr.batch_cancel_operator', text='CANCEL BATCH')
+            if props.render_cancelled:
+                button_row.enabled = False
+
+        else:
+            vl_count = get_enabled_view_layer_count(context)
+
+            # Status
+            status_text = "READY" if vl_count > 0 else "NO VIEWLAYER"
+            infobox.label(text=status_text)
+
+            button_row.enabled = vl_count > 0
+            button_row.operator('opr.batch_renderer_operator', text='BATCH RENDER')
+            button_row.operator('opr.batch_verify_operator', text='VERIFY')
+
+        # Watch mode
+        watch_box = col.box()
+        watch_row = watch_box.row()
+        is_watching = sprite_watcher is not None
+        watch_row.operator('opr.batch_watch_operator', text='STOP WATCHING' if is_watching else 'WATCH (re-render on save)', depress=is_watching)
+        watch_row.prop(props, "watch_debounce", text='')
+        if is_watching:
+            watch_box.label(text=props.watch_status)
+
+class ReliveBatchRendererModelsPanel(ReliveBatchRendererPanel, bpy.types.Panel):
+    bl_idname = "VIEW3D_PT_batch_renderer_models"
+    bl_parent_id = "VIEW3D_PT_batch_renderer"
+    bl_label = "Render Settings"
+
+    def draw(self, context):
+        props = context.scene.reliveBatch
+        col = self.layout.column()
+
+        col.row().prop(props, "resolution_percent")
+        
+        col.row().label(text='Render pass name:')
+        col.row().prop(props, "pass_to_use", text='')
+
+        tuning = load_tuning() if props.use_tuned_workers else None
+        is_tuned = tuning is not None and tuning.get('best') is not None
+
+        worker_row = col.row()
+        worker_row.enabled = not is_tuned
+        worker_row.prop(props, "worker_count")
+        worker_row.prop(props, "threads_per_worker")
+
+        calibrate_row = col.row()
+        calibrate_row.prop(props, "use_tuned_workers")
+        calibrate_row.operator('opr.batch_calibrate_operator', text='CALIBRATING...' if calibration_process is not None else 'CALIBRATE')
+        if is_tuned:
+            col.label(text="Calibrated: {} workers x {} threads".format(tuning['best']['worker_count'], tuning['best']['threads_per_worker']))
+        col.row().prop(props, "calibration_memory_limit")
+        col.row().prop(props, "worker_recycle_growth")
+        col.row().prop(props, "max_frames_per_job")
+        col.row().prop(props, "detect_static_holds")
+        col.row().prop(props, "use_pose_cache")
+        col.row().prop(props, "frame_format")
+        col.row().prop(props, "use_direct_output")
+
+        col.row().prop(props, "use_post_render_pipeline")
+        if props.use_post_render_pipeline:
+            stage_row = col.row()
+            stage_row.prop(props, "optimise_frames")
+            stage_row.prop(props, "dedupe_frames")
+            stage_row.prop(props, "verify_frames")
+            pipeline_row = col.row()
+            pipeline_row.prop(props, "pipeline_threads")
+            pipeline_row.prop(props, "pipeline_queue_size")
+
+        col.row().prop(props, "use_adaptive_samples")
+        if props.use_adaptive_samples:
+            col.row().prop(props, "sample_curve", text='')
+            sample_row = col.row()
+            sample_row.prop(props, "emissive_sample_factor")
+            sample_row.prop(props, "adaptive_noise_threshold")
+
+        col.row().prop(props, "write_telemetry")
+        col.row().prop(props, "write_trace")
+
+        palette_row = col.row()
+        palette_row.prop(props, "palette_output", text='')
+        if props.palette_output != 'NONE':
+            palette_row.prop(props, "palette_scope", text='')
+            palette_row.prop(props, "palette_size")
+
+        archive_row = col.row()
+        archive_row.prop(props, "archive_output", text='')
+        if props.archive_output != 'NONE':
+            archive_row.prop(props, "archive_path", text='')
+        
+        # VIEW LAYERS
+        enabled_view_layer_count = get_enabled_view_layer_count(context)
+        vl_header = col.row()
+        vl_left = vl_header.column()
+        vl_right = vl_header.column()
+        vl_right.alignment = "RIGHT"
+
+        vl_left.label(text="View Layers:")
+        vl_right.label(text="({}/{})".format(enabled_view_layer_count, len(context.scene.view_layers)))
+        
+        # (only the count is drawn during a batch, so redraws don't go through every view layer)
+        if not props.is_batch_rendering:
+            enabled = get_enabled_view_layer_names(context.scene)
+            box = col.box()
+            split = box.split(factor=0.5)
+            col_1 = split.column()
+            col_2 = split.column()
+            for i, model in enumerate(context.scene.view_layers):
+                next = col_1 if i < len(context.scene.view_layers) / 2 else col_2
+                next.operator('opr.toggle_batch_view_layer', text=model.name, icon='CHECKBOX_HLT' if model.name in enabled else 'CHECKBOX_DEHLT', emboss=False).layer_name = model.name
+
+        # PRESETS
+        col.label(text="Presets: (not that useful atm)")
+        col.row().prop(props, "character_type", text='')
+
+        if props.character_type == 'mud':
+        #    col.row().operator('opr.set_batch_view_layers', text='All models').preset = 'mud_all_models'
+            
+        #    row1 = col.row()
+        #    row1.operator('opr.set_batch_view_layers', text='All (Game)').preset = 'mud_game'
+        #    row1.operator('opr.set_batch_view_layers', text='All (FMV)').preset = 'mud_fmv'
+
+            row2 = col.row()
+            row2.operator('opr.set_batch_view_layers', text='Abe (Game)').preset = 'mud_abe_game'
+            row2.operator('opr.set_batch_view_layers', text='Abe (FMV)').preset = 'mud_abe_fmv'
+
+        #elif props.character_type == 'slig':
+        #    col.row().operator('opr.set_batch_view_layers', text='All models').preset = 'slig_all_models'
+
+        #elif props.character_type == 'gluk':
+            #col.row().operator('opr.set_batch_view_layers', text='All models').preset = 'gluk_all_models'
+
+            #row1 = col.row()
+            #row1.operator('opr.set_batch_view_layers', text='Jr. Exec (All)').preset = 'gluk_rf_exec_fmv_all'
+            #row1.operator('opr.set_batch_view_layers', text='Jr. Exec (Game)').preset = 'gluk_jr_exec_game'
+
+            #row2 = col.row()
+            #row2.operator('opr.set_batch_view_layers', text='Aslik').preset = 'gluk_aslik_fmv'
+            #row2.operator('opr.set_batch_view_layers', text='Dripik').preset = 'gluk_dripik_fmv'
+
+class ReliveBatchRendererSettingsPanel(ReliveBatchRendererPanel, bpy.types.Panel):
+    bl_idname = "VIEW3D_PT_batch_renderer_settings"
+    bl_parent_id = "VIEW3D_PT_batch_renderer"
+    bl_label = "Scene"
+    bl_options = {"DEFAULT_CLOSED"}
+
+    def draw(self, context):
+        props = context.scene.reliveBatch
+        col = self.layout.column()
+        col.label(text="(Used by script to find objects)")
+        
+        layout = self.layout
+        split = layout.split(factor=0.3)
+        col_1 = split.column()
+        col_2 = split.column()
+
+        # Properties
+        col_1.label(text='Camera')
+        col_2.row().prop(props, "camera_name", text='')
+        col_1.label(text='Rig')
+        col_2.row().prop(props, "rig_name", text='')
+        col_1.label(text='Lights')
+        col_2.row().prop(props, "lights_collection", text='')
+
+class ReliveBatchRendererUtilitiesPanel(ReliveBatchRendererPanel, bpy.types.Panel):
+    bl_idname = "VIEW3D_PT_batch_renderer_utilities"
+    bl_parent_id = "VIEW3D_PT_batch_renderer"
+    bl_label = "Utilities"
+    bl_options = {"DEFAULT_CLOSED"}
+
+    def draw(self, context):
+        props = context.scene.reliveBatch
+        col = self.layout.column()
+        
+
+        box_setup = col.box()
+        box_setup.row().label(text='For setting up new files:')
+        box_setup.row().operator('opr.setup_cam_operator', text='Setup camera')
+
+        split = box_setup.split(factor=0.3)
+        col_1 = split.column()
+        col_2 = split.column()
+
+        col_1.label(text='Width')
+        col_2.row().prop(props, "ref_width", text='')
+        col_1.label(text='Height')
+        col_2.row().prop(props, "ref_height", text='')
+
+        col_1.label(text='Offset X')
+        col_2.row().prop(props, "ref_offset_x", text='')
+        col_1.label(text='Offset Y')
+        col_2.row().prop(props, "ref_offset_y", text='')
+
+
+        box_flip = col.box()
+        box_flip.row().label(text='For making flipped models:')
+        box_flip.row().operator('opr.flip_vert_groups_operator', text='Flip vertex groups')
+
+        box_profile = col.box()
+        box_profile.row().label(text='For finding slow imports and renders:')
+        box_profile.row().prop(props, "use_profiling")
+        row = box_profile.row()
+        row.enabled = props.use_profiling
+        row.prop(props, "use_line_sampling")
+        row.prop(props, "profile_top_count", text='Top')
+
+# == MAIN ROUTINE
+
+CLASSES = [
+    ReliveViewLayerName,
+    ReliveBatchProperties,
+    
+    ReliveImportReferencesOperator,
+    ReliveToggleReferenceProxiesOperator,
+    ReliveRemoveUnusedReferencesOperator,
+    ReliveBatchRenderOperator,
+    ReliveBatchCancelOperator,
+    ReliveVerifyOutputOperator,
+    ReliveCalibrateWorkersOperator,
+    ReliveWatchOperator,
+    ReliveSetModelsOperator,
+    ReliveToggleViewLayerOperator,
+    ReliveSetupCameraOperator,
+    ReliveFlipVertexGroupsOperator,
+
+    ReliveBatchRendererMainPanel,
+    ReliveBatchRendererReferencesPanel,
+    ReliveBatchRendererRenderPanel,
+    ReliveBatchRendererModelsPanel,
+    ReliveBatchRendererSettingsPanel,
+    ReliveBatchRendererUtilitiesPanel
+]
+
+def register():
+    for c in CLASSES:
+        bpy.utils.register_class(c)
+
+    setattr(bpy.types.Scene, "reliveBatch", bpy.props.PointerProperty(type=ReliveBatchProperties))
+
+    bpy.app.handlers.depsgraph_update_post.append(reference_visibility_changed)
+    bpy.app.handlers.load_post.append(collect_pending_references)
+    bpy.app.handlers.load_post.append(migrate_view_layer_selection)
+    bpy.app.handlers.depsgraph_update_post.append(view_layers_changed)
+    bpy.app.handlers.undo_post.append(clear_view_layer_cache)
+    bpy.app.handlers.redo_post.append(clear_view_layer_cache)
+    bpy.app.handlers.save_post.append(watch_saved)
+    bpy.app.handlers.load_pre.append(stop_watching)
+
+def unregister():
+    bpy.app.handlers.depsgraph_update_post.remove(reference_visibility_changed)
+    bpy.app.handlers.load_post.remove(collect_pending_references)
+    bpy.app.handlers.load_post.remove(migrate_view_layer_selection)
+    bpy.app.handlers.depsgraph_update_post.remove(view_layers_changed)
+    bpy.app.handlers.undo_post.remove(clear_view_layer_cache)
+    bpy.app.handlers.redo_post.remove(clear_view_layer_cache)
+    bpy.app.handlers.save_post.remove(watch_saved)
+    bpy.app.handlers.load_pre.remove(stop_watching)
+    stop_watching()
+
+    for c in CLASSES:
+        bpy.utils.unregister_class(c)
+
+    delattr(bpy.types.Scene, "reliveBatch")
+
+# == COMMAND LINE
+# blender -b file.blend --python relive_render_addon/__init__.py -- --render [--anims NAME ...] [--layers VIEW_LAYER ...]
+# blender -b file.blend --python relive_render_addon/__init__.py -- --jobs JOB_FILE [--progress PROGRESS_FILE]
+# blender -b file.blend --python relive_render_addon/__init__.py -- --verify [--layers VIEW_LAYER ...]
+# blender -b file.blend --python relive_render_addon/__init__.py -- --calibrate
+# any of these can add --profile [--profile-lines] [--profile-top N]
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog='relive_render_addon', description='Batch renders RELIVE sprites using the settings saved in the blend file')
+    parser.add_argument('--render', action='store_true', help='render all animations that match the filter')
+    parser.add_argument('--anims', nargs='*', default=[], help='only render these animations')
+    parser.add_argument('--layers', nargs='*', default=[], help='only render these view layers (default: the enabled ones)')
+    parser.add_argument('--verify', action='store_true', help='check the rendered frames and write the broken ones to ' + rerender_file_name + ' in the render path')
+    parser.add_argument('--jobs', help='render the jobs in this file (written by the batch renderer)')
+    parser.add_argument('--stats', help='write timing and peak memory of this worker to this file when done')
+    parser.add_argument('--trace', help='write a trace of this worker to this file')
+    parser.add_argument('--worker-index', type=int, default=0, help='track of this worker in the trace')
+    parser.add_argument('--calibrate', action='store_true', help='find the fastest number of workers and threads for this file')
+    parser.add_argument('--progress', help='append the index of each finished job to this file')
+    parser.add_argument('--threads', type=int, default=0, help='number of render threads (default: automatic)')
+    parser.add_argument('--profile', action='store_true', help='profile the command and write <blend name>.<command>.prof and .profile.txt next to the blend file')
+    parser.add_argument('--profile-lines', action='store_true', help='also sample the running python line')
+    parser.add_argument('--profile-top', type=int, default=40, help='number of functions listed in the .profile.txt')
+    args = parser.parse_args(argv)
+
+    if args.threads > 0:
+        bpy.context.scene.render.threads_mode = 'FIXED'
+        bpy.context.scene.render.threads = args.threads
+
+    if not args.profile:
+        run_command(args)
+        return
+
+    # workers exit with sys.exit when they are recycled, their profile is written anyway
+    profiler = OperatorProfiler(args.profile_lines)
+    try:
+        with profiler.run():
+            run_command(args)
+    finally:
+        name = 'worker_{}'.format(args.worker_index + 1) if args.jobs else 'verify' if args.verify else 'calibrate' if args.calibrate else 'render'
+        write_profile(profiler, name, args.profile_top)
+
+def run_command(args):
+    if args.verify:
+        scene = bpy.context.scene
+        os.chdir(bpy.path.abspath('//'))
+        problems, jobs_to_render, job_file = verify_render_output(scene, scene.reliveBatch, args.layers or get_models(scene))
+        if jobs_to_render:
+            print("{} jobs to re-render written to {}".format(len(jobs_to_render), job_file))
+        else:
+            print("All frames are OK")
+    elif args.calibrate:
+        calibrate_workers(bpy.context.scene, bpy.context.scene.reliveBatch)
+    elif args.jobs:
+        render_job_file(args.jobs, args.progress, args.stats, args.trace, args.worker_index)
+    elif args.render:
+        render_in_background(set(args.anims), args.layers)
+
+if __name__ == '__main__':
+    register()
+
+    if '--' in sys.argv:
+        main(sys.argv[sys.argv.index('--') + 1:])
\ No newline at end of file
@@ -0,0 +1,1204 @@
+# Parts of the batch renderer that don't need blender:
+# reading sprite folders, camera/reference math, planning render jobs and naming the output files.
+# The addon imports from here. misc_scripts, benchmarks and tests load it without blender,
+# so this file must not import bpy (or use relative imports).
+
+import os, re, io, sys, json, time, zlib, queue, fnmatch, hashlib, struct, pstats, cProfile, threading, contextlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from shutil import copyfile
+from collections import namedtuple, Counter
+
+# optional: encodes frames much faster (blender comes with it, the pure python encoders are used without it)
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# == CUSTOM DATATYPES
+
+# Animation from new asset tool
+AnimMeta = namedtuple('AnimMeta', 'name frame_count size_w size_h offset_x offset_y')
+
+# Settings to render an animation (or a range of its frames)
+# held_frames are frames that look exactly like frame_end, they are copied from it instead of being rendered
+AnimToRender = namedtuple('AnimToRender', 'meta, model, file_path, frame_start, frame_end, held_frames', defaults=((),))
+
+# Settings used for reference images and camera (NOTE: same container, but different values)
+SizeAndOffsets = namedtuple('SizeAndOffsets', 'size offset_x offset_y')
+
+# Format of the rendered frames
+# blender_format - blender's file format that writes this format (None if frames are converted from scratch frames by the addon)
+# encode(width, height, channels, pixels) -> file data, pixels are 8-bit RGB or RGBA bytes, top row first
+# decode(data, width, height) -> (width, height, channels, pixels), width and height are only used by formats without a header
+# check(file, width, height) -> why the frame is broken (None if it looks fine)
+FrameEncoder = namedtuple('FrameEncoder', 'name extension blender_format encode decode check')
+
+# Step of a Pipeline, function(item) returns the item for the next stage (None drops it)
+PipelineStage = namedtuple('PipelineStage', 'name function thread_count', defaults=(1,))
+
+# Frame info parsed from a legacy frame string (misc_scripts csv files)
+FrameInfo = namedtuple('FrameInfo', 'index action_name action_frame')
+    # index - the index of the animation which this frame represents
+    # action_name - the name of the blender action to use
+    # action_frame - which frame of the blender action to use
+
+# == CONSTANTS
+
+default_pass_name = "_DEFAULT"
+emissive_pass_name = "_emissive"
+
+pixel_size = 0.017
+
+# optional sidecar file with offsets for folders without a meta.json
+offset_sidecar_name = 'offset.json'
+
+png_signature = b'\x89PNG\r\n\x1a\n'
+png_iend = b'\x00\x00\x00\x00IEND\xaeB`\x82'
+
+# blender writes formats it can't write itself as uncompressed targa, converted after each job
+scratch_frame_format = 'TARGA_RAW'
+scratch_frame_extension = '.tga'
+
+# written by the output verification (same format as the job files of the workers)
+rerender_file_name = 'rerender_jobs.json'
+
+# One action access in a frame string, e.g. "@Walk:4" (first 4 frames) or "@Walk:0,2,2" (specific frames)
+# (the first character is a prefix that is not part of the action name)
+frame_access_pattern = re.compile(r'^.(?P<action>[^:;]+):(?P<frames>\d+(?:,\d+)*)$')
+
+# == SPRITE FOLDERS
+
+# Metadata inferred from folders without a meta.json
+# folder path -> (modification times, AnimMeta)
+inferred_meta_catalogue = {}
+
+def read_png_size(png_file):
+    # Only reads the signature and IHDR chunk (no pixels are decoded)
+    with open(png_file, 'rb') as f:
+        header = f.read(24)
+
+    if len(header) < 24 or header[:8] != png_signature or header[12:16] != b'IHDR':
+        return None
+
+    return struct.unpack('>II', header[16:24])
+
+def infer_anim_meta(folder):
+    first_frame = folder / '0.png'
+    sidecar = folder / offset_sidecar_name
+
+    try:
+        mtimes = (folder.stat().st_mtime_ns, first_frame.stat().st_mtime_ns, sidecar.stat().st_mtime_ns if sidecar.exists() else 0)
+    except FileNotFoundError:
+        return None
+
+    # reuse the previous result if nothing in the folder changed
+    cached = inferred_meta_catalogue.get(str(folder))
+    if cached is not None and cached[0] == mtimes:
+        return cached[1]
+
+    size = read_png_size(first_frame)
+    if size is None:
+        return None
+    size_w, size_h = size
+
+    # frame numbers of the plain numbered files, so rendered passes like 0_emissive.png are ignored
+    frame_numbers = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            stem, ext = os.path.splitext(entry.name)
+            if ext == '.png' and stem.isascii() and stem.isdigit():
+                frame_numbers.append(stem)
+
+    # the highest frame decides the length (parsed like the frame list of a frame string),
+    # so a folder with a missing frame still has the animation's length
+    frame_count = max(frame.action_frame for frame in get_frame_list('@frames:' + ','.join(frame_numbers))) + 1
+
+    # offsets from sidecar, default to bottom center
+    offset_x = size_w // 2
+    offset_y = size_h
+    if sidecar.exists():
+        with open(sidecar) as f:
+            data = json.load(f)
+            offset_x = data.get('x', offset_x)
+            offset_y = data.get('y', offset_y)
+
+    meta = AnimMeta(folder.name, frame_count, size_w, size_h, offset_x, offset_y)
+    inferred_meta_catalogue[str(folder)] = (mtimes, meta)
+    return meta
+
+def get_anims(sprite_folder, filter, infer_missing=False):
+    anim_folders = [f for f in Path(sprite_folder).iterdir() if f.is_dir()]
+    anims = []
+    for folder in anim_folders:
+        if not fnmatch.fnmatch(folder.name, filter):
+            continue
+
+        json_file = folder / 'meta.json'
+        if not Path.exists(json_file):
+            if not infer_missing:
+                continue
+
+            # try to build the metadata from the sprites themselves
+            meta = infer_anim_meta(folder)
+            if meta is not None and meta.frame_count > 0:
+                anims.append(meta)
+            continue
+
+        with open(json_file) as f:
+            data = json.load(f)
+
+            frame_count = data['frame_count']
+            size_w = data['size']['w']
+            size_h = data['size']['h']
+            offset_x = data['offset']['x']
+            offset_y = data['offset']['y']
+
+            if frame_count < 1:
+                continue
+
+            anims.append(AnimMeta(folder.name, frame_count, size_w, size_h, offset_x, offset_y))
+
+    return anims
+
+# == CAMERA AND REFERENCES
+
+def calculate_reference_params(size_w, size_h, offset_x, offset_y):
+    # set size depending on aspect ratio
+    if size_w > size_h:
+        size = size_w * pixel_size
+    else:
+        size = size_h * pixel_size
+
+    # offsets (x is flipped)
+    x = 1 - (offset_x / size_w) - 1
+    y =     (offset_y / size_h) - 1
+
+    return SizeAndOffsets(size, x, y)
+
+def calculate_cam_params(size_w, size_h, offset_x, offset_y):
+    # set ortho scale depending on aspect ratio
+    if size_w > size_h:
+        scale = size_w * pixel_size
+    else:
+        scale = size_h * pixel_size
+    
+    # offsets (x is flipped)
+    x = 1 - (offset_x / size_w) - 0.5
+    y =     (offset_y / size_h) - 0.5
+
+    # camera shift depends on aspect ratio
+    if size_w > size_h:
+        y = y * size_h / size_w
+    else:
+        x = x * size_w / size_h
+
+    return SizeAndOffsets(scale, x, y)
+
+# == PLANNING
+
+def plan_jobs(animations, models, render_path, current_pass, use_model_folders, max_frames_per_job, get_frame_ranges):
+    # Returns the AnimToRenders of a batch
+    #   get_frame_ranges - returns (first frame, last frame, held frames) of each range to render for an animation,
+    #                      or None if it can't be rendered (e.g. its action is missing)
+    anims_to_render = []
+
+    for anim in animations:
+        # frame ranges that need to be rendered (and which frames are copied after each)
+        frame_ranges = get_frame_ranges(anim)
+        if frame_ranges is None:
+            continue
+
+        # for each enabled view layer (model)
+        for model in models:
+            # make relative path string (add model name to path if more than one)
+            if use_model_folders:
+                file_path = '{}/{}/{}/{}'.format(render_path, model, anim.name, current_pass)
+            else:
+                file_path = '{}/{}/{}'.format(render_path, anim.name, current_pass)
+
+            # Add frame range(s) to frames_to_render
+            for range_start, range_end, held_frames in frame_ranges:
+                job_ranges = split_frame_range(range_start, range_end, max_frames_per_job)
+                for frame_start, frame_end in job_ranges:
+                    # held frames are copied by the job that renders the frame they are copied from
+                    job_held_frames = held_frames if frame_end == range_end else ()
+                    anims_to_render.append(AnimToRender(anim, model, file_path, frame_start, frame_end, job_held_frames))
+
+    return anims_to_render
+
+def split_frame_range(frame_start, frame_end, max_frames):
+    # Returns (first frame, last frame) pairs of roughly equal length
+    frame_count = frame_end - frame_start + 1
+    if max_frames < 1 or frame_count <= max_frames:
+        return [(frame_start, frame_end)]
+
+    job_count = -(-frame_count // max_frames)
+    ranges = []
+    for i in range(job_count):
+        ranges.append((frame_start + i * frame_count // job_count, frame_start + (i + 1) * frame_count // job_count - 1))
+    return ranges
+
+def get_job_cost(render_anim):
+    # rough estimate of how long a job takes to render
+    return (render_anim.frame_end - render_anim.frame_start + 1) * render_anim.meta.size_w * render_anim.meta.size_h
+
+def assign_jobs_to_workers(anims_to_render, worker_count):
+    # Gives the next most expensive job to the worker with the least work so far
+    workers = [[] for i in range(worker_count)]
+    costs = [0] * worker_count
+    for render_anim in sorted(anims_to_render, key=get_job_cost, reverse=True):
+        worker = costs.index(min(costs))
+        workers[worker].append(render_anim)
+        costs[worker] += get_job_cost(render_anim)
+    return [jobs for jobs in workers if jobs]
+
+def write_job_file(path, anims_to_render):
+    with open(path, 'w') as f:
+        json.dump([dict(render_anim._asdict(), meta=render_anim.meta._asdict()) for render_anim in anims_to_render], f)
+
+def read_job_file(path):
+    with open(path) as f:
+        return [AnimToRender(**dict(job, meta=AnimMeta(**job['meta']))) for job in json.load(f)]
+
+def parse_sample_curve(text):
+    # "area:samples, area:samples" -> sorted list of (area, samples)
+    points = []
+    for point in text.split(','):
+        if point.strip() == "":
+            continue
+        area, samples = point.split(':')
+        points.append((float(area), int(samples)))
+
+    if not points:
+        raise ValueError("Sample curve is empty")
+
+    return sorted(points)
+
+def get_sample_count(curve, area):
+    if area <= curve[0][0]:
+        return curve[0][1]
+
+    for (area_a, samples_a), (area_b, samples_b) in zip(curve, curve[1:]):
+        if area <= area_b:
+            return round(samples_a + (samples_b - samples_a) * (area - area_a) / (area_b - area_a))
+
+    return curve[-1][1]
+
+# == CALIBRATION
+
+def pick_calibration_sample(animations, models, render_path, current_pass, anim_count, frame_count):
+    # A few animations spread over the range of sprite sizes, the first frames of each, one model each
+    if not models:
+        return []
+    by_area = sorted(animations, key=lambda anim: (anim.size_w * anim.size_h, anim.name))
+    if len(by_area) > anim_count:
+        # evenly spaced, including the smallest and the largest
+        step = (len(by_area) - 1) / max(anim_count - 1, 1)
+        by_area = [by_area[round(i * step)] for i in range(anim_count)]
+
+    jobs = []
+    for i, anim in enumerate(by_area):
+        model = models[i % len(models)]
+        file_path = '{}/{}/{}/{}'.format(render_path, model, anim.name, current_pass)
+        jobs.append(AnimToRender(anim, model, file_path, 0, min(anim.frame_count, frame_count) - 1))
+    return jobs
+
+def get_calibration_configs(cpu_count, max_workers=8):
+    # (workers, threads per worker) that use exactly all cpus: 1 x cpu_count, 2 x cpu_count/2 ...
+    # (worker counts that don't divide cpu_count would leave cpus idle, e.g. 8 x 1 on 12 cpus)
+    return [(worker_count, cpu_count // worker_count) for worker_count in range(1, min(cpu_count, max_workers) + 1) if cpu_count % worker_count == 0]
+
+def pick_best_config(results, memory_limit=0):
+    # Fastest configuration whose summed peak memory stays under the limit (bytes, 0 = no limit)
+    allowed = [result for result in results if memory_limit <= 0 or result['peak_rss'] <= memory_limit]
+    if not allowed:
+        return None
+    return max(allowed, key=lambda result: result['frames_per_second'])
+
+def get_peak_rss():
+    # peak resident memory of this process in bytes (0 if unknown)
+    try:
+        import resource
+    except ImportError: # windows
+        counters = get_process_memory_counters()
+        return counters.PeakWorkingSetSize if counters is not None else 0
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macos, kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def get_current_rss():
+    # resident memory of this process in bytes (the peak where the current value isn't available, e.g. macos)
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, AttributeError, ValueError):
+        pass
+
+    counters = get_process_memory_counters()
+    if counters is not None:
+        return counters.WorkingSetSize
+    return get_peak_rss()
+
+def get_process_memory_counters():
+    # PROCESS_MEMORY_COUNTERS of this process (windows only, None elsewhere)
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [(name, ctypes.c_size_t) for name in (
+                'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        if ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return counters
+    except (ImportError, AttributeError, OSError):
+        pass
+    return None
+
+# == TRACING
+
+class TraceRecorder:
+    # Collects spans in the chrome trace-event format (chrome://tracing, Perfetto)
+    # Timestamps are microseconds since the epoch, so traces of several processes line up when merged
+
+    def __init__(self, pid, process_name):
+        self.pid = pid
+        self.events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': process_name}}]
+        self.lock = threading.Lock()
+
+    def add(self, name, start, end, category='batch', **args):
+        # start and end are time.time() values
+        event = {'name': name, 'cat': category, 'ph': 'X', 'ts': round(start * 1e6), 'dur': round((end - start) * 1e6), 'pid': self.pid, 'tid': threading.get_native_id(), 'args': args}
+        with self.lock:
+            self.events.append(event)
+
+    @contextlib.contextmanager
+    def span(self, name, category='batch', **args):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.time(), category, **args)
+
+    def write(self, trace_file):
+        with self.lock:
+            with open(trace_file, 'w') as f:
+                json.dump(self.events, f)
+
+def merge_traces(trace_files, output_file):
+    # Writes the events of several trace files (written by TraceRecorder.write) into one trace
+    events = []
+    for trace_file in trace_files:
+        try:
+            with open(trace_file) as f:
+                events += json.load(f)
+        except (FileNotFoundError, ValueError): # a worker that crashed or was cancelled
+            continue
+
+    with open(output_file, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+# == PROFILING
+
+class OperatorProfiler:
+    # Collects cProfile stats over several calls (an operator's execute, modal and handlers)
+    # With sample_lines, a thread also samples which line the profiled thread is running
+
+    def __init__(self, sample_lines=False, sample_interval=0.001):
+        self.profile = cProfile.Profile()
+        self.sample_lines = sample_lines
+        self.sample_interval = sample_interval
+        self.line_samples = Counter()
+        self.calls = 0
+        self.seconds = 0.0
+        self.depth = 0
+        self.sampled_thread = None
+        self.sampling = threading.Event()
+        self.stopped = threading.Event()
+        self.sampler = None
+
+    @contextlib.contextmanager
+    def run(self):
+        # nested calls (a handler running inside a profiled operator) are part of the outer call
+        if self.depth > 0:
+            self.depth += 1
+            try:
+                yield
+            finally:
+                self.depth -= 1
+            return
+
+        self.depth = 1
+        self.calls += 1
+        self.sampled_thread = threading.get_ident()
+        if self.sample_lines:
+            if self.sampler is None:
+                self.sampler = threading.Thread(target=self.sample, daemon=True)
+                self.sampler.start()
+            self.sampling.set()
+
+        start = time.perf_counter()
+        self.profile.enable()
+        try:
+            yield
+        finally:
+            self.profile.disable()
+            self.seconds += time.perf_counter() - start
+            self.sampling.clear()
+            self.depth = 0
+
+    def sample(self):
+        while not self.stopped.is_set():
+            # wakes up now and then between calls to notice finish()
+            if not self.sampling.wait(0.1):
+                continue
+            frame = sys._current_frames().get(self.sampled_thread)
+            if frame is not None and self.sampling.is_set():
+                self.line_samples[(frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name)] += 1
+            time.sleep(self.sample_interval)
+
+    def finish(self):
+        # Stops the sampling thread (call before write, once nothing is profiled anymore)
+        self.stopped.set()
+        if self.sampler is not None:
+            self.sampler.join()
+            self.sampler = None
+
+    def write(self, file_prefix, top_count=40):
+        # Writes file_prefix.prof (for snakeviz, pstats...) and a readable file_prefix.profile.txt
+        # Returns both file names
+        prof_file = file_prefix + '.prof'
+        summary_file = file_prefix + '.profile.txt'
+        self.profile.dump_stats(prof_file)
+
+        summary = io.StringIO()
+        summary.write('{} profiled calls, {:.3f} s\n\n'.format(self.calls, self.seconds))
+        stats = pstats.Stats(self.profile, stream=summary)
+        stats.sort_stats('cumulative').print_stats(top_count)
+        stats.sort_stats('tottime').print_stats(top_count)
+
+        if self.line_samples:
+            sample_count = sum(self.line_samples.values())
+            summary.write('{} line samples (every {} ms)\n\n'.format(sample_count, self.sample_interval * 1000))
+            for (file_name, line, function), count in self.line_samples.most_common(top_count):
+                summary.write('{:6.1f}%  {}:{} ({})\n'.format(count * 100 / sample_count, file_name, line, function))
+
+        with open(summary_file, 'w') as f:
+            f.write(summary.getvalue())
+        return prof_file, summary_file
+
+# == OUTPUT FILES
+
+def get_frame_file_name(frame, prefix, extension='.png'):
+    # file name the game uses for a frame
+    if prefix == default_pass_name:
+        return str(frame) + extension
+    return str(frame) + prefix + extension
+
+def copy_held_frames(export_path, prefix, source_frame, held_frames, extension='.png'):
+    export_folder = export_path.removesuffix('/' + prefix)
+    source = os.path.join(export_folder, get_frame_file_name(source_frame, prefix, extension))
+    if not held_frames or not os.path.exists(source):
+        return
+
+    for frame in held_frames:
+        target = os.path.join(export_folder, get_frame_file_name(frame, prefix, extension))
+        if os.path.lexists(target):
+            os.remove(target)
+
+        # hardlink if possible (no extra disk space)
+        try:
+            os.link(source, target)
+        except OSError:
+            copyfile(source, target)
+
+def rename_rendered_frames(export_path, prefix, frame_start, frame_end, extension='.png', log=None):
+    # Renames blender's output (e.g. _DEFAULT0003.png) to the names the game uses (3.png)
+    # Only the frames of this job are touched, so other jobs can render into the same folder at the same time
+    #   log - called with a message for the folder, every rename and every missing frame (e.g. print)
+    export_folder = export_path.removesuffix('/' + prefix)
+    if log is not None:
+        log(export_folder)
+
+    for frame in range(frame_start, frame_end + 1):
+        file = Path(export_folder) / '{}{:04d}{}'.format(prefix, frame, extension)
+        if not file.exists():
+            if log is not None:
+                log("missing {}".format(file.name))
+            continue
+
+        new_path = export_folder + "/" + get_frame_file_name(frame, prefix, extension)
+
+        if log is not None:
+            log("renaming to {}".format(new_path))
+        file.replace(new_path)
+
+def convert_rendered_frames(export_path, prefix, frame_start, frame_end, encoder):
+    # Encodes renamed scratch frames in the encoder's format and deletes them (without blender, so it works on any thread)
+    export_folder = export_path.removesuffix('/' + prefix)
+    for frame in range(frame_start, frame_end + 1):
+        scratch_file = os.path.join(export_folder, get_frame_file_name(frame, prefix, scratch_frame_extension))
+        if not os.path.exists(scratch_file):
+            continue
+        with open(scratch_file, 'rb') as f:
+            width, height, channels, pixels = decode_tga(f.read())
+        with open(os.path.join(export_folder, get_frame_file_name(frame, prefix, encoder.extension)), 'wb') as f:
+            f.write(encoder.encode(width, height, channels, pixels))
+        os.remove(scratch_file)
+
+def recompress_png(png_file, level=9):
+    # Deflates the pixel data again at the given zlib level (the filtered rows are kept as they are)
+    # The file is only replaced if it gets smaller, returns the number of bytes saved
+    with open(png_file, 'rb') as f:
+        data = f.read()
+
+    chunks = []
+    idat = []
+    position = len(png_signature)
+    while position < len(data):
+        length, chunk_type = struct.unpack_from('>I4s', data, position)
+        if chunk_type == b'IDAT':
+            if not idat:
+                chunks.append(None) # where the pixel data goes
+            idat.append(data[position + 8:position + 8 + length])
+        else:
+            chunks.append(data[position:position + length + 12])
+        position += length + 12
+
+    compressed = get_png_chunk(b'IDAT', zlib.compress(zlib.decompress(b''.join(idat)), level))
+    new_data = png_signature + b''.join(compressed if chunk is None else chunk for chunk in chunks)
+    if len(new_data) >= len(data):
+        return 0
+
+    temp_file = png_file + '.tmp'
+    with open(temp_file, 'wb') as f:
+        f.write(new_data)
+    os.replace(temp_file, png_file)
+    return len(data) - len(new_data)
+
+def recompress_frames(export_path, prefix, frames, extension='.png', level=9):
+    # recompress_png for every frame, hardlinked frames (held or deduplicated ones) are recompressed once
+    # and linked to the new file again, so they don't keep the old data
+    # Returns the number of bytes saved
+    export_folder = export_path.removesuffix('/' + prefix)
+    linked_files = {}
+    for frame in frames:
+        frame_file = os.path.join(export_folder, get_frame_file_name(frame, prefix, extension))
+        try:
+            stat = os.stat(frame_file)
+        except FileNotFoundError:
+            continue
+        linked_files.setdefault((stat.st_dev, stat.st_ino), []).append(frame_file)
+
+    saved = 0
+    for source, *links in linked_files.values():
+        saved_bytes = recompress_png(source, level)
+        if not saved_bytes:
+            continue
+        saved += saved_bytes
+        for frame_file in links:
+            temp_file = frame_file + '.tmp'
+            try:
+                os.link(source, temp_file)
+            except OSError:
+                copyfile(source, temp_file)
+            os.replace(temp_file, frame_file)
+    return saved
+
+def link_duplicate_frames(export_path, prefix, frames, extension='.png'):
+    # Replaces frames that are byte for byte identical to an earlier one with a hardlink to it
+    # Returns the number of frames that were linked
+    export_folder = export_path.removesuffix('/' + prefix)
+    first_frame_files = {}
+    linked = 0
+    for frame in frames:
+        frame_file = os.path.join(export_folder, get_frame_file_name(frame, prefix, extension))
+        try:
+            with open(frame_file, 'rb') as f:
+                digest = hashlib.sha1(f.read()).digest()
+        except FileNotFoundError:
+            continue
+
+        source = first_frame_files.setdefault(digest, frame_file)
+        if source == frame_file or os.path.samefile(source, frame_file):
+            continue
+
+        temp_file = frame_file + '.tmp'
+        try:
+            os.link(source, temp_file)
+        except OSError:
+            continue
+        os.replace(temp_file, frame_file)
+        linked += 1
+    return linked
+
+# == OUTPUT VERIFICATION
+
+def check_png_frame(png_file, width, height):
+    # Returns why a frame is broken (None if it looks fine)
+    # Only the chunk headers are read: IHDR, the first IDAT and IEND at the end of the file
+    try:
+        with open(png_file, 'rb') as f:
+            file_size = os.fstat(f.fileno()).st_size
+            header = f.read(24)
+            if len(header) < 24 or header[:8] != png_signature or header[12:16] != b'IHDR':
+                return 'not a png'
+            if struct.unpack('>II', header[16:24]) != (width, height):
+                return 'wrong size'
+
+            # skip chunks until the first IDAT
+            position = 8
+            while True:
+                f.seek(position)
+                chunk_header = f.read(8)
+                if len(chunk_header) < 8:
+                    return 'truncated'
+                length, chunk_type = struct.unpack('>I4s', chunk_header)
+                if chunk_type == b'IDAT':
+                    if length == 0:
+                        return 'no pixel data'
+                    break
+                if chunk_type == b'IEND':
+                    return 'no pixel data'
+                position += length + 12
+
+            if position + length + 12 > file_size:
+                return 'truncated'
+
+            f.seek(file_size - len(png_iend))
+            if f.read(len(png_iend)) != png_iend:
+                return 'truncated'
+    except FileNotFoundError:
+        return 'missing'
+
+    return None
+
+def get_missing_ranges(frames):
+    # sorted frame numbers -> (first frame, last frame) of each run of consecutive frames
+    ranges = []
+    for frame in frames:
+        if ranges and ranges[-1][1] == frame - 1:
+            ranges[-1][1] = frame
+        else:
+            ranges.append([frame, frame])
+    return [tuple(frame_range) for frame_range in ranges]
+
+def verify_output(anims_to_render, prefix, resolution_percent, base_folder='', thread_count=32, encoder=None):
+    # Checks every frame the jobs should have written (pngs unless encoder is given)
+    # Returns (problems, jobs to re-render), problems is a dict of reason -> list of files
+    encoder = encoder or frame_encoders['PNG']
+    checks = []
+    for job_index, render_anim in enumerate(anims_to_render):
+        export_folder = os.path.join(base_folder, render_anim.file_path.removesuffix('/' + prefix))
+        width = render_anim.meta.size_w * resolution_percent // 100
+        height = render_anim.meta.size_h * resolution_percent // 100
+        for frame in list(range(render_anim.frame_start, render_anim.frame_end + 1)) + list(render_anim.held_frames):
+            checks.append((job_index, frame, os.path.join(export_folder, get_frame_file_name(frame, prefix, encoder.extension)), width, height))
+
+    with ThreadPoolExecutor(max_workers=thread_count) as pool:
+        results = list(pool.map(lambda check: encoder.check(*check[2:]), checks))
+
+    problems = {}
+    broken_frames = {}
+    for (job_index, frame, png_file, width, height), problem in zip(checks, results):
+        if problem is not None:
+            problems.setdefault(problem, []).append(png_file)
+            broken_frames.setdefault(job_index, []).append(frame)
+
+    # only the broken frames are rendered again (held frames are copied by re-rendering the frame they are copied from)
+    jobs_to_render = []
+    for job_index, frames in broken_frames.items():
+        render_anim = anims_to_render[job_index]
+        held_frames = tuple(frame for frame in frames if frame in render_anim.held_frames)
+        rendered_frames = sorted(frame for frame in frames if frame not in render_anim.held_frames)
+        if held_frames and render_anim.frame_end not in rendered_frames:
+            rendered_frames.append(render_anim.frame_end)
+
+        for frame_start, frame_end in get_missing_ranges(rendered_frames):
+            jobs_to_render.append(render_anim._replace(frame_start=frame_start, frame_end=frame_end, held_frames=held_frames if frame_end == render_anim.frame_end else ()))
+
+    return problems, jobs_to_render
+
+# == FRAME ENCODERS
+# Without blender, so they work on any thread, in workers and in benchmarks. Only 8-bit frames are encoded.
+# QOI frames are encoded with numpy when it is available, the pure python encoder is the fallback
+# (and the reference the numpy one has to match byte for byte).
+
+qoi_header = struct.Struct('>4sIIBB')
+qoi_end = b'\x00\x00\x00\x00\x00\x00\x00\x01'
+webp_header = struct.Struct('<4sI4s4sI')
+
+def to_rgba_values(width, height, channels, pixels):
+    # bytes -> one int per pixel (r | g << 8 | b << 16 | a << 24)
+    if channels == 3:
+        rgba = bytearray(b'\xff' * (width * height * 4))
+        for i in range(3):
+            rgba[i::4] = pixels[i::3]
+        pixels = rgba
+    values = array('I')
+    values.frombytes(bytes(pixels))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+def from_rgba_values(values, channels):
+    if sys.byteorder == 'big':
+        values = array('I', values)
+        values.byteswap()
+    rgba = values.tobytes()
+    if channels == 4:
+        return rgba
+    rgb = bytearray(len(rgba) // 4 * 3)
+    for i in range(3):
+        rgb[i::3] = rgba[i::4]
+    return bytes(rgb)
+
+def encode_png(width, height, channels, pixels, compression=15):
+    # Filter type 0 in every row (compression 0-100 like blender's setting)
+    stride = width * channels
+    rows = b''.join(b'\x00' + pixels[y * stride:(y + 1) * stride] for y in range(height))
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 6 if channels == 4 else 2, 0, 0, 0)
+    return b''.join((png_signature, get_png_chunk(b'IHDR', ihdr), get_png_chunk(b'IDAT', zlib.compress(rows, round(compression * 9 / 100))), get_png_chunk(b'IEND', b'')))
+
+def get_png_chunk(chunk_type, data):
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+
+def unfilter_png_rows(data, height, stride, bytes_per_pixel):
+    pixels = bytearray(height * stride)
+    previous = bytearray(stride)
+    for y in range(height):
+        filter_type = data[y * (stride + 1)]
+        row = bytearray(data[y * (stride + 1) + 1:(y + 1) * (stride + 1)])
+        if filter_type == 1:
+            for i in range(bytes_per_pixel, stride):
+                row[i] = (row[i] + row[i - bytes_per_pixel]) & 0xff
+        elif filter_type == 2:
+            row = bytearray((a + b) & 0xff for a, b in zip(row, previous))
+        elif filter_type == 3:
+            for i in range(stride):
+                left = row[i - bytes_per_pixel] if i >= bytes_per_pixel else 0
+                row[i] = (row[i] + ((left + previous[i]) >> 1)) & 0xff
+        elif filter_type == 4:
+            for i in range(stride):
+                a = row[i - bytes_per_pixel] if i >= bytes_per_pixel else 0
+                b = previous[i]
+                c = previous[i - bytes_per_pixel] if i >= bytes_per_pixel else 0
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                row[i] = (row[i] + (a if pa <= pb and pa <= pc else b if pb <= pc else c)) & 0xff
+        pixels[y * stride:(y + 1) * stride] = row
+        previous = row
+    return pixels
+
+def decode_png(data, width=0, height=0):
+    # RGB and RGBA pngs (16-bit ones are reduced to 8 bits), not interlaced
+    position = len(png_signature)
+    idat = []
+    while position < len(data):
+        length, chunk_type = struct.unpack_from('>I4s', data, position)
+        if chunk_type == b'IHDR':
+            width, height, bit_depth, color_type = struct.unpack_from('>IIBB', data, position + 8)
+        elif chunk_type == b'IDAT':
+            idat.append(data[position + 8:position + 8 + length])
+        elif chunk_type == b'IEND':
+            break
+        position += length + 12
+
+    channels = 4 if color_type == 6 else 3
+    sample_size = bit_depth // 8
+    pixels = unfilter_png_rows(zlib.decompress(b''.join(idat)), height, width * channels * sample_size, channels * sample_size)
+    if sample_size == 2:
+        pixels = pixels[0::2]
+    return width, height, channels, bytes(pixels)
+
+def decode_tga(data, width=0, height=0):
+    # Uncompressed true colour (or grayscale) targa, like blender's TARGA_RAW output
+    # Returns RGB or RGBA pixels, top row first
+    id_length, colormap_type, image_type = data[0], data[1], data[2]
+    colormap_length, colormap_entry_size = struct.unpack_from('<HB', data, 5)
+    width, height, bits_per_pixel, descriptor = struct.unpack_from('<HHBB', data, 12)
+    if image_type not in (2, 3):
+        raise ValueError('only uncompressed true colour and grayscale targa are supported')
+
+    channels = bits_per_pixel // 8
+    position = 18 + id_length + (colormap_length * ((colormap_entry_size + 7) // 8) if colormap_type else 0)
+    data = data[position:position + width * height * channels]
+
+    if channels == 1:
+        pixels = bytearray(len(data) * 3)
+        pixels[0::3] = pixels[1::3] = pixels[2::3] = data
+        channels = 3
+    else:
+        # BGR(A) -> RGB(A)
+        pixels = bytearray(data)
+        pixels[0::channels], pixels[2::channels] = data[2::channels], data[0::channels]
+
+    if not descriptor & 0x20:
+        # bottom row first
+        stride = width * channels
+        pixels = b''.join(pixels[y * stride:(y + 1) * stride] for y in range(height - 1, -1, -1))
+    return width, height, channels, bytes(pixels)
+
+def encode_qoi(width, height, channels, pixels):
+    # The Quite OK Image format (qoiformat.org), much faster to decode than png
+    out = bytearray(qoi_header.pack(b'qoif', width, height, channels, 0))
+    index = [0] * 64
+    previous = 0xff000000
+    run = 0
+
+    for value in to_rgba_values(width, height, channels, pixels):
+        if value == previous:
+            run += 1
+            if run == 62:
+                out.append(0xc0 | 61)
+                run = 0
+            continue
+
+        if run:
+            out.append(0xc0 | (run - 1))
+            run = 0
+
+        r, g, b, a = value & 0xff, (value >> 8) & 0xff, (value >> 16) & 0xff, value >> 24
+        hash_index = (r * 3 + g * 5 + b * 7 + a * 11) % 64
+        if index[hash_index] == value:
+            out.append(hash_index)
+        else:
+            index[hash_index] = value
+            if a == previous >> 24:
+                vr = ((r - (previous & 0xff) + 128) & 0xff) - 128
+                vg = ((g - ((previous >> 8) & 0xff) + 128) & 0xff) - 128
+                vb = ((b - ((previous >> 16) & 0xff) + 128) & 0xff) - 128
+                vg_r, vg_b = vr - vg, vb - vg
+                if -3 < vr < 2 and -3 < vg < 2 and -3 < vb < 2:
+                    out.append(0x40 | (vr + 2) << 4 | (vg + 2) << 2 | (vb + 2))
+                elif -33 < vg < 32 and -9 < vg_r < 8 and -9 < vg_b < 8:
+                    out += bytes((0x80 | (vg + 32), (vg_r + 8) << 4 | (vg_b + 8)))
+                else:
+                    out += bytes((0xfe, r, g, b))
+            else:
+                out += bytes((0xff, r, g, b, a))
+        previous = value
+
+    if run:
+        out.append(0xc0 | (run - 1))
+    return bytes(out + qoi_end)
+
+def encode_qoi_numpy(width, height, channels, pixels):
+    # Same output as encode_qoi, but every pixel's chunk is worked out at once:
+    # pixels equal to the previous one extend a run, every other pixel writes its value to the index,
+    # so the index entry it sees is the last earlier non-run pixel with the same hash (or 0, the initial value)
+    rgba = np.frombuffer(pixels, dtype=np.uint8).reshape(-1, channels)
+    if channels == 3:
+        rgba = np.concatenate((rgba, np.full((len(rgba), 1), 255, dtype=np.uint8)), axis=1)
+    values = np.ascontiguousarray(rgba).view('<u4').ravel().astype(np.uint32)
+    count = len(values)
+    header = qoi_header.pack(b'qoif', width, height, channels, 0)
+    if count == 0:
+        return header + qoi_end
+
+    previous = np.concatenate((np.array([0xff000000], dtype=np.uint32), values[:-1]))
+    same = values == previous
+
+    # runs: 62 pixels per chunk, the last chunk of a run holds the rest
+    edges = np.diff(np.concatenate(([0], same.view(np.int8), [0])))
+    run_starts, run_ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    run_lengths = run_ends - run_starts
+    run_chunks = (run_lengths + 61) // 62
+
+    # every other pixel: index, diff, luma, rgb or rgba chunk
+    positions = np.flatnonzero(~same)
+    value = values[positions]
+    before = previous[positions]
+    channel = lambda values, shift: ((values >> shift) & 0xff).astype(np.int32)
+    r, g, b, a = (channel(value, shift) for shift in (0, 8, 16, 24))
+    hashes = (r * 3 + g * 5 + b * 7 + a * 11) % 64
+
+    order = np.argsort(hashes, kind='stable')
+    sorted_hashes, sorted_values = hashes[order], value[order]
+    seen = np.zeros(len(order), dtype=np.uint32)
+    same_hash = sorted_hashes[1:] == sorted_hashes[:-1]
+    seen[1:][same_hash] = sorted_values[:-1][same_hash]
+    index_values = np.empty_like(seen)
+    index_values[order] = seen
+
+    wrap = lambda difference: (difference + 128) % 256 - 128
+    vr, vg, vb = wrap(r - channel(before, 0)), wrap(g - channel(before, 8)), wrap(b - channel(before, 16))
+    vg_r, vg_b = vr - vg, vb - vg
+
+    is_index = index_values == value
+    is_rgba = ~is_index & (a != channel(before, 24))
+    is_small = ~is_index & ~is_rgba
+    is_diff = is_small & (vr >= -2) & (vr <= 1) & (vg >= -2) & (vg <= 1) & (vb >= -2) & (vb <= 1)
+    is_luma = is_small & ~is_diff & (vg >= -32) & (vg <= 31) & (vg_r >= -8) & (vg_r <= 7) & (vg_b >= -8) & (vg_b <= 7)
+    is_rgb = is_small & ~is_diff & ~is_luma
+
+    # byte offset of every chunk
+    lengths = np.zeros(count, dtype=np.int64)
+    lengths[positions] = np.select((is_index | is_diff, is_luma, is_rgb), (1, 2, 4), 5)
+    lengths[run_ends - 1] = run_chunks
+    offsets = np.cumsum(lengths) - lengths
+    out = np.empty(int(lengths.sum()), dtype=np.uint8)
+
+    run_offsets = offsets[run_ends - 1]
+    out[np.repeat(run_offsets - np.cumsum(run_chunks) + run_chunks, run_chunks) + np.arange(run_chunks.sum())] = 0xc0 | 61
+    out[run_offsets + run_chunks - 1] = 0xc0 | (run_lengths - 62 * (run_chunks - 1) - 1)
+
+    chunk_offsets = offsets[positions]
+    out[chunk_offsets[is_index]] = hashes[is_index]
+    out[chunk_offsets[is_diff]] = 0x40 | (vr[is_diff] + 2) << 4 | (vg[is_diff] + 2) << 2 | (vb[is_diff] + 2)
+    luma_offsets = chunk_offsets[is_luma]
+    out[luma_offsets] = 0x80 | (vg[is_luma] + 32)
+    out[luma_offsets + 1] = (vg_r[is_luma] + 8) << 4 | (vg_b[is_luma] + 8)
+    for mask, tag, channel_values in ((is_rgb, 0xfe, (r, g, b)), (is_rgba, 0xff, (r, g, b, a))):
+        mask_offsets = chunk_offsets[mask]
+        out[mask_offsets] = tag
+        for i, values_of_channel in enumerate(channel_values):
+            out[mask_offsets + i + 1] = values_of_channel[mask]
+
+    return header + out.tobytes() + qoi_end
+
+def decode_qoi(data, width=0, height=0):
+    magic, width, height, channels, colorspace = qoi_header.unpack_from(data)
+    values = array('I')
+    append = values.append
+    index = [0] * 64
+    value = 0xff000000
+    position = qoi_header.size
+    end = len(data) - len(qoi_end)
+
+    while position < end:
+        op = data[position]
+        position += 1
+        if op == 0xfe:
+            value = (value & 0xff000000) | data[position] | data[position + 1] << 8 | data[position + 2] << 16
+            position += 3
+        elif op == 0xff:
+            value = int.from_bytes(data[position:position + 4], 'little')
+            position += 4
+        elif op < 0x40:
+            value = index[op]
+            append(value)
+            continue
+        elif op < 0x80:
+            r = ((value & 0xff) + ((op >> 4) & 3) - 2) & 0xff
+            g = (((value >> 8) & 0xff) + ((op >> 2) & 3) - 2) & 0xff
+            b = (((value >> 16) & 0xff) + (op & 3) - 2) & 0xff
+            value = (value & 0xff000000) | r | g << 8 | b << 16
+        elif op < 0xc0:
+            vg = (op & 0x3f) - 32
+            second = data[position]
+            position += 1
+            r = ((value & 0xff) + vg - 8 + (second >> 4)) & 0xff
+            g = (((value >> 8) & 0xff) + vg) & 0xff
+            b = (((value >> 16) & 0xff) + vg - 8 + (second & 0x0f)) & 0xff
+            value = (value & 0xff000000) | r | g << 8 | b << 16
+        else:
+            values.extend([value] * ((op & 0x3f) + 1))
+            continue
+
+        index[((value & 0xff) * 3 + ((value >> 8) & 0xff) * 5 + ((value >> 16) & 0xff) * 7 + (value >> 24) * 11) % 64] = value
+        append(value)
+
+    return width, height, channels, from_rgba_values(values[:width * height], channels)
+
+def encode_raw_rgba(width, height, channels, pixels):
+    # No header, 4 bytes per pixel (the size comes from the meta.json and % Resolution)
+    if channels == 4:
+        return bytes(pixels)
+    return from_rgba_values(to_rgba_values(width, height, channels, pixels), 4)
+
+def decode_raw_rgba(data, width=0, height=0):
+    return width, height, 4, bytes(data)
+
+def check_qoi_frame(qoi_file, width, height):
+    try:
+        with open(qoi_file, 'rb') as f:
+            file_size = os.fstat(f.fileno()).st_size
+            header = f.read(qoi_header.size)
+            if len(header) < qoi_header.size or header[:4] != b'qoif':
+                return 'not a qoi'
+            if qoi_header.unpack(header)[1:3] != (width, height):
+                return 'wrong size'
+            if file_size <= qoi_header.size + len(qoi_end):
+                return 'no pixel data'
+            f.seek(file_size - len(qoi_end))
+            if f.read(len(qoi_end)) != qoi_end:
+                return 'truncated'
+    except FileNotFoundError:
+        return 'missing'
+    return None
+
+def check_raw_rgba_frame(raw_file, width, height):
+    try:
+        file_size = os.path.getsize(raw_file)
+    except FileNotFoundError:
+        return 'missing'
+    if file_size == 0:
+        return 'no pixel data'
+    return None if file_size == width * height * 4 else 'wrong size'
+
+def check_webp_frame(webp_file, width, height):
+    # Lossless (VP8L) or extended (VP8X) webp as written by blender
+    try:
+        with open(webp_file, 'rb') as f:
+            file_size = os.fstat(f.fileno()).st_size
+            header = f.read(webp_header.size + 10)
+    except FileNotFoundError:
+        return 'missing'
+
+    if len(header) < webp_header.size + 5:
+        return 'not a webp'
+    riff, riff_size, webp, chunk_type, chunk_size = webp_header.unpack_from(header)
+    if riff != b'RIFF' or webp != b'WEBP':
+        return 'not a webp'
+    if riff_size + 8 > file_size:
+        return 'truncated'
+
+    payload = header[webp_header.size:]
+    if chunk_type == b'VP8L':
+        bits = int.from_bytes(payload[1:5], 'little')
+        size = ((bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1)
+    elif chunk_type == b'VP8X' and len(payload) >= 10:
+        size = (int.from_bytes(payload[4:7], 'little') + 1, int.from_bytes(payload[7:10], 'little') + 1)
+    else:
+        return 'not lossless'
+    return None if size == (width, height) else 'wrong size'
+
+frame_encoders = {
+    'PNG': FrameEncoder('PNG', '.png', 'PNG', encode_png, decode_png, check_png_frame),
+    'WEBP': FrameEncoder('WEBP', '.webp', 'WEBP', None, None, check_webp_frame),
+    'QOI': FrameEncoder('QOI', '.qoi', None, encode_qoi if np is None else encode_qoi_numpy, decode_qoi, check_qoi_frame),
+    'RGBA': FrameEncoder('RGBA', '.rgba', None, encode_raw_rgba, decode_raw_rgba, check_raw_rgba_frame),
+}
+
+# == PIPELINE
+
+class Pipeline:
+    # Passes items through stages that run on their own threads, connected by bounded queues.
+    # put() blocks while the first queue is full and a stage blocks while the queue of the next one is full,
+    # so a slow stage holds back the ones before it instead of piling up work in memory.
+    # on_error(item, stage name, exception) is called when a stage fails, what it returns goes to the next stage
+    # (without it, or when it returns None, the item is dropped)
+
+    def __init__(self, stages, queue_size=4, on_error=None):
+        self.stages = stages
+        self.on_error = on_error
+        self.queues = [queue.Queue(queue_size) for stage in stages]
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        # per stage: items, dropped, errors, busy (seconds in the stage function), blocked (seconds waiting for the next queue)
+        self.counters = [Counter() for stage in stages]
+        self.put_blocked = 0.0
+
+        self.threads = []
+        for i, stage in enumerate(stages):
+            for _ in range(stage.thread_count):
+                thread = threading.Thread(target=self.run_stage, args=(i,), name='pipeline ' + stage.name, daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def put(self, item):
+        start = time.perf_counter()
+        self.queues[0].put(item)
+        self.put_blocked += time.perf_counter() - start
+
+    def run_stage(self, index):
+        stage = self.stages[index]
+        input_queue = self.queues[index]
+        output_queue = self.queues[index + 1] if index + 1 < len(self.queues) else None
+        counters = self.counters[index]
+
+        while True:
+            item = input_queue.get()
+            if item is None:
+                input_queue.task_done()
+                return
+
+            start = time.perf_counter()
+            try:
+                result = stage.function(item)
+                error = False
+            except Exception as exception: # a failing item must not stop the stage (wait() would never return)
+                print("Pipeline stage {} failed: {!r}".format(stage.name, exception))
+                result = self.on_error(item, stage.name, exception) if self.on_error is not None else None
+                error = True
+            busy = time.perf_counter() - start
+
+            blocked = 0.0
+            if result is not None and output_queue is not None:
+                start = time.perf_counter()
+                output_queue.put(result)
+                blocked = time.perf_counter() - start
+
+            with self.lock:
+                counters['items'] += 1
+                counters['errors'] += error
+                counters['dropped'] += result is None and not error
+                counters['busy'] += busy
+                counters['blocked'] += blocked
+            # only now, so wait() sees the item in the next queue before this one is empty
+            input_queue.task_done()
+
+    def wait(self):
+        # blocks until every item has been through all stages
+        for stage_queue in self.queues:
+            stage_queue.join()
+
+    def close(self):
+        self.wait()
+        for stage, stage_queue in zip(self.stages, self.queues):
+            for _ in range(stage.thread_count):
+                stage_queue.put(None)
+        for thread in self.threads:
+            thread.join()
+
+    def get_stats(self):
+        # throughput and load of each stage since the pipeline was started
+        elapsed = time.perf_counter() - self.started
+        stats = []
+        with self.lock:
+            for stage, stage_queue, counters in zip(self.stages, self.queues, self.counters):
+                stats.append({
+                    'name': stage.name,
+                    'items': counters['items'],
+                    'dropped': counters['dropped'],
+                    'errors': counters['errors'],
+                    'items_per_s': counters['items'] / elapsed if elapsed > 0 else 0.0,
+                    'busy_s': counters['busy'],
+                    'blocked_s': counters['blocked'],
+                    'utilisation': counters['busy'] / (elapsed * stage.thread_count) if elapsed > 0 else 0.0,
+                    'queued': stage_queue.qsize()
+                })
+        return stats
+
+# == LEGACY FRAME STRINGS
+
+# Parses string and returns list of FrameInfos
+def get_frame_list(frame_string):
+    frame_list = []
+    frame_index = 0
+
+    for anim_access in frame_string.split(";"):
+        match = frame_access_pattern.match(anim_access.strip())
+        if match is None:
+            raise ValueError("Invalid frame access '{}' in frame string '{}'".format(anim_access, frame_string))
+
+        action_name = match.group('action')
+        frames = match.group('frames')
+
+        if "," in frames:
+            for frame in frames.split(","):
+                frame_list.append(FrameInfo(frame_index, action_name, int(frame)))
+                frame_index += 1
+        else:
+            for i in range(int(frames)):
+                frame_list.append(FrameInfo(frame_index, action_name, i))
+                frame_index += 1
+
+    return frame_list
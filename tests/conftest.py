@@ -0,0 +1,6 @@
+# core.py doesn't need blender, but the package's __init__.py does, so core is imported from the addon folder
+# (like the benchmarks do)
+
+import os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'relive_render_addon'))
@@ -0,0 +1,197 @@
+# Tests of the parts of the batch renderer that run without blender
+#
+# python -m pytest -q
+
+import os, random, threading
+
+import pytest
+
+import core
+from core import AnimMeta, AnimToRender, FrameInfo, Pipeline, PipelineStage
+
+walk = AnimMeta('Walk', 12, 40, 60, 0, 0)
+idle = AnimMeta('Idle', 3, 20, 30, 0, 0)
+
+def make_pixels(width, height, channels, seed=0):
+    # sprite-like pixels: runs, small steps, jumps and alpha changes, so every QOI chunk type shows up
+    rng = random.Random(seed)
+    colours = [bytes(rng.randrange(256) for _ in range(channels)) for _ in range(6)]
+    pixel = colours[0]
+    pixels = bytearray()
+    for i in range(width * height):
+        roll = rng.random()
+        if roll < 0.3:
+            pixel = rng.choice(colours)
+        elif roll < 0.6:
+            pixel = bytes((value + rng.randint(-2, 1)) % 256 for value in pixel)
+        elif roll < 0.7:
+            pixel = bytes((value + rng.randint(-30, 30)) % 256 for value in pixel)
+        pixels += pixel
+    return bytes(pixels)
+
+# == PLANNING
+
+def test_split_frame_range_keeps_short_ranges():
+    assert core.split_frame_range(0, 9, 10) == [(0, 9)]
+    assert core.split_frame_range(0, 9, 0) == [(0, 9)]
+
+def test_split_frame_range_covers_every_frame_once():
+    ranges = core.split_frame_range(3, 25, 5)
+    assert len(ranges) == 5
+    assert [frame for start, end in ranges for frame in range(start, end + 1)] == list(range(3, 26))
+    assert max(end - start + 1 for start, end in ranges) <= 5
+
+def test_plan_jobs_per_model_and_range():
+    ranges = {'Walk': [(0, 11, ())], 'Idle': None}
+    jobs = core.plan_jobs([walk, idle], ['Abe', 'Mud'], 'renders', '_p', True, 0, lambda anim: ranges[anim.name])
+    assert jobs == [
+        AnimToRender(walk, 'Abe', 'renders/Abe/Walk/_p', 0, 11),
+        AnimToRender(walk, 'Mud', 'renders/Mud/Walk/_p', 0, 11),
+    ]
+
+def test_plan_jobs_gives_held_frames_to_the_last_job():
+    jobs = core.plan_jobs([walk], ['Abe'], 'renders', '_p', False, 4, lambda anim: [(0, 7, (8, 9, 10, 11))])
+    assert [(job.file_path, job.frame_start, job.frame_end, job.held_frames) for job in jobs] == [
+        ('renders/Walk/_p', 0, 3, ()),
+        ('renders/Walk/_p', 4, 7, (8, 9, 10, 11)),
+    ]
+
+def test_infer_anim_meta_counts_to_the_highest_frame(tmp_path):
+    folder = tmp_path / 'Walk'
+    folder.mkdir()
+    for frame in (0, 1, 3):
+        (folder / '{}.png'.format(frame)).write_bytes(core.encode_png(8, 12, 4, make_pixels(8, 12, 4, frame)))
+    (folder / '0_emissive.png').write_bytes(b'')
+    assert core.infer_anim_meta(folder) == AnimMeta('Walk', 4, 8, 12, 4, 12)
+
+def test_rename_rendered_frames_is_quiet_without_log(tmp_path, capsys):
+    folder = tmp_path / 'Walk'
+    folder.mkdir()
+    (folder / '_p0002.png').write_bytes(b'2')
+    core.rename_rendered_frames(str(folder / '_p'), '_p', 2, 3)
+    assert (folder / '2_p.png').read_bytes() == b'2'
+    assert capsys.readouterr().out == ''
+
+    messages = []
+    core.rename_rendered_frames(str(folder / '_p'), '_p', 3, 3, log=messages.append)
+    assert messages == [str(folder), 'missing _p0003.png']
+
+# == OUTPUT VERIFICATION
+
+def write_frame(folder, frame, width, height, data=None):
+    with open(os.path.join(folder, core.get_frame_file_name(frame, '_p')), 'wb') as f:
+        f.write(data if data is not None else core.encode_png(width, height, 4, make_pixels(width, height, 4, frame)))
+
+def test_verify_output_reports_broken_frames(tmp_path):
+    folder = tmp_path / 'renders' / 'Idle'
+    folder.mkdir(parents=True)
+    job = AnimToRender(idle, 'Abe', 'renders/Idle/_p', 0, 2, (3, 4))
+    write_frame(folder, 0, 10, 15)
+    write_frame(folder, 1, 20, 30)
+    write_frame(folder, 2, 10, 15, core.encode_png(10, 15, 4, make_pixels(10, 15, 4))[:40])
+    write_frame(folder, 3, 10, 15)
+
+    problems, jobs_to_render = core.verify_output([job], '_p', 50, str(tmp_path), thread_count=2)
+    assert {problem: sorted(os.path.basename(file) for file in files) for problem, files in problems.items()} == {
+        'wrong size': ['1_p.png'],
+        'truncated': ['2_p.png'],
+        'missing': ['4_p.png'],
+    }
+    # the missing held frame is copied again by rendering frame_end
+    assert jobs_to_render == [job._replace(frame_start=1, frame_end=2, held_frames=(4,))]
+
+def test_verify_output_accepts_good_frames(tmp_path):
+    folder = tmp_path / 'renders' / 'Idle'
+    folder.mkdir(parents=True)
+    for frame in range(3):
+        write_frame(folder, frame, 20, 30)
+    assert core.verify_output([AnimToRender(idle, 'Abe', 'renders/Idle/_p', 0, 2)], '_p', 100, str(tmp_path)) == ({}, [])
+
+# == FRAME ENCODERS
+
+@pytest.mark.parametrize('channels', [3, 4])
+def test_png_round_trip(channels):
+    pixels = make_pixels(17, 9, channels)
+    assert core.decode_png(core.encode_png(17, 9, channels, pixels)) == (17, 9, channels, pixels)
+
+@pytest.mark.parametrize('channels', [3, 4])
+def test_qoi_round_trip(channels):
+    pixels = make_pixels(31, 12, channels)
+    assert core.decode_qoi(core.encode_qoi(31, 12, channels, pixels)) == (31, 12, channels, pixels)
+
+@pytest.mark.parametrize('channels', [3, 4])
+def test_qoi_numpy_matches_pure_python(channels):
+    pytest.importorskip('numpy')
+    for seed, (width, height) in enumerate([(0, 0), (1, 1), (31, 12), (64, 40)]):
+        pixels = make_pixels(width, height, channels, seed)
+        assert core.encode_qoi_numpy(width, height, channels, pixels) == core.encode_qoi(width, height, channels, pixels)
+
+    # runs longer than one chunk, and transparent black (which starts out in the index)
+    pixels = b'\x10\x20\x30\xff'[:channels] * 130 + b'\x00' * channels * 70
+    assert core.encode_qoi_numpy(100, 2, channels, pixels) == core.encode_qoi(100, 2, channels, pixels)
+
+def test_raw_rgba_adds_alpha():
+    assert core.encode_raw_rgba(2, 1, 3, b'\x01\x02\x03\x04\x05\x06') == b'\x01\x02\x03\xff\x04\x05\x06\xff'
+
+# == PIPELINE
+
+def test_pipeline_passes_items_through_every_stage():
+    results = []
+    lock = threading.Lock()
+    def record(item):
+        with lock:
+            results.append(item)
+        return item
+
+    pipeline = Pipeline([PipelineStage('double', lambda item: item * 2, 2), PipelineStage('record', record)], queue_size=2)
+    for item in range(20):
+        pipeline.put(item)
+    pipeline.close()
+
+    assert sorted(results) == [item * 2 for item in range(20)]
+    assert [stats['items'] for stats in pipeline.get_stats()] == [20, 20]
+
+def test_pipeline_counts_dropped_and_failed_items():
+    def check(item):
+        if item == 3:
+            raise ValueError(item)
+        return item if item % 2 else None
+
+    results = []
+    pipeline = Pipeline([PipelineStage('check', check), PipelineStage('record', results.append)])
+    for item in range(6):
+        pipeline.put(item)
+    pipeline.close()
+
+    stats = pipeline.get_stats()[0]
+    assert (stats['items'], stats['dropped'], stats['errors']) == (6, 3, 1)
+    assert sorted(results) == [1, 5]
+
+def test_pipeline_passes_failed_items_on_with_on_error():
+    def check(item):
+        if item == 3:
+            raise ValueError(item)
+        return item
+
+    results = []
+    pipeline = Pipeline([PipelineStage('check', check), PipelineStage('record', results.append)], on_error=lambda item, stage_name, exception: (item, stage_name))
+    for item in range(5):
+        pipeline.put(item)
+    pipeline.close()
+
+    assert sorted(results, key=str) == [(3, 'check'), 0, 1, 2, 4]
+    assert [(stats['items'], stats['errors'], stats['dropped']) for stats in pipeline.get_stats()] == [(5, 1, 0), (5, 0, 5)]
+
+# == LEGACY FRAME STRINGS
+
+def test_get_frame_list():
+    assert core.get_frame_list('@Walk:2;@Idle:5,3') == [
+        FrameInfo(0, 'Walk', 0),
+        FrameInfo(1, 'Walk', 1),
+        FrameInfo(2, 'Idle', 5),
+        FrameInfo(3, 'Idle', 3),
+    ]
+
+def test_get_frame_list_rejects_invalid_strings():
+    with pytest.raises(ValueError):
+        core.get_frame_list('@Walk')